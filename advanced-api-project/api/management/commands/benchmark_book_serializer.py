@@ -0,0 +1,79 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+
+from api.models import Author, Book
+from api.serializers import BookSerializer
+
+
+# The serializer as it was before the fast path: one clock read per validated
+# row, field-by-field to_representation() and one author query per item.
+class PlainBookSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'publication_year', 'author']
+
+    def validate_publication_year(self, value):
+        if value > datetime.now().year:
+            raise serializers.ValidationError("Publication year cannot be in the future.")
+        return value
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark BookSerializer serialize/validate throughput against a plain ModelSerializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Books per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario (best is reported)')
+
+    def best_of(self, repeat, func):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def report(self, label, rows, plain, fast):
+        self.stdout.write(
+            f'{label:<30} plain {rows / plain:10.0f} rows/s   fast {rows / fast:10.0f} rows/s   '
+            f'x{plain / fast:.1f}'
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        # Unsaved instances keep the benchmark off the database except for the
+        # author lookups that validation needs.
+        author = Author.objects.first() or Author.objects.create(name='Benchmark Author')
+        books = [
+            Book(id=i, title=f'Book {i}', publication_year=1900 + i % 120, author_id=author.pk)
+            for i in range(rows)
+        ]
+        payload = [
+            {'title': f'Book {i}', 'publication_year': 1900 + i % 120, 'author': author.pk}
+            for i in range(rows)
+        ]
+        context = {'current_year': datetime.now().year}
+
+        self.report(
+            'serialize list (many=True)', rows,
+            self.best_of(repeat, lambda: PlainBookSerializer(books, many=True).data),
+            self.best_of(repeat, lambda: BookSerializer(books, many=True, context=context).data),
+        )
+        self.report(
+            'serialize one at a time', rows,
+            self.best_of(repeat, lambda: [PlainBookSerializer(book).data for book in books]),
+            self.best_of(repeat, lambda: [BookSerializer(book, context=context).data for book in books]),
+        )
+
+        def validate(serializer_class, **kwargs):
+            serializer = serializer_class(data=payload, many=True, **kwargs)
+            assert serializer.is_valid(), serializer.errors
+
+        self.report(
+            'validate list (many=True)', rows,
+            self.best_of(repeat, lambda: validate(PlainBookSerializer)),
+            self.best_of(repeat, lambda: validate(BookSerializer, context=context)),
+        )
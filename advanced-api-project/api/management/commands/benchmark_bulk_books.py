@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author, Book
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows/sec of the bulk book endpoints against one request per book. '
+        'Everything runs inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Books per scenario')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        try:
+            with transaction.atomic():
+                self.run(rows)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def timed(self, label, rows, func):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label:<28} {rows:>7} rows  {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s')
+        return elapsed
+
+    def run(self, rows):
+        user = User.objects.create_user(username='bulk-benchmark', password='unused')
+        author = Author.objects.create(name='Benchmark Author')
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        payload = [
+            {'title': f'Benchmark {i}', 'publication_year': 2000, 'author': author.pk}
+            for i in range(rows)
+        ]
+
+        def create_single():
+            for item in payload:
+                client.post(reverse('book-create'), item, format='json')
+
+        def create_bulk():
+            client.post(reverse('book-create'), payload, format='json')
+
+        self.timed('create, one per request', rows, create_single)
+        self.timed('create, bulk', rows, create_bulk)
+
+        ids = list(Book.objects.filter(author=author).values_list('id', flat=True)[:rows])
+
+        def update_single():
+            for pk in ids:
+                client.patch(reverse('book-update', args=[pk]), {'title': 'Single'}, format='json')
+
+        def update_bulk():
+            client.patch(reverse('books-update'), [{'id': pk, 'title': 'Bulk'} for pk in ids], format='json')
+
+        self.timed('update, one per request', len(ids), update_single)
+        self.timed('update, bulk', len(ids), update_bulk)
+
+        remaining = list(Book.objects.filter(author=author).values_list('id', flat=True))
+        single_ids, bulk_ids = remaining[:rows], remaining[rows:]
+
+        def delete_single():
+            for pk in single_ids:
+                client.delete(reverse('book-delete', args=[pk]))
+
+        def delete_bulk():
+            client.delete(reverse('books-delete'), {'ids': bulk_ids}, format='json')
+
+        self.timed('delete, one per request', len(single_ids), delete_single)
+        self.timed('delete, bulk', len(bulk_ids), delete_bulk)
@@ -0,0 +1,104 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Book
+from api.views import BookListView
+
+# Plan fragments that mean a table is read in full, per backend.
+FULL_SCAN_PATTERNS = [
+    # SQLite: a SCAN without an index reads the table in rowid order. A SCAN
+    # "USING (COVERING) INDEX" walks the index in order and stops at LIMIT.
+    re.compile(r'\bSCAN (api_book|api_author)\b(?! USING (COVERING )?INDEX)'),
+    re.compile(r'Seq Scan on (api_book|api_author)'),  # PostgreSQL
+    re.compile(r"'type': 'ALL'|\btype\W+ALL\b"),  # MySQL
+]
+# Plan fragments that mean rows are sorted after being read instead of by an index.
+SORT_PATTERNS = [
+    re.compile(r'USE TEMP B-TREE FOR ORDER BY'),  # SQLite
+    re.compile(r'^\s*(->\s*)?Sort\b', re.MULTILINE),  # PostgreSQL
+    re.compile(r'Using filesort'),  # MySQL
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay representative BookListView filter/search/ordering requests and print "
+        "each query's EXPLAIN plan and timing, flagging full table scans and explicit sorts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed executions per query')
+        parser.add_argument('--limit', type=int, default=50, help='Rows fetched per execution')
+
+    def sample_requests(self):
+        book = Book.objects.select_related('author').order_by('pk').first()
+        if book is None:
+            return []
+        word = book.title.split()[0]
+        return [
+            '',
+            f'title={book.title}',
+            f'author={book.author_id}',
+            f'publication_year={book.publication_year}',
+            f'publication_year={book.publication_year}&ordering=-publication_year',
+            f'author={book.author_id}&ordering=publication_year',
+            'ordering=author',
+            'ordering=-publication_year',
+            f'search={word}',
+            f'search={book.author.name}',
+        ]
+
+    def build_queryset(self, query_string):
+        request = Request(APIRequestFactory().get('/api/books/', QUERY_STRING=query_string))
+        view = BookListView()
+        view.setup(request._request)
+        view.request = request
+        view.format_kwarg = None
+        return view.filter_queryset(view.get_queryset())
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        if options['limit'] < 1:
+            raise CommandError('--limit must be at least 1.')
+        requests = self.sample_requests()
+        if not requests:
+            self.stdout.write(self.style.WARNING('No books in the database; nothing to replay.'))
+            return
+
+        flagged = 0
+        for query_string in requests:
+            queryset = self.build_queryset(query_string)[:options['limit']]
+            plan = queryset.explain()
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            full_scan = any(pattern.search(plan) for pattern in FULL_SCAN_PATTERNS)
+            sorted_in_memory = any(pattern.search(plan) for pattern in SORT_PATTERNS)
+            flagged += full_scan
+
+            label = f'/api/books/?{query_string}' if query_string else '/api/books/'
+            style = self.style.WARNING if full_scan or sorted_in_memory else self.style.SUCCESS
+            self.stdout.write(style(
+                f'{label}  best {min(timings):.2f} ms, median {sorted(timings)[len(timings) // 2]:.2f} ms'
+                + ('  [FULL SCAN]' if full_scan else '')
+                + ('  [SORT]' if sorted_in_memory else '')
+            ))
+            if query_string.startswith('search='):
+                # SearchFilter uses icontains, i.e. LIKE '%term%': no B-tree
+                # index can seek to a substring, on any backend
+                self.stdout.write("  Note: search is LIKE '%term%'; no index can seek to it, so rows are checked one by one")
+            self.stdout.write(f'  SQL: {queryset.query}')
+            for line in plan.splitlines():
+                self.stdout.write(f'  {line}')
+            self.stdout.write('')
+
+        summary = f'{flagged} of {len(requests)} queries use a full table scan on {connection.vendor}.'
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
@@ -5,6 +5,12 @@ from django.db import models
 class Author(models.Model):
 	name = models.CharField(max_length=255, help_text="The author's name.")
 
+	class Meta:
+		# Serves AuthorListView's order_by('name', 'id'): a page of authors is read
+		# from the index in order instead of sorting the table. It cannot serve
+		# ?search=, which is icontains (LIKE '%term%') and always scans.
+		indexes = [models.Index(fields=['name'], name='api_author_name_idx')]
+
 	def __str__(self):
 		return self.name
 
@@ -15,6 +21,20 @@ class Book(models.Model):
 	publication_year = models.IntegerField(help_text="Year the book was published.")
 	author = models.ForeignKey(Author, related_name='books', on_delete=models.CASCADE, help_text="Reference to the author of the book.")
 
+	class Meta:
+		# Indexes follow BookListView's filters in its default title ordering:
+		#   /api/books/ (ordering=title)  -> title
+		#   ?publication_year=Y           -> (publication_year, title)
+		#   ?author=A                     -> (author, title), which also
+		#                                    serves the FK lookups
+		# Other orderings within a filter (e.g. ?author=A&ordering=publication_year)
+		# seek to the filtered rows and sort only those.
+		indexes = [
+			models.Index(fields=['title'], name='api_book_title_idx'),
+			models.Index(fields=['publication_year', 'title'], name='api_book_year_title_idx'),
+			models.Index(fields=['author', 'title'], name='api_book_author_title_idx'),
+		]
+
 	def __str__(self):
 		return f"{self.title} ({self.publication_year})"
 
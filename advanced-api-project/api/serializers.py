@@ -1,29 +1,219 @@
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.urls import reverse
 from rest_framework import serializers
 from .models import Author, Book
 
+# Rows per INSERT/UPDATE statement for bulk writes.
+BULK_BATCH_SIZE = 500
+
+# Most books nested under each author by AuthorSerializer.
+NESTED_BOOKS_LIMIT = 5
+
+# Field classes whose output equals the model attribute they read, so the list
+# fast path can copy the attribute instead of calling to_representation().
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.BooleanField)
+
+# CachedPrimaryKeyRelatedField resolves ids from ``cache`` when a list serializer
+# has preloaded the related objects, and falls back to a query otherwise.
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    cache = None
+
+    def to_internal_value(self, data):
+        if self.cache is not None:
+            try:
+                return self.cache[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+# BookListSerializer handles BookSerializer(many=True) writes in bulk.
+# Creates use a single bulk_create and updates a single bulk_update, instead of
+# one INSERT/UPDATE per item. Callers wrap save() in a transaction.
+# Output takes a fast path when every field is a plain attribute copy: each book
+# becomes a plain dict built straight from its attributes (author -> author_id).
+class BookListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        plan = self.fast_path_plan()
+        if plan is None:
+            return super().to_representation(data)
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return [{name: getattr(book, attr) for name, attr in plan} for book in iterable]
+
+    def fast_path_plan(self):
+        """(output name, model attribute) pairs, or None if a field needs to_representation()."""
+        model = self.child.Meta.model
+        plan = []
+        for name, field in self.child.fields.items():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1:
+                return None
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                plan.append((name, model._meta.get_field(field.source).attname))
+            elif isinstance(field, PASSTHROUGH_FIELDS) and not getattr(field, 'coerce_to_string', False):
+                plan.append((name, field.source))
+            else:
+                return None
+        return plan
+
+    def to_internal_value(self, data):
+        # Load every referenced author with one query instead of one per item.
+        if isinstance(data, list):
+            author_ids = set()
+            for item in data:
+                try:
+                    author_ids.add(int(item['author']))
+                except (TypeError, KeyError, ValueError):
+                    pass
+            self.child.fields['author'].cache = Author.objects.in_bulk(author_ids)
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        # For updates, self.instance is a list of books in the same order as the
+        # payload; validate each item against the book it targets.
+        if self.instance is not None:
+            if not hasattr(self, '_pending_instances'):
+                self._pending_instances = iter(self.instance)
+            self.child.instance = next(self._pending_instances, None)
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        books = [Book(**attrs) for attrs in validated_data]
+        return Book.objects.bulk_create(books, batch_size=BULK_BATCH_SIZE)
+
+    def update(self, instance, validated_data):
+        fields = set()
+        for book, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(book, attr, value)
+            fields.update(attrs)
+        if fields:
+            Book.objects.bulk_update(instance, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        return instance
+
+# SparseFieldsMixin keeps only the fields listed in the "fields" context entry
+# (the views fill it from ?fields=id,name) and replaces the fields named in the
+# "expand" context entry (?expand=author) with the nested serializer given for
+# them in Meta.expandable_fields. It only applies to the serializer the view
+# instantiates; nested serializers get nested_context() and keep all fields.
+# Naming a field the serializer does not have is a validation error (400).
+# trim_queryset() narrows a queryset to the columns the remaining fields read.
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self._context.get('expand')
+        expandable = getattr(self.Meta, 'expandable_fields', {}) if expand else {}
+        for name, serializer_class in expandable.items():
+            if name in expand and name in self.fields:
+                source = self.fields[name].source
+                kwargs = {} if source == name else {'source': source}
+                self.fields[name] = serializer_class(read_only=True, **kwargs)
+        requested = self._context.get('fields')
+        if requested:
+            unknown = sorted(set(requested) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}."]})
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+    def trim_queryset(self, queryset):
+        """
+        Apply .only() for the model columns behind the kept fields and
+        select_related() for expanded relations. Left untouched if any field
+        is computed, since its columns cannot be known.
+        """
+        opts = queryset.model._meta
+        only, related = [opts.pk.name], []
+        for field in self.fields.values():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return queryset
+            if isinstance(field, serializers.BaseSerializer):
+                if not (model_field.many_to_one or model_field.one_to_one):
+                    return queryset
+                related.append(field.source)
+                related_opts = model_field.related_model._meta
+                for nested in field.fields.values():
+                    try:
+                        related_opts.get_field(nested.source)
+                    except FieldDoesNotExist:
+                        return queryset
+                    only.append(f'{field.source}__{nested.source}')
+            elif model_field.concrete:
+                only.append(field.source)
+            else:
+                return queryset
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+def nested_context(context):
+    """Context for nested serializers; ?fields= and ?expand= only apply at the top level."""
+    return {key: value for key, value in context.items() if key not in ('fields', 'expand')}
+
+# AuthorSummarySerializer is the expanded form of a book's author (?expand=author).
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields = ['id', 'name']
+
 # BookSerializer serializes all fields of the Book model.
 # Includes custom validation to ensure publication_year is not in the future.
-class BookSerializer(serializers.ModelSerializer):
+# The current year can be passed in the "current_year" context entry so a whole
+# request validates against one clock read.
+# Supports ?fields= and ?expand=author through SparseFieldsMixin.
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
+        list_serializer_class = BookListSerializer
+        expandable_fields = {'author': AuthorSummarySerializer}
 
     def validate_publication_year(self, value):
-        from datetime import datetime
-        current_year = datetime.now().year
+        current_year = self.context.get('current_year')
+        if current_year is None:
+            current_year = datetime.now().year
         if value > current_year:
             raise serializers.ValidationError("Publication year cannot be in the future.")
         return value
 
 # AuthorSerializer serializes the name field and nests BookSerializer for related books.
 # Demonstrates one-to-many relationship: Author -> Books.
-class AuthorSerializer(serializers.ModelSerializer):
-    books = BookSerializer(many=True, read_only=True)
+# At most NESTED_BOOKS_LIMIT books are nested per author; books_count and
+# books_url give the full count and the paginated list.
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    books = serializers.SerializerMethodField()
+    books_count = serializers.SerializerMethodField()
+    books_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Author
-        fields = ['id', 'name', 'books']
+        fields = ['id', 'name', 'books_count', 'books_url', 'books']
+
+    def get_books(self, obj):
+        # AuthorListView prefetches the bounded preview into book_preview.
+        if hasattr(obj, 'book_preview'):
+            books = obj.book_preview
+        else:
+            books = obj.books.order_by('title', 'id')[:NESTED_BOOKS_LIMIT]
+        return BookSerializer(books, many=True, context=nested_context(self.context)).data
+
+    def get_books_count(self, obj):
+        # Annotated by AuthorListView; falls back to a COUNT for other callers.
+        count = getattr(obj, 'books_count', None)
+        return obj.books.count() if count is None else count
+
+    def get_books_url(self, obj):
+        url = reverse('author-books', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
 
 # Relationship Handling:
-# AuthorSerializer uses the 'books' related_name from the Book model's ForeignKey to nest all books for an author.
+# AuthorSerializer uses the 'books' related_name from the Book model's ForeignKey to nest books for an author.
 # BookSerializer includes a reference to the author via the ForeignKey field.
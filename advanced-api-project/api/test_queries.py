@@ -0,0 +1,60 @@
+import unittest
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from .management.commands.explain_book_queries import Command as ExplainCommand
+from .models import Author, Book
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Plans are checked against SQLite')
+class BookListIndexTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Test Author')
+        other = Author.objects.create(name='Other Author')
+        for n in range(20):
+            Book.objects.create(title=f'Book {n:02d}', publication_year=2000 + n % 5,
+                                author=self.author if n % 2 else other)
+
+    def plan(self, query_string):
+        return ExplainCommand().build_queryset(query_string)[:50].explain()
+
+    def test_default_listing_walks_the_title_index(self):
+        plan = self.plan('')
+        self.assertIn('USING INDEX api_book_title_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_author_filter_seeks_the_author_title_index(self):
+        plan = self.plan(f'author={self.author.pk}')
+        self.assertIn('SEARCH api_book USING INDEX api_book_author_title_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_year_filter_seeks_the_year_title_index(self):
+        plan = self.plan('publication_year=2001')
+        self.assertIn('SEARCH api_book USING INDEX api_book_year_title_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ExplainBookQueriesCommandTests(TestCase):
+    def test_reports_every_sample_request(self):
+        Book.objects.create(title='Test Book', publication_year=2020, author=Author.objects.create(name='Ann'))
+        out = StringIO()
+        call_command('explain_book_queries', repeat=1, stdout=out)
+        self.assertIn('of 10 queries use a full table scan', out.getvalue())
+        listing = next(line for line in out.getvalue().splitlines() if line.startswith('/api/books/  '))
+        if connection.vendor == 'sqlite':
+            # An ordered index walk under LIMIT is not a full scan
+            self.assertNotIn('[FULL SCAN]', listing)
+
+    def test_empty_database(self):
+        out = StringIO()
+        call_command('explain_book_queries', stdout=out)
+        self.assertIn('nothing to replay', out.getvalue())
+
+    def test_repeat_and_limit_must_be_positive(self):
+        with self.assertRaisesMessage(CommandError, '--repeat'):
+            call_command('explain_book_queries', repeat=0)
+        with self.assertRaisesMessage(CommandError, '--limit'):
+            call_command('explain_book_queries', limit=0)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+
+from .models import Author, Book
+from .serializers import BookListSerializer, BookSerializer
+
+
+class BookListFastPathTests(APITestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Test Author')
+        self.books = [
+            Book.objects.create(title=f'Book {n}', publication_year=2000 + n, author=self.author)
+            for n in range(3)
+        ]
+
+    def test_fast_path_matches_field_by_field_output(self):
+        fast = BookSerializer(self.books, many=True).data
+        with mock.patch.object(BookListSerializer, 'fast_path_plan', return_value=None):
+            regular = BookSerializer(self.books, many=True).data
+        self.assertEqual(fast, regular)
+        self.assertEqual(fast[0], {
+            'id': self.books[0].pk, 'title': 'Book 0', 'publication_year': 2000, 'author': self.author.pk,
+        })
+
+    def test_fast_path_skips_field_to_representation(self):
+        with mock.patch.object(serializers.CharField, 'to_representation') as to_representation:
+            BookSerializer(self.books, many=True).data
+        to_representation.assert_not_called()
+
+    def test_fast_path_accepts_a_related_manager(self):
+        data = BookSerializer(self.author.books, many=True).data
+        self.assertEqual(sorted(book['title'] for book in data), ['Book 0', 'Book 1', 'Book 2'])
+
+    def test_expanded_author_uses_the_regular_path(self):
+        serializer = BookSerializer(self.books, many=True, context={'expand': ['author']})
+        self.assertIsNone(serializer.fast_path_plan())
+        self.assertEqual(serializer.data[0]['author'], {'id': self.author.pk, 'name': 'Test Author'})
+
+
+class ClockSnapshotTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.author = Author.objects.create(name='Test Author')
+
+    def test_serializer_uses_the_year_from_the_context(self):
+        data = {'title': 'New Book', 'publication_year': 2001, 'author': self.author.pk}
+        with mock.patch('api.serializers.datetime') as clock:
+            self.assertFalse(BookSerializer(data=data, context={'current_year': 2000}).is_valid())
+            self.assertTrue(BookSerializer(data=data, context={'current_year': 2001}).is_valid())
+        clock.now.assert_not_called()
+
+    def test_views_read_the_clock_once_per_request(self):
+        self.client.force_authenticate(self.user)
+        payload = [
+            {'title': f'Book {n}', 'publication_year': 2000, 'author': self.author.pk} for n in range(5)
+        ]
+        with mock.patch('api.views.datetime') as clock, mock.patch('api.serializers.datetime') as fallback:
+            clock.now.return_value.year = 1999
+            response = self.client.post(reverse('book-create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Publication year cannot be in the future.', str(response.data))
+        self.assertEqual(clock.now.call_count, 1)
+        fallback.now.assert_not_called()
+        self.assertFalse(Book.objects.exists())
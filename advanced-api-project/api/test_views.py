@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -67,8 +69,137 @@ class BookAPITestCase(APITestCase):
         years = [b['publication_year'] for b in response.data]
         self.assertEqual(years, sorted(years))
 
+    def test_bulk_create_books(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('book-create')
+        data = [
+            {'title': f'Bulk Book {i}', 'publication_year': 2000 + i, 'author': self.author.id}
+            for i in range(5)
+        ]
+        with self.assertNumQueries(6):  # session, user, one author lookup, savepoint + insert + release
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(Book.objects.count(), 7)
+
+    def test_bulk_create_reports_item_errors(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('book-create')
+        data = [
+            {'title': 'Fine', 'publication_year': 2001, 'author': self.author.id},
+            {'title': 'Future', 'publication_year': 9999, 'author': self.author.id},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1])
+        self.assertIn('publication_year', response.data['errors'][0]['errors'])
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_bulk_update_books(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('books-update')
+        data = [
+            {'id': self.book.id, 'title': 'Renamed One'},
+            {'id': self.book2.id, 'publication_year': 1999},
+        ]
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.book.refresh_from_db()
+        self.book2.refresh_from_db()
+        self.assertEqual(self.book.title, 'Renamed One')
+        self.assertEqual(self.book2.publication_year, 1999)
+
+    def test_bulk_update_unknown_id_writes_nothing(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('books-update')
+        data = [
+            {'id': self.book.id, 'title': 'Renamed'},
+            {'id': 999999, 'title': 'Ghost'},
+        ]
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Test Book')
+
+    def test_bulk_delete_books(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('books-delete')
+        response = self.client.delete(url, {'ids': [self.book.id, self.book2.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertFalse(Book.objects.exists())
+
+    def test_bulk_delete_unknown_id_deletes_nothing(self):
+        self.client.login(username='testuser', password='testpass')
+        url = reverse('books-delete')
+        response = self.client.delete(url, {'ids': [self.book.id, 999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_author_list_bounds_nested_books(self):
+        for i in range(8):
+            Book.objects.create(title=f'Extra {i}', publication_year=2000, author=self.author)
+        other = Author.objects.create(name='Other Author')
+        Book.objects.create(title='Other Book', publication_year=2001, author=other)
+        url = reverse('author-list')
+        with self.assertNumQueries(3):  # count, authors with books_count, one books prefetch
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        authors = {a['name']: a for a in response.data['results']}
+        self.assertEqual(authors['Test Author']['books_count'], 10)
+        self.assertEqual(len(authors['Test Author']['books']), 5)
+        self.assertEqual(len(authors['Other Author']['books']), 1)
+        self.assertTrue(authors['Test Author']['books_url'].endswith(
+            reverse('author-books', args=[self.author.id])
+        ))
+
+    def test_author_list_sparse_fields_skip_books(self):
+        url = reverse('author-list') + '?fields=id,name'
+        with self.assertNumQueries(2):  # count, authors
+            response = self.client.get(url)
+        self.assertEqual(response.data['results'], [{'id': self.author.id, 'name': 'Test Author'}])
+
+    def test_author_books_paginated(self):
+        url = reverse('author-books', args=[self.author.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([b['title'] for b in response.data['results']], ['Another Book', 'Test Book'])
+
+    def test_book_list_sparse_fields_select_only_those_columns(self):
+        url = reverse('book-list') + '?fields=id,title'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data[0], {'id': self.book2.id, 'title': 'Another Book'})
+        self.assertNotIn('publication_year', queries.captured_queries[0]['sql'])
+
+    def test_unknown_sparse_fields_are_rejected(self):
+        response = self.client.get(reverse('book-list') + '?fields=id,bogus')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'fields': ['Unknown field(s): bogus.']})
+        response = self.client.get(reverse('author-list') + '?fields=books_total')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_book_list_expand_author_in_one_query(self):
+        url = reverse('book-list') + '?expand=author&fields=title,author'
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            response.data[0],
+            {'title': 'Another Book', 'author': {'id': self.author.id, 'name': 'Test Author'}},
+        )
+
+    def test_book_detail_expand_author(self):
+        url = reverse('book-detail', args=[self.book.id]) + '?expand=author'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['author'], {'id': self.author.id, 'name': 'Test Author'})
+        self.assertEqual(response.data['title'], 'Test Book')
+
 # Documentation:
-# - Tests cover CRUD operations, filtering, searching, and ordering for Book endpoints.
+# - Tests cover CRUD operations, bulk create/update/delete, filtering, searching, and ordering for Book endpoints,
+#   plus the author list's bounded nested books and sparse fieldsets/?expand= on books and authors.
 # - Authentication and permission checks are included.
 # - Run tests with: python manage.py test api
 # - See test outputs for details on failures and successes.
@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView
+from .views import (
+    BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView,
+    BookBulkUpdateView, BookBulkDeleteView, AuthorListView, AuthorBookListView,
+)
 
 urlpatterns = [
     # List all books
@@ -8,20 +11,28 @@ urlpatterns = [
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),
     # Create a new book
     path('books/create/', BookCreateView.as_view(), name='book-create'),
-    # Update books (bulk or custom endpoint)
-    path('books/update/', BookUpdateView.as_view(), name='books-update'),
-    # Delete books (bulk or custom endpoint)
-    path('books/delete/', BookDeleteView.as_view(), name='books-delete'),
+    # Update many books at once (PUT/PATCH a list of objects with ids)
+    path('books/update/', BookBulkUpdateView.as_view(), name='books-update'),
+    # Delete many books at once (DELETE {"ids": [...]})
+    path('books/delete/', BookBulkDeleteView.as_view(), name='books-delete'),
     # Update an existing book (PUT/PATCH)
     path('books/<int:pk>/update/', BookUpdateView.as_view(), name='book-update'),
     # Delete a book (DELETE)
     path('books/<int:pk>/delete/', BookDeleteView.as_view(), name='book-delete'),
+    # List authors with a preview of their books
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    # All books of one author, paginated
+    path('authors/<int:pk>/books/', AuthorBookListView.as_view(), name='author-books'),
 ]
 
 # Documentation:
 # - /books/ : GET for list
 # - /books/<int:pk>/ : GET for detail
-# - /books/create/ : POST for create
+# - /books/create/ : POST for create (an object, or a list of objects for bulk create)
+# - /books/update/ : PUT/PATCH a list of objects with ids for bulk update
+# - /books/delete/ : DELETE {"ids": [...]} for bulk delete
+# - /authors/ : GET paginated authors (?fields=id,name to skip nested books)
+# - /authors/<int:pk>/books/ : GET paginated books of one author
 # - /books/<int:pk>/update/ : PUT/PATCH for update
 # - /books/<int:pk>/delete/ : DELETE for delete
 # See README for more details and usage instructions.
@@ -1,13 +1,59 @@
-from rest_framework import generics, filters
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from rest_framework import generics, filters, status
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters import rest_framework
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Book
-from .serializers import BookSerializer
+from rest_framework.pagination import PageNumberPagination
+from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer, NESTED_BOOKS_LIMIT
+
+class StandardPagination(PageNumberPagination):
+	page_size = 20
+	page_size_query_param = 'page_size'
+	max_page_size = 100
+
+# Reads the clock once per request and shares it with every serialized row
+# through the "current_year" context entry used by BookSerializer validation.
+class ClockSnapshotMixin:
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		context['current_year'] = datetime.now().year
+		return context
+
+# Parses ?fields=a,b (or another comma-separated parameter) into a list, or
+# None when the parameter is absent.
+def requested_fields(request, param='fields'):
+	raw = request.query_params.get(param)
+	if not raw:
+		return None
+	return [name.strip() for name in raw.split(',') if name.strip()]
+
+# SparseFieldsViewMixin passes ?fields= and ?expand= to the serializer (see
+# SparseFieldsMixin) and trims the queryset to the columns and relations the
+# remaining fields read, e.g. ?fields=id,title selects only those two columns
+# and ?expand=author joins the author instead of returning its id.
+class SparseFieldsViewMixin:
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		context['fields'] = requested_fields(self.request)
+		context['expand'] = requested_fields(self.request, 'expand')
+		return context
+
+	def filter_queryset(self, queryset):
+		queryset = super().filter_queryset(queryset)
+		context = self.get_serializer_context()
+		if context['fields'] is None and context['expand'] is None:
+			return queryset
+		return self.get_serializer_class()(context=context).trim_queryset(queryset)
 
 # BookListView: Retrieves all books.
 # Allows read-only access to unauthenticated users.
-class BookListView(generics.ListAPIView):
+# Supports ?fields=id,title and ?expand=author (SparseFieldsViewMixin).
+class BookListView(SparseFieldsViewMixin, ClockSnapshotMixin, generics.ListAPIView):
 	queryset = Book.objects.all()
 	serializer_class = BookSerializer
 	permission_classes = [IsAuthenticatedOrReadOnly]
@@ -26,18 +72,52 @@ class BookListView(generics.ListAPIView):
 
 # BookDetailView: Retrieves a single book by ID.
 # Allows read-only access to unauthenticated users.
-class BookDetailView(generics.RetrieveAPIView):
+# Supports ?fields= and ?expand=author like BookListView.
+class BookDetailView(SparseFieldsViewMixin, generics.RetrieveAPIView):
 	queryset = Book.objects.all()
 	serializer_class = BookSerializer
 	permission_classes = [IsAuthenticatedOrReadOnly]
 
-# BookCreateView: Adds a new book.
+# Upper bound on items accepted by one bulk request.
+MAX_BULK_ITEMS = 1000
+
+# Turns ListSerializer errors (a list, or a dict keyed by index depending on the
+# DRF version) into [{"index": i, "errors": {...}}] for the failing items only.
+def item_errors(errors):
+	items = errors.items() if isinstance(errors, dict) else enumerate(errors)
+	return [{'index': int(index), 'errors': detail} for index, detail in items if detail]
+
+def bulk_payload_error(data):
+	if not isinstance(data, list):
+		return 'Expected a list of items.'
+	if not data:
+		return 'Expected at least one item.'
+	if len(data) > MAX_BULK_ITEMS:
+		return f'At most {MAX_BULK_ITEMS} items can be sent in one request.'
+	return None
+
+# BookCreateView: Adds a new book, or many books when the payload is a list.
 # Only authenticated users can create books.
-class BookCreateView(generics.CreateAPIView):
+# A list payload is validated item by item and inserted with one bulk_create;
+# if any item is invalid nothing is written and per-item errors are returned.
+class BookCreateView(ClockSnapshotMixin, generics.CreateAPIView):
 	queryset = Book.objects.all()
 	serializer_class = BookSerializer
 	permission_classes = [IsAuthenticated]
 
+	def create(self, request, *args, **kwargs):
+		if not isinstance(request.data, list):
+			return super().create(request, *args, **kwargs)
+		error = bulk_payload_error(request.data)
+		if error:
+			return Response({'detail': error}, status=status.HTTP_400_BAD_REQUEST)
+		serializer = self.get_serializer(data=request.data, many=True)
+		if not serializer.is_valid():
+			return Response({'errors': item_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+		with transaction.atomic():
+			self.perform_create(serializer)
+		return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 	# Customization: You can override perform_create to add custom logic.
 	def perform_create(self, serializer):
 		# Example: Add custom logic here if needed
@@ -45,7 +125,7 @@ class BookCreateView(generics.CreateAPIView):
 
 # BookUpdateView: Modifies an existing book.
 # Only authenticated users can update books.
-class BookUpdateView(generics.UpdateAPIView):
+class BookUpdateView(ClockSnapshotMixin, generics.UpdateAPIView):
 	queryset = Book.objects.all()
 	serializer_class = BookSerializer
 	permission_classes = [IsAuthenticated]
@@ -67,8 +147,127 @@ class BookDeleteView(generics.DestroyAPIView):
 		# Example: Add custom logic here if needed
 		instance.delete()
 
+# BookBulkUpdateView: Updates many books in one request.
+# Only authenticated users can update books.
+# PUT/PATCH a list of objects that each carry an "id". The targeted books are
+# loaded with one query, validated item by item and written with one
+# bulk_update inside a transaction. Unknown ids and invalid items are reported
+# per item and nothing is written.
+class BookBulkUpdateView(ClockSnapshotMixin, generics.GenericAPIView):
+	queryset = Book.objects.all()
+	serializer_class = BookSerializer
+	permission_classes = [IsAuthenticated]
+
+	def put(self, request, *args, **kwargs):
+		return self.bulk_update(request, partial=False)
+
+	def patch(self, request, *args, **kwargs):
+		return self.bulk_update(request, partial=True)
+
+	def bulk_update(self, request, partial):
+		error = bulk_payload_error(request.data)
+		if error:
+			return Response({'detail': error}, status=status.HTTP_400_BAD_REQUEST)
+
+		errors = {}
+		ids = []
+		for index, item in enumerate(request.data):
+			try:
+				ids.append(int(item['id']))
+			except (TypeError, KeyError, ValueError):
+				ids.append(None)
+				errors[index] = {'id': ['A valid book id is required.']}
+		books = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+		for index, pk in enumerate(ids):
+			if pk is not None and pk not in books:
+				errors[index] = {'id': [f'Book {pk} does not exist.']}
+
+		instances = [books.get(pk) for pk in ids]
+		serializer = self.get_serializer(instances, data=request.data, many=True, partial=partial)
+		if not serializer.is_valid():
+			for entry in item_errors(serializer.errors):
+				errors.setdefault(entry['index'], {}).update(entry['errors'])
+		if errors:
+			report = [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+			return Response({'errors': report}, status=status.HTTP_400_BAD_REQUEST)
+
+		with transaction.atomic():
+			serializer.save()
+		return Response(serializer.data, status=status.HTTP_200_OK)
+
+# BookBulkDeleteView: Deletes many books in one request.
+# Only authenticated users can delete books.
+# DELETE with {"ids": [1, 2, 3]}. Every id must exist, otherwise the missing ones
+# are reported and nothing is deleted; on success the rows are removed with a
+# single DELETE ... WHERE id IN (...).
+class BookBulkDeleteView(generics.GenericAPIView):
+	queryset = Book.objects.all()
+	serializer_class = BookSerializer
+	permission_classes = [IsAuthenticated]
+
+	def delete(self, request, *args, **kwargs):
+		raw_ids = request.data.get('ids') if isinstance(request.data, dict) else None
+		error = bulk_payload_error(raw_ids)
+		if error:
+			return Response({'ids': [error]}, status=status.HTTP_400_BAD_REQUEST)
+
+		errors = []
+		ids = {}
+		for index, value in enumerate(raw_ids):
+			try:
+				ids[index] = int(value)
+			except (TypeError, ValueError):
+				errors.append({'index': index, 'errors': {'id': ['A valid book id is required.']}})
+		with transaction.atomic():
+			queryset = self.get_queryset().filter(id__in=ids.values())
+			existing = set(queryset.values_list('id', flat=True))
+			errors.extend(
+				{'index': index, 'errors': {'id': [f'Book {pk} does not exist.']}}
+				for index, pk in ids.items()
+				if pk not in existing
+			)
+			if errors:
+				errors.sort(key=lambda entry: entry['index'])
+				return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+			deleted, _ = queryset.delete()
+		return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
+# AuthorListView: Paginated list of authors with a bounded preview of their books.
+# Allows read-only access to unauthenticated users.
+# Books are fetched for the whole page in one prefetch query, limited to
+# NESTED_BOOKS_LIMIT per author (ordered by title), and books_count is annotated
+# on the author query. ?fields=id,name drops the nested books and skips the
+# prefetch entirely.
+class AuthorListView(SparseFieldsViewMixin, generics.ListAPIView):
+	serializer_class = AuthorSerializer
+	permission_classes = [IsAuthenticatedOrReadOnly]
+	pagination_class = StandardPagination
+
+	def get_queryset(self):
+		fields = requested_fields(self.request)
+		queryset = Author.objects.order_by('name', 'id')
+		if fields is None or 'books_count' in fields:
+			queryset = queryset.annotate(books_count=Count('books'))
+		if fields is None or 'books' in fields:
+			preview = Book.objects.order_by('title', 'id')[:NESTED_BOOKS_LIMIT]
+			queryset = queryset.prefetch_related(Prefetch('books', queryset=preview, to_attr='book_preview'))
+		return queryset
+
+# AuthorBookListView: All books of one author, paginated.
+# Allows read-only access to unauthenticated users.
+# Supports ?fields= and ?expand=author like BookListView.
+class AuthorBookListView(SparseFieldsViewMixin, generics.ListAPIView):
+	serializer_class = BookSerializer
+	permission_classes = [IsAuthenticatedOrReadOnly]
+	pagination_class = StandardPagination
+
+	def get_queryset(self):
+		return Book.objects.filter(author_id=self.kwargs['pk']).order_by('title', 'id')
+
 # Documentation:
 # - Each view uses DRF generic views for CRUD operations.
 # - Permission classes restrict write operations to authenticated users.
 # - Custom hooks (perform_create, perform_update, perform_destroy) allow further customization.
+# - Bulk endpoints (list payload to books/create/, books/update/, books/delete/) run in
+#   one transaction and report errors per item as {"errors": [{"index": i, "errors": {...}}]}.
 # - See README for endpoint details and usage instructions.
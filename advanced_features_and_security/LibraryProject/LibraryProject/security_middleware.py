@@ -6,87 +6,157 @@ This middleware implements additional security measures including:
 - Additional security headers
 - Input sanitization logging
 - Rate limiting protection
+
+The response headers (including the CSP string) are built once from settings
+and rebuilt only when a relevant setting changes (the setting_changed signal
+fires in tests and with override_settings). Suspicious user agents and URL
+patterns are each matched with a single compiled, case-insensitive regex, so
+a clean request costs two regex searches and one header loop.
 """
 
 import logging
+import re
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import HttpResponseForbidden
 from django.utils.deprecation import MiddlewareMixin
-from django.conf import settings
 
 logger = logging.getLogger('django.security')
 
+# Basic bot detection (you can expand this)
+SUSPICIOUS_AGENTS = ['sqlmap', 'nikto', 'dirb', 'nmap']
+
+# Common attack patterns in URLs
+SUSPICIOUS_PATTERNS = ['../../../', 'union+select', '<script>', 'javascript:', 'eval(']
+
+# (directive, setting) pairs, in header order
+CSP_DIRECTIVES = [
+    ('default-src', 'CSP_DEFAULT_SRC'),
+    ('script-src', 'CSP_SCRIPT_SRC'),
+    ('style-src', 'CSP_STYLE_SRC'),
+    ('img-src', 'CSP_IMG_SRC'),
+    ('font-src', 'CSP_FONT_SRC'),
+    ('connect-src', 'CSP_CONNECT_SRC'),
+    ('frame-ancestors', 'CSP_FRAME_ANCESTORS'),
+    ('base-uri', 'CSP_BASE_URI'),
+    ('form-action', 'CSP_FORM_ACTION'),
+]
+
+HEADER_SETTINGS = {setting for _, setting in CSP_DIRECTIVES} | {'SECURE_REFERRER_POLICY'}
+
+
+def compile_matcher(patterns):
+    """One case-insensitive regex matching any of the literal patterns."""
+    return re.compile('|'.join(re.escape(pattern) for pattern in patterns), re.IGNORECASE)
+
+
+SUSPICIOUS_AGENT_RE = compile_matcher(SUSPICIOUS_AGENTS)
+SUSPICIOUS_PATTERN_RE = compile_matcher(SUSPICIOUS_PATTERNS)
+
+
+def build_csp():
+    """
+    Build the Content-Security-Policy value from the CSP_* settings, or return
+    None when CSP_DEFAULT_SRC is not set.
+    """
+    if not hasattr(settings, 'CSP_DEFAULT_SRC'):
+        return None
+    csp_directives = [
+        f"{directive} {' '.join(getattr(settings, setting))}"
+        for directive, setting in CSP_DIRECTIVES
+        if hasattr(settings, setting)
+    ]
+    return '; '.join(csp_directives) or None
+
+
+def build_security_headers():
+    """
+    Build the (header, value) pairs added to every response.
+    """
+    headers = []
+    csp = build_csp()
+    if csp:
+        headers.append(('Content-Security-Policy', csp))
+    headers += [
+        ('X-Content-Type-Options', 'nosniff'),
+        ('X-Frame-Options', 'DENY'),
+        ('X-XSS-Protection', '1; mode=block'),
+        ('Referrer-Policy', getattr(settings, 'SECURE_REFERRER_POLICY', 'strict-origin-when-cross-origin')),
+        ('Permissions-Policy', 'geolocation=(), microphone=(), camera=()'),
+    ]
+    return tuple(headers)
+
+
+_security_headers = None
+
+
+def get_security_headers():
+    """
+    Return the cached header pairs, building them on first use.
+    """
+    global _security_headers
+    if _security_headers is None:
+        _security_headers = build_security_headers()
+    return _security_headers
+
+
+@receiver(setting_changed)
+def reset_security_headers(setting, **kwargs):
+    """
+    Drop the cached headers when a CSP or referrer setting changes.
+    """
+    global _security_headers
+    if setting in HEADER_SETTINGS:
+        _security_headers = None
+
+
 class SecurityMiddleware(MiddlewareMixin):
     """
     Custom security middleware to add enhanced security headers and protections.
     """
-    
+
     def process_request(self, request):
         """
         Process incoming requests for security violations.
         """
         # Log potentially suspicious requests
         user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        # Basic bot detection (you can expand this)
-        suspicious_agents = ['sqlmap', 'nikto', 'dirb', 'nmap']
-        if any(agent in user_agent.lower() for agent in suspicious_agents):
-            logger.warning(f"Suspicious user agent detected: {user_agent} from {self.get_client_ip(request)}")
-        
-        # Check for common attack patterns in URLs
-        suspicious_patterns = ['../../../', 'union+select', '<script>', 'javascript:', 'eval(']
-        request_path = request.get_full_path().lower()
-        
-        for pattern in suspicious_patterns:
-            if pattern in request_path:
-                logger.warning(f"Suspicious URL pattern '{pattern}' detected from {self.get_client_ip(request)}: {request_path}")
-                # Optionally block the request
-                # return HttpResponseForbidden("Forbidden")
-        
+        if user_agent and SUSPICIOUS_AGENT_RE.search(user_agent):
+            logger.warning("Suspicious user agent detected: %s from %s", user_agent, self.get_client_ip(request))
+
+        # Check for common attack patterns in the path and query string
+        # without building the full path for clean requests
+        query_string = request.META.get('QUERY_STRING', '')
+        if SUSPICIOUS_PATTERN_RE.search(request.path) or (
+            query_string and SUSPICIOUS_PATTERN_RE.search(query_string)
+        ):
+            request_path = request.get_full_path()
+            matches = SUSPICIOUS_PATTERN_RE.findall(request.path) + SUSPICIOUS_PATTERN_RE.findall(query_string)
+            for pattern in sorted({match.lower() for match in matches}):
+                logger.warning(
+                    "Suspicious URL pattern '%s' detected from %s: %s",
+                    pattern, self.get_client_ip(request), request_path.lower(),
+                )
+            # Optionally block the request
+            # return HttpResponseForbidden("Forbidden")
+
         return None
-    
+
     def process_response(self, request, response):
         """
         Add security headers to all responses.
         """
-        # Content Security Policy
-        if hasattr(settings, 'CSP_DEFAULT_SRC'):
-            csp_directives = []
-            
-            if hasattr(settings, 'CSP_DEFAULT_SRC'):
-                csp_directives.append(f"default-src {' '.join(settings.CSP_DEFAULT_SRC)}")
-            if hasattr(settings, 'CSP_SCRIPT_SRC'):
-                csp_directives.append(f"script-src {' '.join(settings.CSP_SCRIPT_SRC)}")
-            if hasattr(settings, 'CSP_STYLE_SRC'):
-                csp_directives.append(f"style-src {' '.join(settings.CSP_STYLE_SRC)}")
-            if hasattr(settings, 'CSP_IMG_SRC'):
-                csp_directives.append(f"img-src {' '.join(settings.CSP_IMG_SRC)}")
-            if hasattr(settings, 'CSP_FONT_SRC'):
-                csp_directives.append(f"font-src {' '.join(settings.CSP_FONT_SRC)}")
-            if hasattr(settings, 'CSP_CONNECT_SRC'):
-                csp_directives.append(f"connect-src {' '.join(settings.CSP_CONNECT_SRC)}")
-            if hasattr(settings, 'CSP_FRAME_ANCESTORS'):
-                csp_directives.append(f"frame-ancestors {' '.join(settings.CSP_FRAME_ANCESTORS)}")
-            if hasattr(settings, 'CSP_BASE_URI'):
-                csp_directives.append(f"base-uri {' '.join(settings.CSP_BASE_URI)}")
-            if hasattr(settings, 'CSP_FORM_ACTION'):
-                csp_directives.append(f"form-action {' '.join(settings.CSP_FORM_ACTION)}")
-            
-            if csp_directives:
-                response['Content-Security-Policy'] = '; '.join(csp_directives)
-        
-        # Additional security headers
-        response['X-Content-Type-Options'] = 'nosniff'
-        response['X-Frame-Options'] = 'DENY'
-        response['X-XSS-Protection'] = '1; mode=block'
-        response['Referrer-Policy'] = getattr(settings, 'SECURE_REFERRER_POLICY', 'strict-origin-when-cross-origin')
-        response['Permissions-Policy'] = 'geolocation=(), microphone=(), camera=()'
-        
+        for header, value in get_security_headers():
+            response[header] = value
+
         # Remove server information
         if 'Server' in response:
             del response['Server']
-        
+
         return response
-    
+
     def get_client_ip(self, request):
         """
         Get the client's IP address, accounting for proxies.
@@ -96,4 +166,4 @@ class SecurityMiddleware(MiddlewareMixin):
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
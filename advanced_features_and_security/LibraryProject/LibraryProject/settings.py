@@ -129,6 +129,14 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Custom User Model
 AUTH_USER_MODEL = 'bookshelf.CustomUser'
 
+# Permission checks read from a cross-request cache (bookshelf/permissions.py).
+# Use a shared cache (Redis/Memcached) in production so invalidation reaches
+# every process; the default LocMemCache is per-process.
+# LockoutBackend is CachedPermissionBackend plus login lockout: locked
+# usernames/IPs are refused before any password is hashed (bookshelf/lockout.py).
+AUTHENTICATION_BACKENDS = ['bookshelf.lockout.LockoutBackend']
+PERMISSION_CACHE_TIMEOUT = 300  # Seconds a user's resolved permissions are cached
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -166,6 +174,22 @@ SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript access to session cookies
 SESSION_COOKIE_SAMESITE = 'Strict'  # Session cookie SameSite attribute
 SESSION_COOKIE_AGE = 3600  # Session timeout (1 hour)
 
+# Sessions (write-behind cache in front of the database, see bookshelf/sessions.py)
+SESSION_ENGINE = 'bookshelf.sessions'
+SESSION_WRITE_BEHIND_INTERVAL = 10  # Seconds between batched session writes
+SESSION_WRITE_BEHIND_MAX_PENDING = 500  # Queued sessions that force a write
+SESSION_CLEANUP_BATCH_SIZE = 1000  # Expired sessions deleted per statement
+
+# Login Lockout (sliding-window failure counters in the cache)
+LOGIN_LOCKOUT_WINDOW = 900  # Seconds failures are remembered
+LOGIN_LOCKOUT_USERNAME_LIMIT = 5  # Failures per username before it is locked
+LOGIN_LOCKOUT_IP_LIMIT = 50  # Failures per client IP before it is locked
+LOGIN_LOCKOUT_TRUSTED_PROXIES = 0  # Reverse proxies appending to X-Forwarded-For (0: count REMOTE_ADDR)
+
+# Admin changelists (see bookshelf/changelist.py)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000  # Rows from which unfiltered lists use estimated counts
+ADMIN_PREFIX_SEARCH = False  # True: admin search matches from the start of each field (indexed)
+
 # Additional Security Headers
 SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 
@@ -203,6 +227,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # Queues audit events for the listener thread in bookshelf/audit.py,
+        # which bulk-writes them to AuditEvent and passes warnings to django.security
+        'audit': {
+            'level': 'INFO',
+            '()': 'bookshelf.audit.AuditQueueHandler',
+        },
     },
     'loggers': {
         'django.security': {
@@ -215,5 +245,16 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        'bookshelf.audit': {
+            'handlers': ['audit'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
-}
\ No newline at end of file
+}
+
+# Audit event pipeline (bookshelf/audit.py)
+AUDIT_QUEUE_SIZE = 10000  # Events held in memory before new ones are dropped
+AUDIT_QUEUE_TIMEOUT = 0.05  # Seconds a request waits for room in a full queue
+AUDIT_BATCH_SIZE = 500  # Events per bulk insert
+AUDIT_FLUSH_INTERVAL = 0.5  # Seconds before a partial batch is written
\ No newline at end of file
@@ -1,20 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Book, CustomUser
+from django.utils.text import smart_split, unescape_string_literal
+from .changelist import LargeTableAdmin
+from .models import AuditEvent, Book, CustomUser
+from .search import search_books
 
 # Custom admin configuration for CustomUser
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdmin, UserAdmin):
     """
     Admin interface for CustomUser model with additional fields.
     """
     # Fields to display in the user list
     list_display = ('username', 'email', 'first_name', 'last_name', 'date_of_birth', 'is_staff', 'is_active')
     
-    # Fields to filter by in the admin sidebar
+    # Fields to filter by in the admin sidebar (date fields are indexed)
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'date_joined', 'date_of_birth')
     
-    # Fields to search by
+    # Fields to search by (prefix search on these is indexed, see ADMIN_PREFIX_SEARCH)
     search_fields = ('username', 'first_name', 'last_name', 'email')
     
     # Ordering
@@ -36,10 +39,35 @@ class CustomUserAdmin(UserAdmin):
 
 # Custom admin configuration for Book model
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ('title', 'author', 'publication_year')     # Show these fields in list view
-    list_filter = ('publication_year',)                        # Filter sidebar by publication year
+    list_filter = ('publication_year',)                        # Filter sidebar by publication year (indexed)
     search_fields = ('title', 'author')                        # Search bar for title and author
 
+    def get_search_results(self, request, queryset, search_term):
+        if self.use_prefix_search():
+            return super().get_search_results(request, queryset, search_term)
+        # Substring search through the indexes used by the book list view;
+        # like the default, every word must match the title or the author
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            queryset = search_books(queryset, bit)
+        return queryset, False
+
+# Read-only admin for the audit trail written by bookshelf/audit.py
+@admin.register(AuditEvent)
+class AuditEventAdmin(LargeTableAdmin, admin.ModelAdmin):
+    list_display = ('created', 'level', 'action', 'username', 'ip_address', 'object_id', 'message')
+    list_filter = ('action', 'level')
+    search_fields = ('username',)                              # Prefix-friendly indexed column
+    date_hierarchy = 'created'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Alternative explicit registration (both methods work)
 # admin.site.register(CustomUser, CustomUserAdmin)
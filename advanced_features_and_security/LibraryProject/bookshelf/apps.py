@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BookshelfConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookshelf'
+
+    def ready(self):
+        from . import lockout, permissions, search, sessions
+        lockout.connect_signals()
+        permissions.connect_signals()
+        search.connect_signals()
+        sessions.connect_signals()
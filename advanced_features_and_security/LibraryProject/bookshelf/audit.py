@@ -0,0 +1,272 @@
+"""
+Structured, non-blocking audit logging for the bookshelf views.
+
+Views call ``audit(request, action, message, *args)``. The record goes to the
+"bookshelf.audit" logger, whose AuditQueueHandler only puts it on a bounded
+in-memory queue: no formatting, no file or database I/O on the request thread.
+A single AuditQueueListener thread drains the queue in batches and
+- bulk-inserts the batch into the AuditEvent table, and
+- hands WARNING and above to the "django.security" logger, so they still
+  reach security.log through the handlers configured in LOGGING.
+
+When the queue is full, the request thread waits at most AUDIT_QUEUE_TIMEOUT
+seconds and then drops the event; drops are counted and reported by the
+listener, so a slow database degrades audit completeness, not latency.
+
+Settings:
+- AUDIT_QUEUE_SIZE: maximum queued events (default 10000).
+- AUDIT_QUEUE_TIMEOUT: seconds to wait for room in a full queue (default 0.05).
+- AUDIT_BATCH_SIZE: maximum events per bulk insert (default 500).
+- AUDIT_FLUSH_INTERVAL: seconds to wait for more events before writing a
+  partial batch (default 0.5).
+"""
+
+import atexit
+import ipaddress
+import logging
+import queue
+import threading
+from datetime import datetime, timezone as dt_timezone
+from logging.handlers import QueueHandler
+
+from django.conf import settings
+from django.db import close_old_connections
+
+audit_logger = logging.getLogger('bookshelf.audit')
+logger = logging.getLogger('django.security')
+
+
+def audit(request, action, message, *args, level=logging.INFO, object_id=None, **data):
+    """
+    Record an audit event for ``request``.
+    ``message`` is %-formatted with ``args`` on the listener thread, so pass
+    values as arguments instead of building an f-string.
+    """
+    if not audit_logger.isEnabledFor(level):
+        return
+    user = getattr(request, 'user', None)
+    authenticated = user is not None and user.is_authenticated
+    audit_logger.log(level, message, *args, extra={'audit': {
+        'action': action,
+        'user_id': user.pk if authenticated else None,
+        'username': user.get_username() if authenticated else '',
+        'ip_address': client_ip(request),
+        'object_id': object_id,
+        'data': data,
+    }})
+
+
+def client_ip(request):
+    """
+    Get the client's IP address, accounting for proxies, or None if it is not
+    a valid address (so one bad header cannot fail a whole batch insert).
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0].strip()
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
+class AuditDatabaseHandler(logging.Handler):
+    """
+    Writes batches of audit records to AuditEvent with one bulk insert.
+    A record that cannot be converted (e.g. its message arguments do not
+    match the format) goes to handleError() and the rest are still written.
+    """
+
+    def handle_batch(self, records):
+        events = []
+        for record in records:
+            try:
+                if self.filter(record):
+                    events.append(self.to_event(record))
+            except Exception:
+                self.handleError(record)
+        if not events:
+            return
+        try:
+            from .models import AuditEvent
+
+            close_old_connections()
+            AuditEvent.objects.bulk_create(events, batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 500))
+        except Exception:
+            logger.exception("Could not write %d audit events", len(events))
+
+    def to_event(self, record):
+        from .models import AuditEvent
+
+        info = getattr(record, 'audit', None) or {}
+        return AuditEvent(
+            created=datetime.fromtimestamp(record.created, tz=dt_timezone.utc),
+            level=record.levelno,
+            action=info.get('action', record.name),
+            user_id=info.get('user_id'),
+            username=info.get('username', ''),
+            ip_address=info.get('ip_address'),
+            object_id=info.get('object_id'),
+            message=record.getMessage(),
+            data=info.get('data') or {},
+        )
+
+    def emit(self, record):
+        self.handle_batch([record])
+
+
+class SecurityLogForwarder(logging.Handler):
+    """
+    Passes WARNING and above to the "django.security" logger (and so to the
+    security.log file handler) from the listener thread.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+
+    def emit(self, record):
+        logger.handle(record)
+
+
+class AuditQueueListener:
+    """
+    Background thread that hands its handlers whole batches: it waits up to
+    AUDIT_FLUSH_INTERVAL for the first record, then drains whatever else is
+    queued, up to AUDIT_BATCH_SIZE records.
+
+    Handler failures are passed to the handler's handleError() so one bad
+    record or batch never stops the thread. stop() sets an event instead of
+    queueing a sentinel, so it cannot block or fail on a full queue at exit.
+    """
+
+    def __init__(self, event_queue, *handlers):
+        self.queue = event_queue
+        self.handlers = handlers
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='bookshelf-audit', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Write what is still queued, then end the thread.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def count_dropped(self):
+        with self._dropped_lock:
+            self.dropped += 1
+
+    def _next_batch(self):
+        batch_size = getattr(settings, 'AUDIT_BATCH_SIZE', 500)
+        if self._stopping.is_set():
+            batch = [self.queue.get_nowait()]
+        else:
+            batch = [self.queue.get(timeout=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 0.5))]
+        while len(batch) < batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def handle_batch(self, records):
+        for handler in self.handlers:
+            batch = [record for record in records if record.levelno >= handler.level]
+            if not batch:
+                continue
+            if hasattr(handler, 'handle_batch'):
+                try:
+                    handler.handle_batch(batch)
+                except Exception:
+                    handler.handleError(batch[0])
+            else:
+                for record in batch:
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        handler.handleError(record)
+
+    def report_dropped(self):
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            logger.warning("Audit queue full: %d audit events were dropped", dropped)
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                self.report_dropped()
+                if self._stopping.is_set():
+                    return
+                continue
+            try:
+                self.handle_batch(batch)
+                self.report_dropped()
+            except Exception:
+                # Only reached if a filter or handleError() fails; the thread
+                # must keep draining the queue
+                logger.exception("Audit listener could not handle %d events", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class AuditQueueHandler(QueueHandler):
+    """
+    QueueHandler for the "bookshelf.audit" logger (configured in LOGGING).
+    Records are queued as-is; the listener thread formats and writes them.
+    The queue and its listener are created on first use and shared by every
+    instance in the process.
+    """
+
+    _listener = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__(None)
+
+    @classmethod
+    def get_listener(cls):
+        if cls._listener is None:
+            with cls._lock:
+                if cls._listener is None:
+                    event_queue = queue.Queue(maxsize=getattr(settings, 'AUDIT_QUEUE_SIZE', 10000))
+                    listener = AuditQueueListener(event_queue, AuditDatabaseHandler(), SecurityLogForwarder())
+                    listener.start()
+                    atexit.register(listener.stop)
+                    cls._listener = listener
+        return cls._listener
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record does not need to
+        # be formatted or pickled here; the listener calls getMessage().
+        return record
+
+    def enqueue(self, record):
+        listener = self.get_listener()
+        try:
+            listener.queue.put(record, timeout=getattr(settings, 'AUDIT_QUEUE_TIMEOUT', 0.05))
+        except queue.Full:
+            listener.count_dropped()
+
+    @classmethod
+    def flush_queue(cls):
+        """
+        Block until every queued event has been written (used by tests and at shutdown).
+        """
+        if cls._listener is not None:
+            cls._listener.queue.join()
@@ -0,0 +1,107 @@
+"""
+Admin changelist helpers for large tables.
+
+On every changelist page the admin counts the matching rows for the
+paginator, counts the whole table again for "N results (M total)", and
+searches with icontains, which no B-tree index can serve. LargeTableAdmin
+changes that:
+
+- EstimatedCountPaginator takes the row count of an unfiltered changelist
+  from the database statistics (PostgreSQL pg_class.reltuples, MySQL
+  information_schema, SQLite sqlite_stat1 after ANALYZE) once the table is
+  at least ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Smaller tables, filtered
+  or searched lists, and tables without statistics keep the exact COUNT.
+- show_full_result_count is off, so the second COUNT(*) is never run.
+- With ADMIN_PREFIX_SEARCH (or prefix_search = True on the admin class)
+  plain search fields become '^field' (istartswith), which the indexes
+  created in migration 0005 can serve.
+
+An estimate can be off by the changes since the statistics were last
+gathered, so the last pages of a large table may come up short or empty.
+Keep the statistics fresh with PostgreSQL's autovacuum or a periodic
+ANALYZE (`PRAGMA optimize` on SQLite).
+
+Settings:
+- ADMIN_ESTIMATED_COUNT_THRESHOLD: rows from which estimates are used (default 100000).
+- ADMIN_PREFIX_SEARCH: search from the start of each field (default False).
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Return the database's estimate of the rows in ``model``'s table, or None
+    if it has none (no statistics gathered, or an unsupported database).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # The first number of each row is the table's row count
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for a table that was never vacuumed or analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses estimated_row_count() for unfiltered querysets on
+    large tables instead of COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.has_filters():
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000):
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin:
+    """
+    ModelAdmin mixin: estimated counts, no full result count, optional
+    prefix-only search.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # None follows ADMIN_PREFIX_SEARCH
+    prefix_search = None
+
+    def use_prefix_search(self):
+        if self.prefix_search is None:
+            return getattr(settings, 'ADMIN_PREFIX_SEARCH', False)
+        return self.prefix_search
+
+    def get_search_fields(self, request):
+        search_fields = super().get_search_fields(request)
+        if not self.use_prefix_search():
+            return search_fields
+        return tuple(field if field[:1] in '^=@' else f'^{field}' for field in search_fields)
@@ -1,8 +1,14 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.html import escape
-import re
 from .models import Book
+from .validators import (
+    DUPLICATE_BOOK_MESSAGE,
+    validate_author,
+    validate_description,
+    validate_publication_year,
+    validate_title,
+)
 
 class BookForm(forms.ModelForm):
     """
@@ -38,83 +44,19 @@ class BookForm(forms.ModelForm):
         """
         Validate and sanitize book title.
         """
-        title = self.cleaned_data.get('title', '').strip()
-        
-        if not title:
-            raise ValidationError("Title is required.")
-        
-        # Check for minimum length
-        if len(title) < 2:
-            raise ValidationError("Title must be at least 2 characters long.")
-        
-        # Check for suspicious characters that might indicate injection attempts
-        suspicious_patterns = ['<script', 'javascript:', 'onload=', 'onerror=', 'eval(']
-        title_lower = title.lower()
-        
-        for pattern in suspicious_patterns:
-            if pattern in title_lower:
-                raise ValidationError("Title contains invalid characters.")
-        
-        # Validate that title contains reasonable characters
-        if not re.match(r'^[a-zA-Z0-9\s\-\.\,\:\;\!\?\(\)\'\"]+$', title):
-            raise ValidationError("Title contains invalid characters. Use only letters, numbers, and basic punctuation.")
-        
-        return escape(title)
+        return escape(validate_title(self.cleaned_data.get('title')))
     
     def clean_author(self):
         """
         Validate and sanitize author name.
         """
-        author = self.cleaned_data.get('author', '').strip()
-        
-        if not author:
-            raise ValidationError("Author is required.")
-        
-        # Check for minimum length
-        if len(author) < 2:
-            raise ValidationError("Author name must be at least 2 characters long.")
-        
-        # Check for suspicious characters
-        suspicious_patterns = ['<script', 'javascript:', 'onload=', 'onerror=', 'eval(']
-        author_lower = author.lower()
-        
-        for pattern in suspicious_patterns:
-            if pattern in author_lower:
-                raise ValidationError("Author name contains invalid characters.")
-        
-        # Validate that author name contains reasonable characters
-        if not re.match(r'^[a-zA-Z\s\-\.\']+$', author):
-            raise ValidationError("Author name should contain only letters, spaces, hyphens, periods, and apostrophes.")
-        
-        return escape(author)
+        return escape(validate_author(self.cleaned_data.get('author')))
         
     def clean_publication_year(self):
         """
         Validate publication year with enhanced security checks.
         """
-        year = self.cleaned_data.get('publication_year')
-        
-        if year is None:
-            raise ValidationError("Publication year is required.")
-        
-        # Type validation
-        if not isinstance(year, int):
-            try:
-                year = int(year)
-            except (ValueError, TypeError):
-                raise ValidationError("Publication year must be a valid number.")
-        
-        # Range validation with current year check
-        import datetime
-        current_year = datetime.datetime.now().year
-        
-        if year < 1000:
-            raise ValidationError("Publication year cannot be before 1000.")
-        
-        if year > current_year + 5:
-            raise ValidationError(f"Publication year cannot be more than 5 years in the future (max: {current_year + 5}).")
-        
-        return year
+        return validate_publication_year(self.cleaned_data.get('publication_year'))
     
     def clean(self):
         """
@@ -132,7 +74,7 @@ class BookForm(forms.ModelForm):
             ).exclude(pk=self.instance.pk if self.instance.pk else None)
             
             if existing_book.exists():
-                raise ValidationError("A book with this title and author already exists.")
+                raise ValidationError(DUPLICATE_BOOK_MESSAGE)
         
         return cleaned_data
 
@@ -209,79 +151,23 @@ class ExampleForm(forms.Form):
         """
         Validate and sanitize title field.
         """
-        title = self.cleaned_data.get('title', '').strip()
-        
-        if not title:
-            raise ValidationError("Title is required.")
-        
-        # Check for suspicious characters that might indicate injection attempts
-        suspicious_patterns = ['<script', 'javascript:', 'onload=', 'onerror=', 'eval(']
-        title_lower = title.lower()
-        
-        for pattern in suspicious_patterns:
-            if pattern in title_lower:
-                raise ValidationError("Title contains invalid characters.")
-        
-        # Validate that title contains reasonable characters
-        if not re.match(r'^[a-zA-Z0-9\s\-\.\,\:\;\!\?\(\)\'\"]+$', title):
-            raise ValidationError("Title contains invalid characters. Use only letters, numbers, and basic punctuation.")
-        
-        return escape(title)
+        return escape(validate_title(self.cleaned_data.get('title')))
     
     def clean_author(self):
         """
         Validate and sanitize author field.
         """
-        author = self.cleaned_data.get('author', '').strip()
-        
-        if not author:
-            raise ValidationError("Author is required.")
-        
-        # Check for suspicious characters
-        suspicious_patterns = ['<script', 'javascript:', 'onload=', 'onerror=', 'eval(']
-        author_lower = author.lower()
-        
-        for pattern in suspicious_patterns:
-            if pattern in author_lower:
-                raise ValidationError("Author name contains invalid characters.")
-        
-        # Validate that author name contains reasonable characters
-        if not re.match(r'^[a-zA-Z\s\-\.\']+$', author):
-            raise ValidationError("Author name should contain only letters, spaces, hyphens, periods, and apostrophes.")
-        
-        return escape(author)
+        return escape(validate_author(self.cleaned_data.get('author')))
     
     def clean_description(self):
         """
         Validate and sanitize description field.
         """
-        description = self.cleaned_data.get('description', '').strip()
-        
-        if description:
-            # Check for suspicious characters
-            suspicious_patterns = ['<script', 'javascript:', 'onload=', 'onerror=', 'eval(']
-            description_lower = description.lower()
-            
-            for pattern in suspicious_patterns:
-                if pattern in description_lower:
-                    raise ValidationError("Description contains invalid characters.")
-        
+        description = validate_description(self.cleaned_data.get('description'))
         return escape(description) if description else ''
     
     def clean_publication_year(self):
         """
         Validate publication year.
         """
-        year = self.cleaned_data.get('publication_year')
-        
-        if year is None:
-            raise ValidationError("Publication year is required.")
-        
-        # Additional range validation
-        import datetime
-        current_year = datetime.datetime.now().year
-        
-        if year > current_year + 5:
-            raise ValidationError(f"Publication year cannot be more than 5 years in the future (max: {current_year + 5}).")
-        
-        return year
+        return validate_publication_year(self.cleaned_data.get('publication_year'))
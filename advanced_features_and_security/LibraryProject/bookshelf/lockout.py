@@ -0,0 +1,198 @@
+"""
+Login brute-force lockout.
+
+Failed logins are counted per username and per client IP in sliding windows
+kept in the cache. LockoutBackend (the configured authentication backend)
+checks them before looking up the user and raises PermissionDenied for a
+locked username or IP, which makes django.contrib.auth.authenticate() stop
+before any password is hashed; a credential-stuffing burst costs a cache
+read per attempt instead of a PBKDF2 run.
+
+Each window is approximated with two fixed buckets (the standard sliding
+window counter): failures = current + previous * (unexpired share of the
+previous bucket). Recording a failure is an add/incr on one key and a check
+is one get_many, whatever the attempt rate. A successful login clears the
+username's counters; IP counters only age out.
+
+The IP counted is REMOTE_ADDR, not the audit log's X-Forwarded-For based
+address: that header is set by the client, so trusting it would let an
+attacker pick a new "IP" for every attempt. Behind reverse proxies, set
+LOGIN_LOCKOUT_TRUSTED_PROXIES to their number; the address that the
+outermost trusted proxy appended to X-Forwarded-For is then used, and
+entries to its left (which the client may have forged) are ignored.
+
+Failures, blocked attempts and lockouts go to the audit log with the
+current counts.
+
+Settings:
+- LOGIN_LOCKOUT_WINDOW: window length in seconds (default 900).
+- LOGIN_LOCKOUT_USERNAME_LIMIT: failures per username per window (default 5).
+- LOGIN_LOCKOUT_IP_LIMIT: failures per IP per window (default 50).
+- LOGIN_LOCKOUT_CACHE_ALIAS: cache to keep counters in (default "default").
+- LOGIN_LOCKOUT_TRUSTED_PROXIES: reverse proxies in front of Django that
+  append to X-Forwarded-For (default 0: use REMOTE_ADDR).
+"""
+
+import hashlib
+import ipaddress
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+
+from .audit import audit
+from .permissions import CachedPermissionBackend
+
+
+def lockout_settings():
+    return (
+        getattr(settings, 'LOGIN_LOCKOUT_WINDOW', 900),
+        {
+            'username': getattr(settings, 'LOGIN_LOCKOUT_USERNAME_LIMIT', 5),
+            'ip': getattr(settings, 'LOGIN_LOCKOUT_IP_LIMIT', 50),
+        },
+    )
+
+
+def lockout_cache():
+    return caches[getattr(settings, 'LOGIN_LOCKOUT_CACHE_ALIAS', 'default')]
+
+
+def identity_key(kind, value):
+    # Hash so any username is a valid cache key and none is stored in clear
+    digest = hashlib.sha256(value.casefold().encode('utf-8')).hexdigest()[:32]
+    return f'bookshelf:lockout:{kind}:{digest}'
+
+
+def lockout_ip(request):
+    """
+    The client address to count failures against, or None if it is not a
+    valid address. Only hops added by trusted proxies are believed: with N
+    trusted proxies the client is the N-th address from the right of
+    X-Forwarded-For plus REMOTE_ADDR.
+    """
+    hops = []
+    trusted_proxies = getattr(settings, 'LOGIN_LOCKOUT_TRUSTED_PROXIES', 0)
+    if trusted_proxies:
+        forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    hops.append(request.META.get('REMOTE_ADDR', ''))
+    ip = hops[max(len(hops) - 1 - trusted_proxies, 0)]
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
+def identities(request, username):
+    """(kind, key) pairs tracked for this attempt."""
+    pairs = []
+    if username:
+        pairs.append(('username', identity_key('username', username)))
+    ip = lockout_ip(request) if request is not None else None
+    if ip:
+        pairs.append(('ip', identity_key('ip', ip)))
+    return pairs
+
+
+def bucket_keys(key, bucket):
+    return f'{key}:{bucket}', f'{key}:{bucket - 1}'
+
+
+def failure_counts(request, username, now=None):
+    """
+    Return {kind: estimated failures in the last window} for the username and
+    IP of this attempt, with one cache round trip.
+    """
+    window, _ = lockout_settings()
+    now = time.time() if now is None else now
+    bucket, elapsed = divmod(now, window)
+    bucket = int(bucket)
+    pairs = identities(request, username)
+    keys = {kind: bucket_keys(key, bucket) for kind, key in pairs}
+    values = lockout_cache().get_many([k for current_previous in keys.values() for k in current_previous])
+    previous_weight = 1 - elapsed / window
+    return {
+        kind: values.get(current, 0) + values.get(previous, 0) * previous_weight
+        for kind, (current, previous) in keys.items()
+    }
+
+
+def locked_kinds(counts):
+    _, limits = lockout_settings()
+    return [kind for kind, count in counts.items() if count >= limits[kind]]
+
+
+def record_failure(request, username, now=None):
+    """Count a failed login for the username and IP; return the new counts."""
+    window, _ = lockout_settings()
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    cache = lockout_cache()
+    for _, key in identities(request, username):
+        current = f'{key}:{bucket}'
+        # Buckets live for two windows, long enough to serve as "previous"
+        cache.add(current, 0, timeout=2 * window)
+        try:
+            cache.incr(current)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(current, 1, timeout=2 * window)
+    return failure_counts(request, username, now)
+
+
+def reset_username(username, now=None):
+    window, _ = lockout_settings()
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    lockout_cache().delete_many(bucket_keys(identity_key('username', username), bucket))
+
+
+class LockoutBackend(CachedPermissionBackend):
+    """
+    CachedPermissionBackend that refuses attempts for locked usernames or
+    IPs before checking the password.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        counts = failure_counts(request, username)
+        locked = locked_kinds(counts)
+        if locked:
+            if request is not None:
+                # Blocked attempts are not counted again, so a lockout ends
+                # one window after the last real failure.
+                request._login_blocked = True
+                audit(request, 'login.blocked', "Login for %s blocked (locked %s)",
+                      username, ', '.join(locked), level=logging.WARNING,
+                      username=username, **{f'{kind}_failures': round(count, 1) for kind, count in counts.items()})
+            raise PermissionDenied
+        return super().authenticate(request, username=username, password=password, **kwargs)
+
+
+def login_failed(sender, credentials, request=None, **kwargs):
+    if request is None or getattr(request, '_login_blocked', False):
+        return
+    username = credentials.get('username')
+    counts = record_failure(request, username)
+    failures = {f'{kind}_failures': round(count, 1) for kind, count in counts.items()}
+    audit(request, 'login.failed', "Failed login for %s", username,
+          level=logging.WARNING, username=username, **failures)
+    locked = locked_kinds(counts)
+    if locked:
+        audit(request, 'login.locked', "Login for %s locked after repeated failures (%s)",
+              username, ', '.join(locked), level=logging.WARNING, username=username, **failures)
+
+
+def login_succeeded(sender, request, user, **kwargs):
+    reset_username(user.get_username())
+
+
+def connect_signals():
+    """
+    Count failures and reset them on success. Called from BookshelfConfig.ready().
+    """
+    user_login_failed.connect(login_failed, dispatch_uid='bookshelf_lockout_failed')
+    user_logged_in.connect(login_succeeded, dispatch_uid='bookshelf_lockout_succeeded')
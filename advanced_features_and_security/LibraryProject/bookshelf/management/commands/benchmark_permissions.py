@@ -0,0 +1,79 @@
+import copy
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from bookshelf.permissions import CachedPermissionBackend
+
+PERMISSIONS = ['bookshelf.can_view', 'bookshelf.can_create', 'bookshelf.can_edit', 'bookshelf.can_delete']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request permission checks with ModelBackend and the cached '
+        'backend for users in the Viewers, Editors and Admins groups. Runs in a '
+        'transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per group')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count):
+        call_command('setup_groups', stdout=StringIO())
+        User = get_user_model()
+        backends = [('ModelBackend', ModelBackend()), ('CachedPermissionBackend', CachedPermissionBackend())]
+
+        self.stdout.write(f'{"group":<9} {"backend":<24} {"queries/request":>15} {"us/request":>11}')
+        for name in ('Viewers', 'Editors', 'Admins'):
+            user = User.objects.create_user(f'benchmark_{name.lower()}', f'{name.lower()}@example.com', None)
+            user.groups.add(Group.objects.get(name=name))
+            for label, backend in backends:
+                queries, elapsed = self.measure(backend, user, count)
+                self.stdout.write(f'{name:<9} {label:<24} {queries:>15.2f} {elapsed:>11.1f}')
+
+    def measure(self, backend, user, count):
+        # Warm up once so the cached backend is measured in its steady state.
+        self.simulate_request(backend, user)
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            for _ in range(count):
+                self.simulate_request(backend, user)
+            elapsed = time.perf_counter() - started
+        return queries / count, elapsed / count * 1e6
+
+    def simulate_request(self, backend, user):
+        # Every request loads a new user instance, so the per-instance
+        # _perm_cache of the previous request is gone. This mirrors the
+        # checks made by permission_required and the user_permissions view.
+        request_user = copy.copy(user)
+        request_user.__dict__.pop('_perm_cache', None)
+        request_user.__dict__.pop('_user_perm_cache', None)
+        request_user.__dict__.pop('_group_perm_cache', None)
+        for perm in PERMISSIONS:
+            backend.has_perm(request_user, perm)
+        backend.get_all_permissions(request_user)
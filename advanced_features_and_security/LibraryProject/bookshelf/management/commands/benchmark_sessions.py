@@ -0,0 +1,83 @@
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from bookshelf.sessions import flush_pending_sessions
+
+ENGINES = [
+    ('db', 'django.contrib.sessions.backends.db'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db'),
+    ('bookshelf.sessions', 'bookshelf.sessions'),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure authenticated page throughput and session queries per request '
+        'for the db, cached_db and bookshelf.sessions engines, with and without '
+        'SESSION_SAVE_EVERY_REQUEST. Runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+
+    def handle(self, *args, **options):
+        # Keep audit writes (another thread, another connection) out of the
+        # numbers and out of the rolled-back transaction.
+        audit_logger = logging.getLogger('bookshelf.audit')
+        previous = audit_logger.disabled
+        audit_logger.disabled = True
+        try:
+            with transaction.atomic():
+                self.run(options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            audit_logger.disabled = previous
+
+    def run(self, count):
+        user = get_user_model().objects.create_user('benchmark_sessions', 'sessions@example.com', None)
+        url = reverse('bookshelf:user_permissions')
+
+        self.stdout.write(
+            f'{"engine":<20} {"save every request":>18} {"requests/s":>11} '
+            f'{"session queries/request":>24}'
+        )
+        for label, engine in ENGINES:
+            for save_every_request in (False, True):
+                with override_settings(SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=save_every_request):
+                    rate, session_queries = self.measure(user, url, count)
+                self.stdout.write(
+                    f'{label:<20} {str(save_every_request):>18} {rate:>11.0f} {session_queries:>24.3f}'
+                )
+
+    def measure(self, user, url, count):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        client.get(url)  # warm up (fills the cache for the cached engines)
+        session_queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal session_queries
+            if 'django_session' in sql:
+                session_queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            for _ in range(count):
+                client.get(url)
+            # Include the batched writes still queued by the write-behind engine
+            flush_pending_sessions()
+            elapsed = time.perf_counter() - started
+        return count / elapsed, session_queries / count
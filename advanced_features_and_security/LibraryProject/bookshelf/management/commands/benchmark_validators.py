@@ -0,0 +1,67 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from bookshelf.forms import BookForm
+from bookshelf.validators import validate_book_rows
+
+WORDS = 'river silent garden winter shadow empire golden broken hidden last city night storm ocean'.split()
+NAMES = 'Ada Ben Chloe David Elena Grace Hiro Ines Jonas Kira Liam Maya Noor Omar'.split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure book validation throughput: BookForm row by row (one duplicate '
+        'query per row) against validators.validate_book_rows (one per 500 rows).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows to validate')
+        parser.add_argument('--invalid', type=float, default=0.1, help='Fraction of invalid rows')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows = self.make_rows(options['rows'], options['invalid'], random.Random(options['seed']))
+
+        def per_row():
+            return sum(BookForm(data=row).is_valid() for row in rows)
+
+        def batch():
+            books, errors = validate_book_rows(rows)
+            return len(books)
+
+        self.stdout.write(f'{"method":<22} {"valid":>7} {"queries":>8} {"rows/s":>10}')
+        for label, run in (('BookForm per row', per_row), ('validate_book_rows', batch)):
+            valid, queries, elapsed = self.measure(run)
+            self.stdout.write(f'{label:<22} {valid:>7} {queries:>8} {len(rows) / elapsed:>10.0f}')
+
+    def make_rows(self, count, invalid, rng):
+        rows = []
+        for n in range(count):
+            row = {
+                'title': f'{" ".join(rng.choice(WORDS) for _ in range(3)).title()} {n}',
+                'author': f'{rng.choice(NAMES)} {rng.choice(NAMES)}son',
+                'publication_year': str(rng.randint(1800, 2024)),
+            }
+            if rng.random() < invalid:
+                row[rng.choice(['title', 'author', 'publication_year'])] = rng.choice(
+                    ['<script>x</script>', 'x', 'R2-D2 <b>', '99999', '']
+                )
+            rows.append(row)
+        return rows
+
+    def measure(self, run):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            valid = run()
+            elapsed = time.perf_counter() - started
+        return valid, queries, elapsed
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookshelf.sessions import delete_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions in chunks, one short DELETE per chunk, so '
+        'requests are not blocked behind one large DELETE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'SESSION_CLEANUP_BATCH_SIZE', 1000),
+            help='Expired sessions deleted per statement',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        deleted = delete_expired_sessions(options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired sessions in {time.perf_counter() - started:.2f}s'
+        ))
@@ -1,111 +1,197 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Q
+from bookshelf.permissions import bump_permission_generation
 
 User = get_user_model()
 
+TEST_PASSWORD = 'testpass123'
+
+TEST_USERS = [
+    {
+        'username': 'viewer_test',
+        'email': 'viewer@example.com',
+        'group': 'Viewers',
+        'description': 'Can only view books'
+    },
+    {
+        'username': 'editor_test',
+        'email': 'editor@example.com',
+        'group': 'Editors',
+        'description': 'Can view, create, and edit books'
+    },
+    {
+        'username': 'admin_test',
+        'email': 'admin@example.com',
+        'group': 'Admins',
+        'description': 'Full access to all book operations'
+    }
+]
+
+# Seeded users (--users N) are named seed_user_00001... and spread over the
+# groups in this order
+SEED_USERNAME_PREFIX = 'seed_user_'
+SEED_GROUPS = ['Viewers', 'Editors', 'Admins']
+
+
 class Command(BaseCommand):
-    help = 'Create test users for different permission levels'
+    help = (
+        'Create test users for different permission levels. Existing users and '
+        'memberships are diffed against the desired state and only the '
+        'differences are written, in bulk and in one transaction.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--reset',
             action='store_true',
-            help='Delete existing test users before creating new ones',
+            help='Delete existing test users (and seeded users) before creating new ones',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=0,
+            metavar='N',
+            help=f'Also seed N users named {SEED_USERNAME_PREFIX}00001... across the groups',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk INSERT',
         )
 
     def handle(self, *args, **options):
-        if options['reset']:
-            # Delete existing test users
-            test_usernames = ['viewer_test', 'editor_test', 'admin_test']
-            deleted_count = User.objects.filter(username__in=test_usernames).count()
-            User.objects.filter(username__in=test_usernames).delete()
-            self.stdout.write(
-                self.style.WARNING(f'Deleted {deleted_count} existing test users')
-            )
-        
-        # Get groups
-        try:
-            viewers_group = Group.objects.get(name='Viewers')
-            editors_group = Group.objects.get(name='Editors')
-            admins_group = Group.objects.get(name='Admins')
-        except Group.DoesNotExist:
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+        test_users = TEST_USERS + self.seed_users(options['users'])
+        managed = Q(username__in=[user_data['username'] for user_data in TEST_USERS])
+        managed |= Q(username__startswith=SEED_USERNAME_PREFIX)
+
+        groups = Group.objects.in_bulk(SEED_GROUPS, field_name='name')
+        if len(groups) < len(SEED_GROUPS):
             self.stdout.write(
                 self.style.ERROR('Groups not found! Run: python manage.py setup_groups')
             )
             return
-        
-        # Create test users
-        test_users = [
-            {
-                'username': 'viewer_test',
-                'email': 'viewer@example.com',
-                'password': 'testpass123',
-                'group': viewers_group,
-                'description': 'Can only view books'
-            },
-            {
-                'username': 'editor_test',
-                'email': 'editor@example.com',
-                'password': 'testpass123',
-                'group': editors_group,
-                'description': 'Can view, create, and edit books'
-            },
-            {
-                'username': 'admin_test',
-                'email': 'admin@example.com',
-                'password': 'testpass123',
-                'group': admins_group,
-                'description': 'Full access to all book operations'
-            }
-        ]
-        
-        created_users = []
-        
-        for user_data in test_users:
+
+        with transaction.atomic():
+            if options['reset']:
+                # Delete existing test users
+                _, deleted = User.objects.filter(managed).delete()
+                deleted_count = deleted.get(User._meta.label, 0)
+                self.stdout.write(
+                    self.style.WARNING(f'Deleted {deleted_count} existing test users')
+                )
+
+            existing = set(User.objects.filter(managed).values_list('username', flat=True))
+            missing = [user_data for user_data in test_users if user_data['username'] not in existing]
+            if missing:
+                # Hash once: every created user gets the same (salted) hash, so
+                # seeding costs one PBKDF2 run instead of one per user
+                password = make_password(TEST_PASSWORD)
+                User.objects.bulk_create(
+                    [
+                        User(username=user_data['username'], email=user_data['email'], password=password)
+                        for user_data in missing
+                    ],
+                    batch_size=batch_size,
+                )
+            added, removed = self.sync_memberships(test_users, managed, groups, batch_size)
+
+        if added or removed:
+            # Bulk changes send no m2m_changed signals
+            bump_permission_generation()
+
+        for user_data in TEST_USERS:
             username = user_data['username']
-            
-            # Check if user already exists
-            if User.objects.filter(username=username).exists():
+            if username in existing:
                 self.stdout.write(
                     self.style.WARNING(f'User "{username}" already exists, skipping...')
                 )
-                continue
-            
-            # Create user
-            user = User.objects.create_user(
-                username=user_data['username'],
-                email=user_data['email'],
-                password=user_data['password']
-            )
-            
-            # Add to group
-            user.groups.add(user_data['group'])
-            
-            created_users.append(user_data)
-            
-            self.stdout.write(
-                self.style.SUCCESS(f'Created user "{username}" in group "{user_data["group"].name}"')
-            )
-        
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Created user "{username}" in group "{user_data["group"]}"')
+                )
+        if options['users']:
+            seeded = sum(1 for user_data in missing if user_data['username'].startswith(SEED_USERNAME_PREFIX))
+            self.stdout.write(self.style.SUCCESS(
+                f'Seeded {seeded} new users ({options["users"] - seeded} already existed)'
+            ))
+        if added or removed:
+            self.stdout.write(f'Group memberships: {added} added, {removed} removed')
+        self.stdout.write(f'Finished in {time.perf_counter() - started:.2f}s')
+
+        created_users = [user_data for user_data in TEST_USERS if user_data['username'] not in existing]
         if created_users:
             self.stdout.write('\n' + '='*60)
             self.stdout.write('TEST USERS CREATED:')
             self.stdout.write('='*60)
-            
+
             for user_data in created_users:
                 self.stdout.write(f'\nUsername: {user_data["username"]}')
-                self.stdout.write(f'Password: {user_data["password"]}')
-                self.stdout.write(f'Group: {user_data["group"].name}')
+                self.stdout.write(f'Password: {TEST_PASSWORD}')
+                self.stdout.write(f'Group: {user_data["group"]}')
                 self.stdout.write(f'Permissions: {user_data["description"]}')
-            
+
             self.stdout.write('\n' + '='*60)
             self.stdout.write('TESTING INSTRUCTIONS:')
             self.stdout.write('1. Visit /bookshelf/ to test the permission system')
             self.stdout.write('2. Login with each test user to verify their access levels')
             self.stdout.write('3. Check /bookshelf/permissions/ to see user permissions')
             self.stdout.write('='*60)
-        else:
+        elif not missing:
             self.stdout.write(
                 self.style.WARNING('No new users were created (all already exist)')
             )
+
+    def seed_users(self, count):
+        width = max(5, len(str(count)))
+        return [
+            {
+                'username': f'{SEED_USERNAME_PREFIX}{n:0{width}d}',
+                'email': f'{SEED_USERNAME_PREFIX}{n:0{width}d}@example.com',
+                'group': SEED_GROUPS[(n - 1) % len(SEED_GROUPS)],
+            }
+            for n in range(1, count + 1)
+        ]
+
+    def sync_memberships(self, test_users, managed, groups, batch_size):
+        """
+        Put each test user in exactly its group (among the managed groups),
+        inserting and deleting only the differing rows. Returns (added, removed).
+        """
+        through = User.groups.through
+        # The user column is named after the user model (customuser_id)
+        user_field = User.groups.field.m2m_field_name()
+        user_column = User.groups.field.m2m_column_name()
+        user_ids = dict(User.objects.filter(managed).values_list('username', 'pk'))
+        desired = {
+            (user_ids[user_data['username']], groups[user_data['group']].pk)
+            for user_data in test_users
+        }
+        current = set(
+            through.objects.filter(**{f'{user_field}__in': User.objects.filter(managed)}, group__in=groups.values())
+            .values_list(user_column, 'group_id')
+        )
+        # Seeded users beyond --users N keep their memberships
+        wanted_users = {user_id for user_id, _ in desired}
+        to_add = desired - current
+        to_remove = {(user_id, group_id) for user_id, group_id in current - desired if user_id in wanted_users}
+        if to_add:
+            through.objects.bulk_create(
+                [through(**{user_column: user_id}, group_id=group_id) for user_id, group_id in to_add],
+                batch_size=batch_size,
+            )
+        for group_id in {group_id for _, group_id in to_remove}:
+            user_ids_to_remove = [user_id for user_id, g in to_remove if g == group_id]
+            for start in range(0, len(user_ids_to_remove), batch_size):
+                through.objects.filter(
+                    **{f'{user_column}__in': user_ids_to_remove[start:start + batch_size]}, group_id=group_id
+                ).delete()
+        return len(to_add), len(to_remove)
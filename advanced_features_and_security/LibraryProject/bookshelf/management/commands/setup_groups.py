@@ -1,92 +1,59 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from bookshelf.models import Book
+from bookshelf.permissions import bump_permission_generation
+
+# Desired state: group name -> codenames of its Book permissions
+GROUP_PERMISSIONS = {
+    'Viewers': ['can_view'],
+    'Editors': ['can_view', 'can_create', 'can_edit'],
+    'Admins': ['can_view', 'can_create', 'can_edit', 'can_delete'],
+}
 
 class Command(BaseCommand):
-    help = 'Set up groups and permissions for the bookshelf app'
+    help = (
+        'Set up groups and permissions for the bookshelf app. Compares the '
+        'desired groups and permissions with the database and applies only '
+        'the differences, in bulk and in one transaction, so it is safe to re-run.'
+    )
 
     def handle(self, *args, **options):
-        # Get the Book content type
-        book_content_type = ContentType.objects.get_for_model(Book)
-        
-        # Get or create the custom permissions
-        can_view, created = Permission.objects.get_or_create(
-            codename='can_view',
-            name='Can view book',
-            content_type=book_content_type,
-        )
-        
-        can_create, created = Permission.objects.get_or_create(
-            codename='can_create',
-            name='Can create book',
-            content_type=book_content_type,
-        )
-        
-        can_edit, created = Permission.objects.get_or_create(
-            codename='can_edit',
-            name='Can edit book',
-            content_type=book_content_type,
-        )
-        
-        can_delete, created = Permission.objects.get_or_create(
-            codename='can_delete',
-            name='Can delete book',
-            content_type=book_content_type,
-        )
-        
-        # Create groups and assign permissions
-        
-        # Viewers Group - can only view books
-        viewers_group, created = Group.objects.get_or_create(name='Viewers')
-        viewers_group.permissions.set([can_view])
-        if created:
-            self.stdout.write(
-                self.style.SUCCESS('Created "Viewers" group with view permissions')
-            )
-        else:
-            self.stdout.write(
-                self.style.WARNING('Updated "Viewers" group permissions')
-            )
-        
-        # Editors Group - can view, create, and edit books
-        editors_group, created = Group.objects.get_or_create(name='Editors')
-        editors_group.permissions.set([can_view, can_create, can_edit])
-        if created:
-            self.stdout.write(
-                self.style.SUCCESS('Created "Editors" group with view, create, edit permissions')
-            )
-        else:
-            self.stdout.write(
-                self.style.WARNING('Updated "Editors" group permissions')
-            )
-        
-        # Admins Group - full permissions
-        admins_group, created = Group.objects.get_or_create(name='Admins')
-        admins_group.permissions.set([can_view, can_create, can_edit, can_delete])
-        if created:
-            self.stdout.write(
-                self.style.SUCCESS('Created "Admins" group with all permissions')
-            )
-        else:
-            self.stdout.write(
-                self.style.WARNING('Updated "Admins" group permissions')
-            )
-        
+        with transaction.atomic():
+            permissions = self.sync_permissions()
+            groups, created_groups = self.sync_groups()
+            added, removed = self.sync_group_permissions(groups, permissions)
+
+        # Bulk changes send no m2m_changed signals, so drop every cached
+        # permission set here so the assignments apply at once
+        bump_permission_generation()
+
+        for name in GROUP_PERMISSIONS:
+            if name in created_groups:
+                self.stdout.write(self.style.SUCCESS(f'Created "{name}" group'))
+            elif added.get(name) or removed.get(name):
+                self.stdout.write(self.style.WARNING(
+                    f'Updated "{name}" group permissions '
+                    f'(+{added.get(name, 0)}, -{removed.get(name, 0)})'
+                ))
+            else:
+                self.stdout.write(f'"{name}" group already up to date')
+
         self.stdout.write(
             self.style.SUCCESS('\nGroups and permissions setup completed!')
         )
-        
+
         # Display summary
         self.stdout.write('\n' + '='*50)
         self.stdout.write('SUMMARY:')
         self.stdout.write('='*50)
-        
-        for group in [viewers_group, editors_group, admins_group]:
-            self.stdout.write(f'\n{group.name} Group:')
-            for perm in group.permissions.all():
-                self.stdout.write(f'  - {perm.name}')
-        
+
+        for name, codenames in GROUP_PERMISSIONS.items():
+            self.stdout.write(f'\n{name} Group:')
+            for codename in codenames:
+                self.stdout.write(f'  - {permissions[codename].name}')
+
         self.stdout.write('\n' + '='*50)
         self.stdout.write('Next Steps:')
         self.stdout.write('1. Go to Django Admin (/admin/)')
@@ -94,3 +61,83 @@ class Command(BaseCommand):
         self.stdout.write('3. Assign users to appropriate groups')
         self.stdout.write('4. Test the permissions system')
         self.stdout.write('='*50)
+
+    def sync_permissions(self):
+        """
+        Make sure the custom Book permissions exist with their Meta names.
+        Returns {codename: Permission}.
+        """
+        content_type = ContentType.objects.get_for_model(Book)
+        desired = dict(Book._meta.permissions)
+        existing = {
+            permission.codename: permission
+            for permission in Permission.objects.filter(content_type=content_type, codename__in=desired)
+        }
+        missing = [
+            Permission(codename=codename, name=name, content_type=content_type)
+            for codename, name in desired.items()
+            if codename not in existing
+        ]
+        renamed = []
+        for codename, permission in existing.items():
+            if permission.name != desired[codename]:
+                permission.name = desired[codename]
+                renamed.append(permission)
+        if missing:
+            Permission.objects.bulk_create(missing)
+        if renamed:
+            Permission.objects.bulk_update(renamed, ['name'])
+        if missing:
+            # Re-read rather than rely on bulk_create returning primary keys
+            existing = {
+                permission.codename: permission
+                for permission in Permission.objects.filter(content_type=content_type, codename__in=desired)
+            }
+        return existing
+
+    def sync_groups(self):
+        """
+        Make sure every group in GROUP_PERMISSIONS exists.
+        Returns ({name: Group}, names of the groups created).
+        """
+        groups = Group.objects.in_bulk(list(GROUP_PERMISSIONS), field_name='name')
+        created = [name for name in GROUP_PERMISSIONS if name not in groups]
+        if created:
+            Group.objects.bulk_create([Group(name=name) for name in created])
+            groups = Group.objects.in_bulk(list(GROUP_PERMISSIONS), field_name='name')
+        return groups, created
+
+    def sync_group_permissions(self, groups, permissions):
+        """
+        Make each group's permissions exactly GROUP_PERMISSIONS (like
+        permissions.set()), inserting and deleting only the differing rows.
+        Returns ({group name: rows added}, {group name: rows removed}).
+        """
+        through = Group.permissions.through
+        names = {group.pk: name for name, group in groups.items()}
+        desired = {
+            (groups[name].pk, permissions[codename].pk)
+            for name, codenames in GROUP_PERMISSIONS.items()
+            for codename in codenames
+        }
+        current = set(
+            through.objects.filter(group_id__in=names).values_list('group_id', 'permission_id')
+        )
+        to_add = desired - current
+        to_remove = current - desired
+        if to_add:
+            through.objects.bulk_create([
+                through(group_id=group_id, permission_id=permission_id)
+                for group_id, permission_id in to_add
+            ])
+        for group_id in {group_id for group_id, _ in to_remove}:
+            through.objects.filter(
+                group_id=group_id,
+                permission_id__in=[permission_id for g, permission_id in to_remove if g == group_id],
+            ).delete()
+        added, removed = {}, {}
+        for group_id, _ in to_add:
+            added[names[group_id]] = added.get(names[group_id], 0) + 1
+        for group_id, _ in to_remove:
+            removed[names[group_id]] = removed.get(names[group_id], 0) + 1
+        return added, removed
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0002_alter_book_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField()),
+                ('level', models.PositiveSmallIntegerField()),
+                ('action', models.CharField(max_length=64)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('object_id', models.IntegerField(blank=True, null=True)),
+                ('message', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['created'], name='bookshelf_a_created_f620d7_idx'), models.Index(fields=['action', 'created'], name='bookshelf_a_action_d796a5_idx'), models.Index(fields=['username', 'created'], name='bookshelf_a_usernam_ffcacb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:40
+
+from django.db import migrations
+
+# SQLite: external-content FTS5 table over bookshelf_book with the trigram
+# tokenizer (substring matches, like icontains), kept in sync by triggers.
+# Note that the SQLite schema editor rebuilds a table to alter it, which drops
+# these triggers; bookshelf.search then falls back to icontains until a
+# migration recreates them.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE bookshelf_book_fts USING fts5(
+        title, author, content='bookshelf_book', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER bookshelf_book_fts_ai AFTER INSERT ON bookshelf_book BEGIN
+        INSERT INTO bookshelf_book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER bookshelf_book_fts_ad AFTER DELETE ON bookshelf_book BEGIN
+        INSERT INTO bookshelf_book_fts(bookshelf_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER bookshelf_book_fts_au AFTER UPDATE ON bookshelf_book BEGIN
+        INSERT INTO bookshelf_book_fts(bookshelf_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO bookshelf_book_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END
+    """,
+    "INSERT INTO bookshelf_book_fts(bookshelf_book_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS bookshelf_book_fts_ai',
+    'DROP TRIGGER IF EXISTS bookshelf_book_fts_ad',
+    'DROP TRIGGER IF EXISTS bookshelf_book_fts_au',
+    'DROP TABLE IF EXISTS bookshelf_book_fts',
+]
+
+# PostgreSQL: trigram GIN indexes matching the UPPER(...) LIKE that icontains produces.
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS bookshelf_book_title_trgm ON bookshelf_book USING gin (UPPER(title::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS bookshelf_book_author_trgm ON bookshelf_book USING gin (UPPER(author::text) gin_trgm_ops)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS bookshelf_book_title_trgm',
+    'DROP INDEX IF EXISTS bookshelf_book_author_trgm',
+]
+
+
+def sqlite_has_fts5_trigram(schema_editor):
+    # The trigram tokenizer needs SQLite 3.34+ built with FTS5.
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.bookshelf_fts_probe USING fts5(x, tokenize='trigram')")
+            cursor.execute('DROP TABLE temp.bookshelf_fts_probe')
+    except Exception:
+        return False
+    return True
+
+
+def run(statements_by_vendor):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite' and not sqlite_has_fts5_trigram(schema_editor):
+            return
+        for statement in statements_by_vendor.get(vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookshelf', '0003_auditevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
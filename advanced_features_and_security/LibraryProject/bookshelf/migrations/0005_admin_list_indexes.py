@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+# Indexes for the admin's prefix-only search (ADMIN_PREFIX_SEARCH), which
+# filters with istartswith on the CustomUserAdmin search fields.
+# SQLite's LIKE is case-insensitive and only uses an index with the NOCASE
+# collation; PostgreSQL compares UPPER(column) LIKE UPPER('term%') and needs
+# text_pattern_ops. As with migration 0004, the SQLite schema editor drops
+# these indexes when it rebuilds the table to alter it.
+USER_SEARCH_FIELDS = ['username', 'email', 'first_name', 'last_name']
+
+SQLITE_FORWARD = [
+    f'CREATE INDEX IF NOT EXISTS bookshelf_customuser_{field}_nocase '
+    f'ON bookshelf_customuser ({field} COLLATE NOCASE)'
+    for field in USER_SEARCH_FIELDS
+]
+
+POSTGRESQL_FORWARD = [
+    f'CREATE INDEX IF NOT EXISTS bookshelf_customuser_{field}_upper_like '
+    f'ON bookshelf_customuser (UPPER({field}::text) text_pattern_ops)'
+    for field in USER_SEARCH_FIELDS
+]
+
+SQLITE_BACKWARD = [
+    f'DROP INDEX IF EXISTS bookshelf_customuser_{field}_nocase' for field in USER_SEARCH_FIELDS
+]
+
+POSTGRESQL_BACKWARD = [
+    f'DROP INDEX IF EXISTS bookshelf_customuser_{field}_upper_like' for field in USER_SEARCH_FIELDS
+]
+
+
+def run(statements_by_vendor):
+    def operation(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookshelf', '0004_book_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year'], name='bookshelf_b_publica_ca4788_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined'], name='bookshelf_c_date_jo_1f1028_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_of_birth'], name='bookshelf_c_date_of_376c5c_idx'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -62,6 +62,11 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        # Admin changelist filters
+        indexes = [
+            models.Index(fields=['date_joined']),
+            models.Index(fields=['date_of_birth']),
+        ]
 
 # Book model (existing) with custom permissions
 class Book(models.Model):
@@ -76,6 +81,38 @@ class Book(models.Model):
             ("can_edit", "Can edit book"),
             ("can_delete", "Can delete book"),
         ]
+        # Admin changelist filter
+        indexes = [
+            models.Index(fields=['publication_year']),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author}"
+
+# Audit trail written in batches by bookshelf.audit
+class AuditEvent(models.Model):
+    """
+    One security/audit event (book viewed, edited, deleted, failed validation...).
+    Rows are inserted in bulk by the audit log listener thread, never on the
+    request thread. user_id is a plain integer so events outlive their users.
+    """
+    created = models.DateTimeField()
+    level = models.PositiveSmallIntegerField()
+    action = models.CharField(max_length=64)
+    user_id = models.IntegerField(null=True, blank=True)
+    username = models.CharField(max_length=150, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    object_id = models.IntegerField(null=True, blank=True)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['created']),
+            models.Index(fields=['action', 'created']),
+            models.Index(fields=['username', 'created']),
+        ]
+
+    def __str__(self):
+        return f"[{self.created:%Y-%m-%d %H:%M:%S}] {self.action}: {self.message}"
@@ -0,0 +1,116 @@
+"""
+Cross-request permission cache for the bookshelf permission checks.
+
+Django's ModelBackend caches a user's permissions on the user instance, which
+is rebuilt on every request, so each `permission_required('bookshelf.can_*')`
+check repeats the user/group permission joins. CachedPermissionBackend keeps
+the resolved permission set in the cache framework instead, under
+
+    bookshelf:perms:<generation>:<user id>:<is_active><is_superuser>
+
+The generation is a single counter stored in the same cache. Any change that
+can alter someone's permissions (group membership, group or user
+permissions, groups or permissions being saved or deleted, `setup_groups`)
+bumps it, which orphans every cached set at once; orphans simply expire.
+Permission changes are rare, so a global counter costs almost nothing and
+avoids tracking which users a group change affects.
+
+The cache must be shared between processes (Redis, Memcached, database) for
+invalidation to reach all of them. With the default per-process LocMemCache
+other processes keep serving their sets until PERMISSION_CACHE_TIMEOUT.
+
+Settings:
+- PERMISSION_CACHE_ALIAS: cache alias to use (default "default").
+- PERMISSION_CACHE_TIMEOUT: seconds a cached set is kept (default 300).
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+GENERATION_KEY = 'bookshelf:perms:generation'
+
+
+def permission_cache():
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def permission_generation():
+    """
+    Return the current permissions generation, initialising it if the cache
+    has none (first use, restart, or eviction).
+    """
+    cache = permission_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than 1 so a lost counter never comes
+        # back to a number that old entries were stored under.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_permission_generation():
+    """
+    Invalidate every cached permission set.
+    """
+    cache = permission_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def permission_cache_key(user_obj, generation):
+    return 'bookshelf:perms:%s:%s:%d%d' % (
+        generation, user_obj.pk, user_obj.is_active, user_obj.is_superuser,
+    )
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend whose get_all_permissions() result is shared across requests
+    through the cache. Authentication and every other check are unchanged.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if obj is not None or user_obj.is_anonymous or not user_obj.is_active:
+            return super().get_all_permissions(user_obj, obj)
+        # ModelBackend's per-instance cache still serves repeat checks within
+        # a request without another cache round trip.
+        if not hasattr(user_obj, '_perm_cache'):
+            cache = permission_cache()
+            key = permission_cache_key(user_obj, permission_generation())
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300))
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
+
+
+def invalidate_on_m2m_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_permission_generation()
+
+
+def invalidate_on_change(sender, **kwargs):
+    bump_permission_generation()
+
+
+def connect_signals():
+    """
+    Bump the generation whenever group membership or permission assignments
+    change. Called from BookshelfConfig.ready().
+    """
+    User = get_user_model()
+    for through in (User.groups.through, User.user_permissions.through, Group.permissions.through):
+        m2m_changed.connect(invalidate_on_m2m_change, sender=through, dispatch_uid=f'bookshelf_perms_{through._meta.label}')
+    for model in (Group, Permission):
+        post_save.connect(invalidate_on_change, sender=model, dispatch_uid=f'bookshelf_perms_save_{model._meta.label}')
+        post_delete.connect(invalidate_on_change, sender=model, dispatch_uid=f'bookshelf_perms_delete_{model._meta.label}')
@@ -0,0 +1,182 @@
+"""
+Indexed book search and typeahead for the bookshelf views.
+
+search_books() keeps the substring semantics of the old
+`title__icontains | author__icontains` filter, but lets an index do the work:
+- PostgreSQL: the same icontains lookups, served by the pg_trgm GIN indexes
+  on UPPER(title) and UPPER(author) created in migration 0004.
+- SQLite: a MATCH against the bookshelf_book_fts FTS5 table (trigram
+  tokenizer, kept in sync by triggers), for queries of three or more
+  characters; the trigram tokenizer cannot match anything shorter.
+- Anything else, or a SQLite build without FTS5 trigram support: icontains.
+
+The typeahead uses an in-memory prefix index per process (PrefixIndex).
+Saving or deleting a book bumps a generation number in the cache, and each
+process rebuilds its index on the next lookup after a bump, so all processes
+sharing the cache see changes at once.
+
+Settings:
+- TYPEAHEAD_CACHE_ALIAS: cache holding the index generation (default "default").
+"""
+
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+from .models import Book
+
+FTS_TABLE = 'bookshelf_book_fts'
+FTS_TRIGGERS = {'bookshelf_book_fts_ai', 'bookshelf_book_fts_ad', 'bookshelf_book_fts_au'}
+FTS_MIN_LENGTH = 3  # Shortest query the trigram tokenizer can match
+GENERATION_KEY = 'bookshelf:typeahead:generation'
+
+_fts_available = {}
+
+
+def fts_available(using='default'):
+    """
+    Whether the FTS5 table and its sync triggers exist on ``using``. Checked
+    once per process; a later table rebuild by the SQLite schema editor drops
+    the triggers, and search then falls back to icontains instead of
+    returning stale matches.
+    """
+    if using not in _fts_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = %s) OR type = 'trigger'",
+                    [FTS_TABLE],
+                )
+                names = {row[0] for row in cursor.fetchall()}
+            available = FTS_TABLE in names and FTS_TRIGGERS <= names
+        _fts_available[using] = available
+    return _fts_available[using]
+
+
+def fts_phrase(query):
+    """Quote ``query`` as a single FTS5 phrase, so operators in it are literal text."""
+    return '"%s"' % query.replace('"', '""')
+
+
+def search_books(queryset, query):
+    """
+    Filter ``queryset`` to books whose title or author contains ``query``
+    (case-insensitive).
+    """
+    using = queryset.db
+    if len(query) >= FTS_MIN_LENGTH and fts_available(using):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_phrase(query)],
+        ))
+    return queryset.filter(Q(title__icontains=query) | Q(author__icontains=query))
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Sorted (key, book id) lists searched with bisect. ``primary`` holds whole
+    titles and author names, ``secondary`` every later word onwards, so
+    "gat" finds "The Great Gatsby" after any title starting with "gat".
+    """
+
+    def __init__(self, rows):
+        primary, secondary = [], []
+        self.books = {}
+        for pk, title, author in rows:
+            self.books[pk] = {'id': pk, 'title': title, 'author': author}
+            for text in (title, author):
+                words = normalize(text).split(' ')
+                primary.append((' '.join(words), pk))
+                secondary.extend((' '.join(words[i:]), pk) for i in range(1, len(words)))
+        primary.sort()
+        secondary.sort()
+        self.primary = primary
+        self.secondary = secondary
+
+    def lookup(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        seen, results = set(), []
+        for entries in (self.primary, self.secondary):
+            index = bisect.bisect_left(entries, (prefix,))
+            while index < len(entries) and len(results) < limit:
+                key, pk = entries[index]
+                if not key.startswith(prefix):
+                    break
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append(self.books[pk])
+                index += 1
+        return results
+
+
+def typeahead_cache():
+    return caches[getattr(settings, 'TYPEAHEAD_CACHE_ALIAS', 'default')]
+
+
+def index_generation():
+    cache = typeahead_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_index_generation():
+    cache = typeahead_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+
+def get_prefix_index():
+    """
+    Return this process's PrefixIndex, rebuilding it if a book changed since
+    it was built.
+    """
+    global _index, _index_generation
+    generation = index_generation()
+    if _index is None or _index_generation != generation:
+        with _index_lock:
+            if _index is None or _index_generation != generation:
+                _index = PrefixIndex(Book.objects.values_list('pk', 'title', 'author').iterator())
+                _index_generation = generation
+    return _index
+
+
+def typeahead(prefix, limit=10):
+    return get_prefix_index().lookup(prefix, limit)
+
+
+def invalidate_on_book_change(sender, **kwargs):
+    bump_index_generation()
+
+
+def connect_signals():
+    """
+    Rebuild the typeahead index after books are saved or deleted. Called from
+    BookshelfConfig.ready(). Bulk operations (update(), bulk_create()) send
+    no signals; call bump_index_generation() after them.
+    """
+    post_save.connect(invalidate_on_book_change, sender=Book, dispatch_uid='bookshelf_typeahead_save')
+    post_delete.connect(invalidate_on_book_change, sender=Book, dispatch_uid='bookshelf_typeahead_delete')
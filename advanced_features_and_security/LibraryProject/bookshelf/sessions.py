@@ -0,0 +1,241 @@
+"""
+Write-behind cached session engine (SESSION_ENGINE = 'bookshelf.sessions').
+
+With the database engine every authenticated request SELECTs its session
+row, and every modified session is written back with an UPDATE. This engine
+keeps decoded sessions in the cache framework (SESSION_CACHE_ALIAS) in front
+of the django_session table:
+
+- Loads read the process's pending writes, then the cache, and only go to
+  the database on a miss (filling the cache).
+- Saves of existing sessions update the cache at once and queue the row;
+  queued rows are written with bulk UPDATEs, at most every
+  SESSION_WRITE_BEHIND_INTERVAL seconds or once
+  SESSION_WRITE_BEHIND_MAX_PENDING rows are waiting, when a request
+  finishes. A session modified on every request costs one batched write
+  per interval instead of one UPDATE per request.
+- New sessions (login, cycle_key) and deletions (logout, flush) go to the
+  database immediately, so key uniqueness and logout never depend on a
+  pending batch.
+
+A deleted session must stay deleted even though other processes may still
+hold it in their queue. Batches therefore only UPDATE rows that exist and
+never insert one. A deletion also leaves a marker in the cache for
+SESSION_COOKIE_AGE seconds. Loads check the marker before the pending
+writes and the cache, and batches skip marked keys.
+
+A process that dies loses at most one interval of session changes; the
+database then holds the previous state of those sessions. As with the
+permission cache, the cache must be shared (Redis, Memcached) when several
+processes serve requests, or a process can serve a session that another
+has since changed.
+
+Expired rows are removed by clear_expired() (used by `clearsessions`) and
+the `cleanup_sessions` command, in chunks of SESSION_CLEANUP_BATCH_SIZE so
+no single DELETE holds the table for long.
+
+Settings:
+- SESSION_CACHE_ALIAS: cache for decoded sessions (Django's, default "default").
+- SESSION_WRITE_BEHIND_INTERVAL: seconds between batched writes (default 10).
+- SESSION_WRITE_BEHIND_MAX_PENDING: queued rows that force a write (default 500).
+- SESSION_CLEANUP_BATCH_SIZE: expired rows deleted per statement (default 1000).
+"""
+
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'bookshelf.sessions:'
+# Cache key prefix of the "deleted" markers
+DELETED_PREFIX = KEY_PREFIX + 'deleted:'
+
+# session_key -> (encoded session data, expire date), waiting to be written
+_pending = {}
+# Held while _pending is changed or written, so a logout cannot be undone by
+# a batch that still holds the session
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def write_behind_settings():
+    return (
+        getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 10),
+        getattr(settings, 'SESSION_WRITE_BEHIND_MAX_PENDING', 500),
+    )
+
+
+class SessionStore(DBStore):
+    """
+    Database-backed session store with a cache in front and batched writes.
+    """
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def load(self):
+        deleted_key = DELETED_PREFIX + self._get_or_create_session_key()
+        try:
+            cached = self._cache.get_many([self.cache_key, deleted_key])
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid
+            # cache keys. If this happens, reset the session.
+            cached = {}
+        if deleted_key in cached:
+            # Deleted, possibly by another process: ignore what is queued here
+            self._session_key = None
+            return {}
+        pending = _pending.get(self.session_key)
+        if pending is not None and pending[1] > timezone.now():
+            return self.decode(pending[0])
+        data = cached.get(self.cache_key)
+
+        if data is None:
+            s = self._get_session_from_db()
+            if s:
+                data = self.decode(s.session_data)
+                self._cache.set(self.cache_key, data, self.get_expiry_age(expiry=s.expire_date))
+            else:
+                data = {}
+        return data
+
+    def exists(self, session_key):
+        return (
+            session_key in _pending
+            or self.cache_key_prefix + session_key in self._cache
+            or super().exists(session_key)
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            # Inserted now: the INSERT is what detects a key collision
+            super().save(must_create=True)
+        else:
+            data = self._get_session(no_load=must_create)
+            with _lock:
+                _pending[self.session_key] = (self.encode(data), self.get_expiry_date())
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        # Mark first, so no process serves or writes the session from here on
+        self._cache.set(DELETED_PREFIX + session_key, True, settings.SESSION_COOKIE_AGE)
+        with _lock:
+            _pending.pop(session_key, None)
+            super().delete(session_key)
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+    # The database store's async methods would bypass the queue and cache
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        delete_expired_sessions()
+
+    @classmethod
+    async def aclear_expired(cls):
+        await sync_to_async(delete_expired_sessions)()
+
+
+def flush_pending_sessions():
+    """
+    Write every queued session to the database with bulk UPDATEs; return the
+    number of rows updated. Sessions deleted since they were queued (marked
+    in the cache, or no longer in the table) are not written. Rows stay
+    queued if the write fails.
+    """
+    global _last_flush
+    model = SessionStore.get_model_class()
+    with _lock:
+        _last_flush = time.monotonic()
+        if not _pending:
+            return 0
+        now = timezone.now()
+        deleted = caches[settings.SESSION_CACHE_ALIAS].get_many(
+            [DELETED_PREFIX + session_key for session_key in _pending]
+        )
+        rows = [
+            model(session_key=session_key, session_data=data, expire_date=expire_date)
+            for session_key, (data, expire_date) in _pending.items()
+            if expire_date > now and DELETED_PREFIX + session_key not in deleted
+        ]
+        try:
+            # An UPDATE cannot recreate a row that another process deleted
+            updated = model.objects.bulk_update(rows, ['session_data', 'expire_date']) if rows else 0
+        except DatabaseError:
+            logger.exception("Could not write %d pending sessions; retrying later", len(rows))
+            return 0
+        _pending.clear()
+    return updated
+
+
+def flush_if_due(**kwargs):
+    """request_finished receiver: write the queue when it is old or long enough."""
+    interval, max_pending = write_behind_settings()
+    if _pending and (len(_pending) >= max_pending or time.monotonic() - _last_flush >= interval):
+        flush_pending_sessions()
+
+
+def delete_expired_sessions(batch_size=None, pause=0):
+    """
+    Delete expired session rows in chunks of ``batch_size``, each in its own
+    statement, sleeping ``pause`` seconds between chunks. Returns the number
+    of rows deleted.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'SESSION_CLEANUP_BATCH_SIZE', 1000)
+    model = SessionStore.get_model_class()
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            model.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        deleted += model.objects.filter(session_key__in=keys, expire_date__lt=now).delete()[0]
+        if len(keys) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    with _lock:
+        for session_key in [key for key, (_, expire_date) in _pending.items() if expire_date <= now]:
+            del _pending[session_key]
+    return deleted
+
+
+def connect_signals():
+    """
+    Write queued sessions as requests finish. Called from BookshelfConfig.ready().
+    """
+    request_finished.connect(flush_if_due, dispatch_uid='bookshelf_sessions_flush')
@@ -0,0 +1,388 @@
+"""
+Security regression suite for the bookshelf app.
+
+Covers CSRF, XSS, SQL injection, permission enforcement, input validation,
+security headers and per-endpoint latency budgets. Every test class is
+independent, so the suite can run in parallel:
+
+    python manage.py test bookshelf --parallel
+
+XSS and SQL injection payloads are read from testdata/xss.txt and
+testdata/sqli.txt and sent to every bookshelf endpoint; add a line there to
+cover a new payload everywhere.
+
+Latency budgets (milliseconds of CPU time, median over several requests with
+the test client) live in testdata/latency_budgets.json, so raising one is a reviewed
+change. Set SECURITY_LATENCY_FACTOR to scale them on slow machines. Measured
+with process_time(), the budgets cover the CPU work of a request, not its
+latency: time spent waiting on I/O is left out, and so is time other
+--parallel workers hold the CPU.
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import quote
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Q
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Book
+
+TESTDATA = Path(__file__).resolve().parent / 'testdata'
+
+
+def load_payloads(name):
+    lines = (TESTDATA / name).read_text(encoding='utf-8').splitlines()
+    return [line for line in lines if line.strip() and not line.startswith('#')]
+
+
+XSS_PAYLOADS = load_payloads('xss.txt')
+SQLI_PAYLOADS = load_payloads('sqli.txt')
+LATENCY_BUDGETS = json.loads((TESTDATA / 'latency_budgets.json').read_text(encoding='utf-8'))
+
+# Characters that make a payload dangerous if echoed unescaped into HTML
+HTML_SPECIAL = set('<>"\'')
+
+SECURITY_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+}
+
+
+def book_data(title='Security Test Book', author='Test Author', year=2000):
+    return {'title': title, 'author': author, 'publication_year': year}
+
+
+def fuzz_requests(book, payload):
+    """
+    (label, method, url, data, kwargs) for every bookshelf endpoint with
+    ``payload`` in each user-controlled input.
+    """
+    return [
+        ('search GET', 'get', reverse('bookshelf:book_list'), {'search': payload}, {}),
+        ('search POST', 'post', reverse('bookshelf:book_list'), {'search': payload}, {}),
+        ('search page', 'get', reverse('bookshelf:book_list'), {'search': payload, 'page': payload}, {}),
+        ('typeahead', 'get', reverse('bookshelf:book_typeahead'), {'q': payload}, {}),
+        ('create title', 'post', reverse('bookshelf:book_create'), book_data(title=payload), {}),
+        ('create author', 'post', reverse('bookshelf:book_create'), book_data(author=payload), {}),
+        ('create year', 'post', reverse('bookshelf:book_create'), book_data(year=payload), {}),
+        ('edit title', 'post', reverse('bookshelf:book_edit', args=[book.pk]), book_data(title=payload), {}),
+        ('import', 'post', reverse('bookshelf:book_import'),
+         json.dumps([book_data(title=payload), book_data(author=payload), book_data(year=payload)]),
+         {'content_type': 'application/json'}),
+        ('form example', 'post', reverse('bookshelf:form_example'),
+         {'title': payload, 'author': payload, 'publication_year': payload, 'description': payload}, {}),
+        ('detail path', 'get', reverse('bookshelf:book_list') + 'book/' + quote(payload, safe='') + '/', {}, {}),
+    ]
+
+
+class SecurityTestCase(TestCase):
+    """
+    Shared fixtures: the Viewers/Editors/Admins groups, one user per group
+    plus one without permissions, and a small catalogue.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('setup_groups', stdout=StringIO())
+        User = get_user_model()
+        cls.users = {}
+        for name, group in (('viewer', 'Viewers'), ('editor', 'Editors'), ('admin', 'Admins'), ('noperms', None)):
+            # No password: force_login is used, and skipping the hash keeps setup fast
+            user = User.objects.create_user(f'{name}_security', f'{name}@example.com', None)
+            if group:
+                user.groups.add(Group.objects.get(name=group))
+            cls.users[name] = user
+        Book.objects.bulk_create([
+            Book(title=f'Volume {n:03d}', author=f'Author Number {n % 7}', publication_year=1900 + n)
+            for n in range(60)
+        ])
+        cls.book = Book.objects.create(title='The Great Gatsby', author='F. Scott Fitzgerald', publication_year=1925)
+
+    def setUp(self):
+        cache.clear()
+        # Fuzzing triggers many audit and suspicious-request warnings; they are
+        # not under test here, so keep them out of security.log and off the
+        # audit queue (whose thread would write to the test database).
+        for name in ('bookshelf.audit', 'django.security'):
+            self.enterContext(mock.patch.object(logging.getLogger(name), 'handlers', [logging.NullHandler()]))
+            self.enterContext(mock.patch.object(logging.getLogger(name), 'propagate', False))
+
+    def login(self, role, client=None):
+        client = client or self.client
+        client.force_login(self.users[role])
+        return client
+
+    def send(self, method, url, data, kwargs, client=None):
+        return getattr(client or self.client, method)(url, data, **kwargs)
+
+
+class CSRFProtectionTests(SecurityTestCase):
+
+    def test_state_changing_endpoints_require_csrf_token(self):
+        client = self.login('admin', Client(enforce_csrf_checks=True))
+        posts = [
+            (reverse('bookshelf:book_list'), {'search': 'gatsby'}),
+            (reverse('bookshelf:book_create'), book_data()),
+            (reverse('bookshelf:book_edit', args=[self.book.pk]), book_data()),
+            (reverse('bookshelf:book_delete', args=[self.book.pk]), {}),
+            (reverse('bookshelf:book_import'), {}),
+            (reverse('bookshelf:form_example'), book_data()),
+        ]
+        for url, data in posts:
+            with self.subTest(url=url):
+                self.assertEqual(client.post(url, data).status_code, 403)
+        self.assertTrue(Book.objects.filter(pk=self.book.pk).exists())
+
+    def test_forms_include_csrf_token(self):
+        self.login('admin')
+        for url in (reverse('bookshelf:book_create'), reverse('bookshelf:form_example')):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'csrfmiddlewaretoken')
+
+
+class PermissionEnforcementTests(SecurityTestCase):
+    # endpoint name -> role that first gains access (roles are cumulative)
+    REQUIRED_ROLE = {
+        'book_list': 'viewer',
+        'book_typeahead': 'viewer',
+        'book_detail': 'viewer',
+        'book_create': 'editor',
+        'book_edit': 'editor',
+        'book_delete': 'admin',
+    }
+    ROLES = ['noperms', 'viewer', 'editor', 'admin']
+
+    def url(self, name):
+        if name in ('book_detail', 'book_edit', 'book_delete'):
+            return reverse(f'bookshelf:{name}', args=[self.book.pk])
+        return reverse(f'bookshelf:{name}')
+
+    def test_anonymous_users_are_refused(self):
+        for name in self.REQUIRED_ROLE:
+            with self.subTest(endpoint=name):
+                self.assertIn(self.client.get(self.url(name)).status_code, (302, 403))
+        for name in ('user_permissions', 'form_example'):
+            with self.subTest(endpoint=name):
+                self.assertEqual(self.client.get(reverse(f'bookshelf:{name}')).status_code, 302)
+        response = self.client.post(reverse('bookshelf:book_import'), [], content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_permission_matrix(self):
+        for role in self.ROLES:
+            client = self.login(role, Client())
+            for name, required in self.REQUIRED_ROLE.items():
+                allowed = self.ROLES.index(role) >= self.ROLES.index(required)
+                with self.subTest(role=role, endpoint=name):
+                    status = client.get(self.url(name)).status_code
+                    if allowed:
+                        self.assertEqual(status, 200)
+                    else:
+                        self.assertEqual(status, 403)
+
+    def test_import_requires_create_permission(self):
+        for role, expected in (('viewer', 403), ('editor', 201)):
+            client = self.login(role, Client())
+            with self.subTest(role=role):
+                response = client.post(
+                    reverse('bookshelf:book_import'),
+                    [book_data(title=f'Imported by {role}')],
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, expected)
+
+
+class XSSPreventionTests(SecurityTestCase):
+
+    def test_payloads_are_never_reflected_unescaped(self):
+        self.login('admin')
+        for payload in XSS_PAYLOADS:
+            dangerous = bool(HTML_SPECIAL & set(payload))
+            for label, method, url, data, kwargs in fuzz_requests(self.book, payload):
+                with self.subTest(endpoint=label, payload=payload):
+                    response = self.send(method, url, data, kwargs)
+                    self.assertLess(response.status_code, 500)
+                    if response.get('Content-Type', '').startswith('application/json'):
+                        continue
+                    if dangerous:
+                        self.assertNotIn(payload, response.content.decode())
+
+    def test_payloads_are_never_stored(self):
+        self.login('admin')
+        for payload in XSS_PAYLOADS:
+            for label, method, url, data, kwargs in fuzz_requests(self.book, payload):
+                self.send(method, url, data, kwargs)
+        stored = Book.objects.filter(
+            Q(title__contains='<') | Q(author__contains='<') | Q(title__icontains='javascript:')
+        )
+        self.assertFalse(stored.exists(), list(stored.values_list('title', flat=True)))
+
+    def test_json_endpoints_are_not_html(self):
+        self.login('admin')
+        response = self.client.get(reverse('bookshelf:book_typeahead'), {'q': '<script>'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+
+class SQLInjectionTests(SecurityTestCase):
+
+    def test_payloads_cannot_alter_data_or_results(self):
+        self.login('admin')
+        before = dict(Book.objects.values_list('pk', 'title'))
+        for payload in SQLI_PAYLOADS:
+            for label, method, url, data, kwargs in fuzz_requests(self.book, payload):
+                with self.subTest(endpoint=label, payload=payload):
+                    response = self.send(method, url, data, kwargs)
+                    self.assertLess(response.status_code, 500)
+        # Nothing that existed was deleted or overwritten (edits made through
+        # the edit form only touch the one book they target)
+        after = dict(Book.objects.exclude(pk=self.book.pk).values_list('pk', 'title'))
+        for pk, title in after.items():
+            if pk in before:
+                self.assertEqual(title, before[pk])
+        self.assertEqual(len(set(before) - set(after) - {self.book.pk}), 0)
+
+    def test_search_matches_only_literal_text(self):
+        self.login('viewer')
+        titles_and_authors = list(Book.objects.values_list('title', 'author'))
+        for payload in SQLI_PAYLOADS:
+            with self.subTest(payload=payload):
+                response = self.client.get(reverse('bookshelf:book_list'), {'search': payload})
+                if response.status_code != 200:
+                    continue
+                needle = payload.strip().casefold()
+                expected = sum(1 for title, author in titles_and_authors
+                               if needle in title.casefold() or needle in author.casefold())
+                self.assertEqual(response.context['page_obj'].paginator.count, expected)
+
+    def test_typeahead_matches_only_literal_prefixes(self):
+        self.login('viewer')
+        for payload in SQLI_PAYLOADS:
+            with self.subTest(payload=payload):
+                results = self.client.get(reverse('bookshelf:book_typeahead'), {'q': payload}).json()['results']
+                self.assertEqual(results, [])
+
+
+class InputValidationTests(SecurityTestCase):
+
+    def test_overlong_search_is_rejected(self):
+        self.login('viewer')
+        response = self.client.get(reverse('bookshelf:book_list'), {'search': 'A' * 1000}, follow=True)
+        self.assertContains(response, 'Search query too long')
+
+    def test_invalid_ids_are_rejected(self):
+        self.login('admin')
+        for name in ('book_detail', 'book_edit', 'book_delete'):
+            with self.subTest(endpoint=name):
+                self.assertEqual(self.client.get(reverse(f'bookshelf:{name}', args=[0])).status_code, 302)
+                self.assertEqual(self.client.get(reverse(f'bookshelf:{name}', args=[999999])).status_code, 404)
+
+    def test_invalid_book_is_not_created(self):
+        self.login('editor')
+        count = Book.objects.count()
+        for data in (book_data(title='x'), book_data(author='R2-D2'), book_data(year=99999), book_data(year='')):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post(reverse('bookshelf:book_create'), data).status_code, 200)
+        self.assertEqual(Book.objects.count(), count)
+
+    def test_oversized_import_is_rejected(self):
+        self.login('editor')
+        response = self.client.post(
+            reverse('bookshelf:book_import'), [book_data()] * 5001, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class SecurityHeaderTests(SecurityTestCase):
+
+    def test_headers_on_every_endpoint(self):
+        self.login('admin')
+        urls = [
+            reverse('bookshelf:book_list'),
+            reverse('bookshelf:book_typeahead'),
+            reverse('bookshelf:book_detail', args=[self.book.pk]),
+            reverse('bookshelf:book_create'),
+            reverse('bookshelf:user_permissions'),
+            reverse('bookshelf:form_example'),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            for header, value in SECURITY_HEADERS.items():
+                with self.subTest(url=url, header=header):
+                    self.assertEqual(response.get(header), value)
+            with self.subTest(url=url, header='Content-Security-Policy'):
+                self.assertIn("default-src 'self'", response.get('Content-Security-Policy', ''))
+                self.assertIn("frame-ancestors 'none'", response['Content-Security-Policy'])
+            self.assertNotIn('Server', response)
+
+    def test_headers_on_error_responses(self):
+        response = self.client.get(reverse('bookshelf:book_list'))
+        self.assertIn(response.status_code, (302, 403))
+        self.assertEqual(response.get('X-Frame-Options'), 'DENY')
+
+
+@override_settings(DEBUG=False)
+class LatencyBudgetTests(SecurityTestCase):
+    """
+    Median request time per endpoint must stay within its budget, so security
+    changes (middleware, validation, permission checks) cannot silently slow
+    requests down. Time is the process's CPU time, not wall time, so other
+    workers of a --parallel run competing for CPUs do not count against it.
+    """
+    RUNS = 15
+    WARMUP = 3
+
+    def budget(self, name):
+        return LATENCY_BUDGETS[name] * float(os.environ.get('SECURITY_LATENCY_FACTOR', '1'))
+
+    def median_ms(self, request):
+        for _ in range(self.WARMUP):
+            request()
+        timings = []
+        for _ in range(self.RUNS):
+            started = time.process_time()
+            response = request()
+            timings.append((time.process_time() - started) * 1000)
+            self.assertLess(response.status_code, 500)
+        return statistics.median(timings)
+
+    def test_endpoints_within_budget(self):
+        self.login('admin')
+        list_url = reverse('bookshelf:book_list')
+        import_rows = json.dumps([book_data(title=f'Budget Book {n}') for n in range(500)])
+        requests = {
+            'book_list': lambda: self.client.get(list_url),
+            'book_list_search': lambda: self.client.get(list_url, {'search': 'volume'}),
+            'book_list_page': lambda: self.client.get(list_url, {'page': 3}),
+            'book_typeahead': lambda: self.client.get(reverse('bookshelf:book_typeahead'), {'q': 'vol'}),
+            'book_detail': lambda: self.client.get(reverse('bookshelf:book_detail', args=[self.book.pk])),
+            'book_create_form': lambda: self.client.get(reverse('bookshelf:book_create')),
+            'user_permissions': lambda: self.client.get(reverse('bookshelf:user_permissions')),
+            'form_example': lambda: self.client.post(reverse('bookshelf:form_example'), book_data()),
+            # Rows are duplicates after the first (warm-up) run, so this
+            # measures validating 500 rows and answering with their errors
+            'book_import_500': lambda: self.client.post(
+                reverse('bookshelf:book_import'), import_rows, content_type='application/json',
+            ),
+        }
+        self.assertEqual(set(requests), set(LATENCY_BUDGETS))
+        for name, request in requests.items():
+            with self.subTest(endpoint=name):
+                median = self.median_ms(request)
+                self.assertLessEqual(
+                    median, self.budget(name),
+                    f'{name}: median {median:.1f} ms exceeds its {self.budget(name):.0f} ms budget',
+                )
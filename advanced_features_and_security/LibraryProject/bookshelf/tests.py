@@ -1,3 +1,729 @@
-from django.test import TestCase
+import logging
+import queue
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .audit import AuditDatabaseHandler, AuditQueueHandler, AuditQueueListener
+from .changelist import estimated_row_count
+from .forms import BookForm
+from .models import AuditEvent, Book
+from .lockout import failure_counts, record_failure
+from .permissions import permission_generation
+from .search import search_books
+from . import sessions
+from .validators import DUPLICATE_BOOK_MESSAGE, validate_book_rows
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedPermissionBackendTests(TestCase):
+    """
+    The permission cache must serve repeat checks without queries and must
+    never serve a stale answer after membership or group permissions change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('setup_groups', stdout=StringIO())
+        cls.viewers = Group.objects.get(name='Viewers')
+        cls.editors = Group.objects.get(name='Editors')
+        cls.admins = Group.objects.get(name='Admins')
+        cls.user = get_user_model().objects.create_user('reader', 'reader@example.com', 'testpass123')
+        cls.user.groups.add(cls.viewers)
+
+    def setUp(self):
+        cache.clear()
+
+    def fresh_user(self):
+        # A new instance per check, as each request loads the user again.
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_permissions_are_cached_across_user_instances(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('bookshelf.can_view'))
+            self.assertFalse(user.has_perm('bookshelf.can_create'))
+
+    def test_adding_group_invalidates(self):
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_edit'))
+        self.user.groups.add(self.editors)
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_edit'))
+
+    def test_removing_group_invalidates(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        self.viewers.user_set.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_view'))
+
+    def test_clearing_groups_invalidates(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        self.user.groups.clear()
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_view'))
+
+    def test_group_permission_change_invalidates(self):
+        can_delete = Permission.objects.get(codename='can_delete', content_type__app_label='bookshelf')
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_delete'))
+        self.viewers.permissions.add(can_delete)
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_delete'))
+
+    def test_user_permission_change_invalidates(self):
+        can_create = Permission.objects.get(codename='can_create', content_type__app_label='bookshelf')
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_create'))
+        self.user.user_permissions.add(can_create)
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_create'))
+
+    def test_group_delete_invalidates(self):
+        self.user.groups.add(self.admins)
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_delete'))
+        self.admins.delete()
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_delete'))
+
+    def test_setup_groups_bumps_generation(self):
+        generation = permission_generation()
+        call_command('setup_groups', stdout=StringIO())
+        self.assertNotEqual(permission_generation(), generation)
+
+    def test_lost_generation_does_not_serve_stale_sets(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        cache.delete('bookshelf:perms:generation')
+        self.user.groups.remove(self.viewers)
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_view'))
+
+    def test_deactivated_user_loses_permissions(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_view'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BookSearchTests(TestCase):
+    """
+    Search must match substrings of titles and authors like the old icontains
+    filter did, stay in sync with edits, and paginate; the typeahead must
+    reflect saved books.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('setup_groups', stdout=StringIO())
+        cls.user = get_user_model().objects.create_user('reader', 'reader@example.com', 'testpass123')
+        cls.user.groups.add(Group.objects.get(name='Viewers'))
+        cls.gatsby = Book.objects.create(title='The Great Gatsby', author='F. Scott Fitzgerald', publication_year=1925)
+        cls.orwell = Book.objects.create(title='Nineteen Eighty-Four', author='George Orwell', publication_year=1949)
+        cls.farm = Book.objects.create(title='Animal Farm', author='George Orwell', publication_year=1945)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        return set(search_books(Book.objects.all(), query).values_list('title', flat=True))
+
+    def test_substring_search_on_title_and_author(self):
+        self.assertEqual(self.search('gatsby'), {'The Great Gatsby'})
+        self.assertEqual(self.search('ORWELL'), {'Nineteen Eighty-Four', 'Animal Farm'})
+        self.assertEqual(self.search('eat'), {'The Great Gatsby'})
+
+    def test_short_and_special_queries(self):
+        self.assertEqual(self.search('Fa'), {'Animal Farm'})
+        self.assertEqual(self.search('"Farm" OR *'), set())
+
+    def test_index_follows_edits_and_deletes(self):
+        self.farm.title = 'Homage to Catalonia'
+        self.farm.save()
+        self.assertEqual(self.search('Farm'), set())
+        self.assertEqual(self.search('catalonia'), {'Homage to Catalonia'})
+        self.farm.delete()
+        self.assertEqual(self.search('catalonia'), set())
+
+    def test_book_list_is_paginated(self):
+        Book.objects.bulk_create([
+            Book(title=f'Orwell Essays {n:02d}', author='George Orwell', publication_year=1950)
+            for n in range(20)
+        ])
+        url = reverse('bookshelf:book_list')
+        # Only the first page of a search is audited.
+        with self.assertLogs('bookshelf.audit') as logs:
+            response = self.client.get(url, {'search': 'orwell'})
+        self.assertEqual([record.audit['action'] for record in logs.records], ['book.search'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 22)
+        self.assertEqual(len(response.context['books']), 12)
+        with self.assertNoLogs('bookshelf.audit'):
+            response = self.client.get(url, {'search': 'orwell', 'page': 2})
+        self.assertEqual(len(response.context['books']), 10)
+
+    def test_typeahead_returns_prefix_matches(self):
+        url = reverse('bookshelf:book_typeahead')
+        titles = [book['title'] for book in self.client.get(url, {'q': 'geo'}).json()['results']]
+        self.assertEqual(sorted(titles), ['Animal Farm', 'Nineteen Eighty-Four'])
+        titles = [book['title'] for book in self.client.get(url, {'q': 'gats'}).json()['results']]
+        self.assertEqual(titles, ['The Great Gatsby'])
+        self.assertEqual(self.client.get(url, {'q': 'g'}).json()['results'], [])
+
+    def test_typeahead_refreshes_on_save(self):
+        url = reverse('bookshelf:book_typeahead')
+        self.assertEqual(self.client.get(url, {'q': 'brave'}).json()['results'], [])
+        Book.objects.create(title='Brave New World', author='Aldous Huxley', publication_year=1932)
+        titles = [book['title'] for book in self.client.get(url, {'q': 'brave'}).json()['results']]
+        self.assertEqual(titles, ['Brave New World'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BookValidationTests(TestCase):
+    """
+    BookForm and the bulk import endpoint share the rules in validators.py
+    and must accept and reject the same data.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('setup_groups', stdout=StringIO())
+        cls.user = get_user_model().objects.create_user('editor', 'editor@example.com', 'testpass123')
+        cls.user.groups.add(Group.objects.get(name='Editors'))
+        Book.objects.create(title='Animal Farm', author='George Orwell', publication_year=1945)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_form_and_validators_agree(self):
+        cases = [
+            {'title': 'Dune', 'author': 'Frank Herbert', 'publication_year': 1965},
+            {'title': '<script>alert(1)</script>', 'author': 'Frank Herbert', 'publication_year': 1965},
+            {'title': 'Dune', 'author': 'Frank Herbert 2', 'publication_year': 1965},
+            {'title': 'D', 'author': 'Frank Herbert', 'publication_year': 999},
+            {'title': 'animal farm', 'author': 'GEORGE ORWELL', 'publication_year': 1945},
+        ]
+        for data in cases:
+            form = BookForm(data=data)
+            books, errors = validate_book_rows([data])
+            with self.subTest(data=data):
+                self.assertEqual(form.is_valid(), not errors)
+                if errors:
+                    self.assertEqual(
+                        {field: messages for field, messages in form.errors.items()},
+                        errors[0]['errors'],
+                    )
+
+    def test_batch_reports_row_numbers_and_duplicates(self):
+        rows = [
+            {'title': 'Dune', 'author': 'Frank Herbert', 'publication_year': 1965},
+            {'title': 'Animal Farm', 'author': 'george orwell', 'publication_year': 1945},
+            {'title': 'DUNE', 'author': 'Frank Herbert', 'publication_year': 1965},
+            {'title': 'Emma', 'author': 'Jane Austen', 'publication_year': 'soon'},
+            'not a book',
+        ]
+        books, errors = validate_book_rows(rows)
+        self.assertEqual([book.title for book in books], ['Dune'])
+        self.assertEqual([error['row'] for error in errors], [2, 3, 4, 5])
+        self.assertEqual(errors[0]['errors'], {'__all__': [DUPLICATE_BOOK_MESSAGE]})
+        self.assertEqual(errors[2]['errors'], {'publication_year': ["Publication year must be a valid number."]})
+
+    def test_json_import(self):
+        rows = [{'title': f'Volume {n}', 'author': 'Anon', 'publication_year': 2000} for n in range(1, 1001)]
+        rows.append({'title': 'Volume 1', 'author': 'Anon', 'publication_year': 2000})
+        with self.assertLogs('bookshelf.audit') as logs:
+            response = self.client.post(reverse('bookshelf:book_import'), rows, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1000)
+        self.assertEqual(response.json()['errors'][0]['row'], 1001)
+        self.assertEqual(logs.records[0].audit['action'], 'book.import')
+        self.assertEqual(Book.objects.filter(author='Anon').count(), 1000)
+
+    def test_csv_import(self):
+        upload = SimpleUploadedFile(
+            'books.csv',
+            b'title,author,publication_year\r\nEmma,Jane Austen,1815\r\nPersuasion,Jane Austen,1817\r\n',
+            content_type='text/csv',
+        )
+        with self.assertLogs('bookshelf.audit'):
+            response = self.client.post(reverse('bookshelf:book_import'), {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_import_rejects_bad_payloads(self):
+        url = reverse('bookshelf:book_import')
+        self.assertEqual(self.client.post(url, {'title': 'x'}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, 'not json', content_type='application/json').status_code, 400)
+        too_many = [{'title': 'Book', 'author': 'Anon', 'publication_year': 2000}] * 5001
+        self.assertEqual(self.client.post(url, too_many, content_type='application/json').status_code, 400)
+
+    def test_import_requires_create_permission(self):
+        self.user.groups.clear()
+        response = self.client.post(reverse('bookshelf:book_import'), [], content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    LOGIN_LOCKOUT_USERNAME_LIMIT=3,
+    LOGIN_LOCKOUT_IP_LIMIT=5,
+)
+class LoginLockoutTests(TestCase):
+    """
+    Locked usernames and IPs must be refused before any password is checked,
+    and counters must age out of the sliding window.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', 'reader@example.com', 'testpass123')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def attempt(self, username, password, ip='10.0.0.1'):
+        request = self.factory.post('/login/', REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return authenticate(request, username=username, password=password)
+
+    def test_username_locked_before_password_check(self):
+        with self.assertLogs('bookshelf.audit') as logs:
+            for _ in range(3):
+                self.assertIsNone(self.attempt('reader', 'wrong'))
+        self.assertEqual(logs.records[-1].audit['action'], 'login.locked')
+        self.assertEqual(logs.records[-1].audit['data']['username_failures'], 3)
+        with mock.patch.object(ModelBackend, 'authenticate') as password_check:
+            with self.assertLogs('bookshelf.audit') as logs:
+                self.assertIsNone(self.attempt('READER', 'testpass123', ip='10.0.0.2'))
+        password_check.assert_not_called()
+        self.assertEqual([record.audit['action'] for record in logs.records], ['login.blocked'])
+
+    def test_ip_locked_across_usernames(self):
+        with self.assertLogs('bookshelf.audit'):
+            for n in range(5):
+                self.attempt(f'guess{n}', 'wrong')
+            self.assertIsNone(self.attempt('reader', 'testpass123'))
+        self.assertIsNotNone(self.attempt('reader', 'testpass123', ip='10.0.0.9'))
+
+    @override_settings(LOGIN_LOCKOUT_IP_LIMIT=3)
+    def test_spoofed_forwarded_for_does_not_escape_ip_lockout(self):
+        with self.assertLogs('bookshelf.audit'):
+            for n in range(10):
+                request = self.factory.post('/login/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'198.51.100.{n}')
+                request.user = AnonymousUser()
+                authenticate(request, username=f'guess{n}', password='wrong')
+            request = self.factory.post('/login/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='198.51.100.99')
+            request.user = AnonymousUser()
+            # Every attempt counted against REMOTE_ADDR until the limit, then was blocked
+            self.assertEqual(failure_counts(request, None)['ip'], 3)
+            self.assertIsNone(authenticate(request, username='reader', password='testpass123'))
+
+    @override_settings(LOGIN_LOCKOUT_IP_LIMIT=3, LOGIN_LOCKOUT_TRUSTED_PROXIES=1)
+    def test_trusted_proxy_hop_is_counted(self):
+        def attempt(forwarded_for, username, password):
+            request = self.factory.post('/login/', REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR=forwarded_for)
+            request.user = AnonymousUser()
+            return authenticate(request, username=username, password=password)
+
+        with self.assertLogs('bookshelf.audit'):
+            # The client forges the left part; the proxy appends the real address
+            for n in range(3):
+                attempt(f'198.51.100.{n}, 203.0.113.7', f'guess{n}', 'wrong')
+            self.assertIsNone(attempt('198.51.100.99, 203.0.113.7', 'reader', 'testpass123'))
+        # Another client behind the same proxy is not locked out
+        self.assertIsNotNone(attempt('203.0.113.8', 'reader', 'testpass123'))
+
+    def test_success_resets_username_failures(self):
+        with self.assertLogs('bookshelf.audit'):
+            self.attempt('reader', 'wrong')
+            self.attempt('reader', 'wrong')
+        request = self.factory.post('/login/', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        user_logged_in.send(sender=type(self.user), request=request, user=self.user)
+        self.assertEqual(failure_counts(request, 'reader')['username'], 0)
+
+    def test_failures_age_out_of_sliding_window(self):
+        request = self.factory.post('/login/', REMOTE_ADDR='10.0.0.1')
+        start = 900 * 1000
+        for _ in range(4):
+            record_failure(request, 'reader', now=start)
+        self.assertEqual(failure_counts(request, 'reader', now=start + 450)['username'], 4)
+        self.assertEqual(failure_counts(request, 'reader', now=start + 900 + 450)['username'], 2)
+        self.assertEqual(failure_counts(request, 'reader', now=start + 1800)['username'], 0)
+
+    def test_login_view_refuses_locked_user(self):
+        url = reverse('login')
+        with self.assertLogs('bookshelf.audit'):
+            for _ in range(3):
+                self.client.post(url, {'username': 'reader', 'password': 'wrong'})
+            self.client.post(url, {'username': 'reader', 'password': 'testpass123'})
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SetupCommandTests(TestCase):
+    """
+    setup_groups and create_test_users converge on the same state however
+    often they run, and a re-run over a settled database writes nothing.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def writes(self, *args):
+        with CaptureQueriesContext(connection) as queries:
+            call_command(*args, stdout=StringIO())
+        return [q['sql'] for q in queries if q['sql'].split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+    def group_codenames(self, name):
+        return set(Group.objects.get(name=name).permissions.values_list('codename', flat=True))
+
+    def test_setup_groups_is_idempotent(self):
+        self.writes('setup_groups')
+        self.assertEqual(self.group_codenames('Editors'), {'can_view', 'can_create', 'can_edit'})
+        self.assertEqual(self.writes('setup_groups'), [])
+
+    def test_setup_groups_repairs_drift(self):
+        self.writes('setup_groups')
+        viewers = Group.objects.get(name='Viewers')
+        viewers.permissions.add(Permission.objects.get(codename='can_delete', content_type__app_label='bookshelf'))
+        Group.objects.get(name='Admins').delete()
+        self.writes('setup_groups')
+        self.assertEqual(self.group_codenames('Viewers'), {'can_view'})
+        self.assertEqual(self.group_codenames('Admins'), {'can_view', 'can_create', 'can_edit', 'can_delete'})
+
+    def test_create_test_users_seeds_and_is_idempotent(self):
+        self.writes('setup_groups')
+        self.writes('create_test_users', '--users', '30')
+        User = get_user_model()
+        self.assertEqual(User.objects.filter(username__startswith='seed_user_').count(), 30)
+        self.assertEqual(Group.objects.get(name='Editors').user_set.filter(username__startswith='seed_user_').count(), 10)
+        self.assertTrue(User.objects.get(username='seed_user_00030').check_password('testpass123'))
+        self.assertTrue(User.objects.get(username='editor_test').has_perm('bookshelf.can_edit'))
+        self.assertEqual(self.writes('create_test_users', '--users', '30'), [])
+
+    def test_create_test_users_repairs_memberships(self):
+        self.writes('setup_groups')
+        self.writes('create_test_users')
+        viewer = get_user_model().objects.get(username='viewer_test')
+        viewer.groups.set([Group.objects.get(name='Admins')])
+        self.assertTrue(viewer.has_perm('bookshelf.can_delete'))
+        self.writes('create_test_users')
+        viewer = get_user_model().objects.get(username='viewer_test')
+        self.assertEqual(list(viewer.groups.values_list('name', flat=True)), ['Viewers'])
+        self.assertFalse(viewer.has_perm('bookshelf.can_delete'))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    SESSION_ENGINE='bookshelf.sessions',
+)
+class WriteBehindSessionTests(TestCase):
+    """
+    The session engine serves sessions without database reads, batches
+    writes, and never lets a batch bring back a deleted session.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', 'reader@example.com', 'testpass123')
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.dict(sessions._pending, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def session_queries(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return [q['sql'] for q in queries if 'django_session' in q['sql']]
+
+    def test_authenticated_requests_do_not_read_the_session_table(self):
+        self.client.force_login(self.user)
+        url = reverse('bookshelf:user_permissions')
+        with self.assertLogs('bookshelf.audit'):
+            self.client.get(url)
+            self.assertEqual(self.session_queries(lambda: self.client.get(url)), [])
+
+    def test_saves_are_queued_then_written_in_bulk(self):
+        store = sessions.SessionStore()
+        store['step'] = 1
+        store.create()
+        store['step'] = 2
+        self.assertEqual(self.session_queries(store.save), [])
+        self.assertEqual(sessions.SessionStore(store.session_key)['step'], 2)
+        self.assertEqual(Session.objects.get(pk=store.session_key).get_decoded()['step'], 1)
+
+        self.assertEqual(sessions.flush_pending_sessions(), 1)
+        self.assertEqual(Session.objects.get(pk=store.session_key).get_decoded()['step'], 2)
+        self.assertEqual(sessions._pending, {})
+
+    def test_flush_due_after_interval_or_backlog(self):
+        store = sessions.SessionStore()
+        store.create()
+        store.save()
+        with override_settings(SESSION_WRITE_BEHIND_INTERVAL=3600, SESSION_WRITE_BEHIND_MAX_PENDING=2):
+            sessions.flush_if_due()
+            self.assertEqual(len(sessions._pending), 1)
+        with override_settings(SESSION_WRITE_BEHIND_INTERVAL=3600, SESSION_WRITE_BEHIND_MAX_PENDING=1):
+            sessions.flush_if_due()
+            self.assertEqual(sessions._pending, {})
+
+    def test_delete_is_immediate_and_not_undone_by_a_batch(self):
+        store = sessions.SessionStore()
+        store['user'] = 'reader'
+        store.create()
+        store.save()
+        store.delete()
+        self.assertFalse(Session.objects.filter(pk=store.session_key).exists())
+        sessions.flush_pending_sessions()
+        self.assertFalse(Session.objects.filter(pk=store.session_key).exists())
+        self.assertEqual(sessions.SessionStore(store.session_key).load(), {})
+
+    def test_flush_does_not_recreate_a_row_deleted_behind_its_back(self):
+        store = sessions.SessionStore()
+        store['user'] = 'reader'
+        store.create()
+        store['step'] = 2
+        store.save()
+        Session.objects.filter(pk=store.session_key).delete()
+        self.assertEqual(sessions.flush_pending_sessions(), 0)
+        self.assertFalse(Session.objects.filter(pk=store.session_key).exists())
+        self.assertEqual(sessions._pending, {})
+
+    def test_logout_in_another_process_is_not_undone(self):
+        store = sessions.SessionStore()
+        store['user'] = 'reader'
+        store.create()
+        store['step'] = 2
+        store.save()
+        queued = dict(sessions._pending)
+        # Another process logs the session out; this process still has it queued
+        sessions.SessionStore(store.session_key).delete()
+        sessions._pending.update(queued)
+        self.assertEqual(sessions.SessionStore(store.session_key).load(), {})
+        self.assertEqual(sessions.flush_pending_sessions(), 0)
+        self.assertFalse(Session.objects.filter(pk=store.session_key).exists())
+
+    def test_logout_ends_session(self):
+        self.client.force_login(self.user)
+        session_key = self.client.session.session_key
+        self.client.logout()
+        sessions.flush_pending_sessions()
+        self.assertFalse(Session.objects.filter(pk=session_key).exists())
+        self.assertFalse(sessions.SessionStore().exists(session_key))
+
+    def test_expired_sessions_deleted_in_chunks(self):
+        now = timezone.now()
+        expired = now - timezone.timedelta(minutes=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{n:025d}', session_data='', expire_date=expired) for n in range(25)]
+            + [Session(session_key=f'live{n:028d}', session_data='', expire_date=now + timezone.timedelta(hours=1)) for n in range(3)]
+        )
+        sessions._pending['expired-pending'] = ('', expired)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sessions.delete_expired_sessions(batch_size=10), 25)
+        self.assertEqual(sum(q['sql'].startswith('DELETE') for q in queries), 3)
+        self.assertEqual(Session.objects.count(), 3)
+        self.assertNotIn('expired-pending', sessions._pending)
+
+
+class AdminChangelistTests(TestCase):
+    """
+    Admin changelists run a fixed number of queries whatever the page size,
+    and skip COUNT(*) on large unfiltered tables.
+    """
+    # Unfiltered lists check for SQLite statistics before counting; the
+    # AuditEvent list adds its date_hierarchy queries.
+    QUERY_COUNTS = {
+        'book': 5,
+        'book?q=gatsby': 4,
+        'book?publication_year=1925': 4,
+        'customuser': 4,
+        'customuser?q=reader': 3,
+        'customuser?date_of_birth__gte=1990-01-01': 3,
+        'auditevent': 8,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser('root', 'root@example.com', None)
+        Book.objects.create(title='The Great Gatsby', author='F. Scott Fitzgerald', publication_year=1925)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count, start=0):
+        User = get_user_model()
+        Book.objects.bulk_create([
+            Book(title=f'Volume {n}', author='Jane Reader', publication_year=1900 + n % 100)
+            for n in range(start, start + count)
+        ])
+        User.objects.bulk_create([
+            User(username=f'reader{n}', email=f'reader{n}@example.com') for n in range(start, start + count)
+        ])
+
+    def changelist(self, path):
+        model, _, query = path.partition('?')
+        return self.client.get(f'/admin/bookshelf/{model}/' + (f'?{query}' if query else ''))
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        for total in (5, 80):
+            self.add_rows(total, start=1000 * total)
+            for path, expected in self.QUERY_COUNTS.items():
+                with self.subTest(path=path, rows=total), self.assertNumQueries(expected):
+                    self.assertEqual(self.changelist(path).status_code, 200)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=50)
+    def test_large_unfiltered_list_uses_estimated_count(self):
+        self.add_rows(60)
+        self.assertIsNone(estimated_row_count(Book))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_row_count(Book), 61)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist('book')
+        self.assertEqual(response.context['cl'].result_count, 61)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+
+        # Filtered lists still count exactly
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist('book?q=volume 1')
+        self.assertEqual(response.context['cl'].result_count, 15)
+        self.assertTrue(any('COUNT(' in q['sql'] for q in queries))
+
+    def test_book_search_matches_every_word_anywhere(self):
+        self.add_rows(3)
+        response = self.changelist('book?q=gats fitzger')
+        self.assertEqual([str(book) for book in response.context['cl'].result_list],
+                         ['The Great Gatsby by F. Scott Fitzgerald'])
+
+    def test_prefix_search_option(self):
+        self.add_rows(3)
+        get_user_model().objects.create_user('bookreader', 'bookreader@example.com', None)
+        response = self.changelist('customuser?q=reader')
+        self.assertEqual(response.context['cl'].result_count, 4)
+        with override_settings(ADMIN_PREFIX_SEARCH=True):
+            response = self.changelist('customuser?q=reader')
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+
+class SecurityMiddlewareTests(TestCase):
+    """
+    The cached security headers follow settings changes, and suspicious
+    patterns are matched on the decoded path.
+    """
+
+    def test_csp_follows_override_settings(self):
+        self.assertIn("default-src 'self';", self.client.get('/admin/login/')['Content-Security-Policy'])
+        with override_settings(CSP_DEFAULT_SRC=("'none'",)):
+            csp = self.client.get('/admin/login/')['Content-Security-Policy']
+        self.assertTrue(csp.startswith("default-src 'none';"), csp)
+        # Leaving the override resets the cache again
+        self.assertIn("default-src 'self';", self.client.get('/admin/login/')['Content-Security-Policy'])
+
+    def test_referrer_policy_follows_override_settings(self):
+        with override_settings(SECURE_REFERRER_POLICY='no-referrer'):
+            self.assertEqual(self.client.get('/admin/login/')['Referrer-Policy'], 'no-referrer')
+
+    def test_percent_encoded_pattern_in_path_is_logged(self):
+        with self.assertLogs('django.security', 'WARNING') as logs:
+            self.client.get('/bookshelf/%3Cscript%3E/')
+        self.assertIn("pattern '<script>'", logs.output[0])
+
+
+class RecordingBatchHandler(logging.Handler):
+    """Keeps the formatted messages of every batch it is handed."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def handle_batch(self, records):
+        self.batches.append([record.getMessage() for record in records])
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def audit_record(message, *args, level=logging.INFO):
+    record = logging.LogRecord('bookshelf.audit', level, __file__, 0, message, args, None)
+    record.audit = {'action': 'test.event', 'ip_address': '127.0.0.1', 'data': {}}
+    return record
+
+
+class AuditPipelineTests(TestCase):
+    """
+    The audit listener writes in batches, drops events instead of blocking
+    when its queue is full, and survives records that fail to format.
+    """
+
+    def test_listener_hands_out_batches_and_drains_on_stop(self):
+        event_queue = queue.Queue()
+        for n in range(5):
+            event_queue.put(audit_record('event %d', n))
+        handler = RecordingBatchHandler()
+        listener = AuditQueueListener(event_queue, handler)
+        with override_settings(AUDIT_BATCH_SIZE=2):
+            listener.start()
+            listener.stop()
+        self.assertEqual(handler.batches, [['event 0', 'event 1'], ['event 2', 'event 3'], ['event 4']])
+
+    def test_full_queue_drops_events_and_reports_them(self):
+        handler = RecordingBatchHandler()
+        listener = AuditQueueListener(queue.Queue(maxsize=1), handler)
+        with mock.patch.object(AuditQueueHandler, '_listener', listener), \
+                override_settings(AUDIT_QUEUE_TIMEOUT=0):
+            queue_handler = AuditQueueHandler()
+            for n in range(3):
+                queue_handler.handle(audit_record('event %d', n))
+        self.assertEqual(listener.dropped, 2)
+        # stop() must not need room in the (still full) queue
+        with self.assertLogs('django.security', 'WARNING') as logs:
+            listener.start()
+            listener.stop()
+        self.assertEqual(handler.batches, [['event 0']])
+        self.assertIn('2 audit events were dropped', logs.output[0])
+
+    def test_listener_survives_a_bad_record(self):
+        event_queue = queue.Queue()
+        batch_handler, record_handler = RecordingBatchHandler(), RecordingHandler()
+        batch_handler.handleError = mock.Mock()
+        record_handler.handleError = mock.Mock()
+        listener = AuditQueueListener(event_queue, batch_handler, record_handler)
+        bad = audit_record('%d books', 'many')
+        listener.start()
+        try:
+            event_queue.put(bad)
+            event_queue.join()
+            event_queue.put(audit_record('still running'))
+        finally:
+            listener.stop()
+        batch_handler.handleError.assert_called_once_with(bad)
+        record_handler.handleError.assert_called_once_with(bad)
+        self.assertEqual(batch_handler.batches, [['still running']])
+        self.assertEqual(record_handler.messages, ['still running'])
+
+    def test_database_handler_skips_a_bad_record_and_writes_the_rest(self):
+        handler = AuditDatabaseHandler()
+        handler.handleError = mock.Mock()
+        bad = audit_record('%d books', 'many')
+        handler.handle_batch([audit_record('first'), bad, audit_record('third')])
+        handler.handleError.assert_called_once_with(bad)
+        self.assertEqual(list(AuditEvent.objects.order_by('pk').values_list('message', flat=True)),
+                         ['first', 'third'])
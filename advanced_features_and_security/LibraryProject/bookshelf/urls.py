@@ -6,8 +6,10 @@ app_name = 'bookshelf'
 urlpatterns = [
     # Book CRUD operations with permission checks
     path('', views.book_list, name='book_list'),
+    path('typeahead/', views.book_typeahead, name='book_typeahead'),
     path('book/<int:pk>/', views.book_detail, name='book_detail'),
     path('book/create/', views.book_create, name='book_create'),
+    path('book/import/', views.book_import, name='book_import'),
     path('book/<int:pk>/edit/', views.book_edit, name='book_edit'),
     path('book/<int:pk>/delete/', views.book_delete, name='book_delete'),
     
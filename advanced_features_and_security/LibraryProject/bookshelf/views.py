@@ -6,16 +6,30 @@ from django.core.exceptions import PermissionDenied, ValidationError
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_http_methods
 from django.utils.html import escape
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+import csv
+import io
+import itertools
+import json
 import logging
-import re
 
 from .models import Book
 from .forms import BookForm
 from .forms import ExampleForm
+from .audit import audit
+from .search import bump_index_generation, search_books, typeahead
+from .validators import validate_book, validate_book_rows
 
-# Set up security logging
-logger = logging.getLogger('django.security')
+# Listing, search, typeahead and bulk import limits
+BOOKS_PER_PAGE = 12
+SEARCH_MAX_LENGTH = 100
+TYPEAHEAD_MIN_LENGTH = 2
+TYPEAHEAD_LIMIT = 10
+BULK_IMPORT_MAX_ROWS = 5000
+BULK_IMPORT_BATCH_SIZE = 500
+BULK_IMPORT_MAX_REPORTED_ERRORS = 100
 
 # Book List View with Security Enhancements
 @permission_required('bookshelf.can_view', raise_exception=True)
@@ -23,11 +37,13 @@ logger = logging.getLogger('django.security')
 @require_http_methods(["GET", "POST"])
 def book_list(request):
     """
-    Display a list of all books with optional search functionality.
-    Implements secure search to prevent SQL injection.
+    Display a paginated list of books with optional search functionality.
+    Search goes through bookshelf.search, which uses the database's text
+    index (FTS5 on SQLite, trigram indexes on PostgreSQL) with parameterized
+    queries, so it is safe from SQL injection and does not scan the table.
     Requires 'can_view' permission.
     """
-    books = Book.objects.all()
+    books = Book.objects.order_by('title', 'pk')
     search_query = None
     
     # Secure search implementation
@@ -35,29 +51,51 @@ def book_list(request):
         search_query = request.POST.get('search') or request.GET.get('search')
         
         if search_query:
-            # Sanitize and validate search input
-            search_query = escape(search_query.strip())
-            
-            # Log search attempts for security monitoring
-            logger.info(f"Search performed by user {request.user.username}: '{search_query}'")
+            # Normalize input; templates escape it on output
+            search_query = search_query.strip()
             
             # Validate search query length to prevent DoS
-            if len(search_query) > 100:
+            if len(search_query) > SEARCH_MAX_LENGTH:
                 messages.error(request, "Search query too long. Please limit to 100 characters.")
                 return redirect('bookshelf:book_list')
             
-            # Use Django ORM's secure parameterized queries
-            books = books.filter(
-                Q(title__icontains=search_query) | 
-                Q(author__icontains=search_query)
-            )
+            # Log search attempts for security monitoring (first page only,
+            # so paging through results does not repeat the event)
+            if not request.GET.get('page'):
+                audit(request, 'book.search', "Search performed by user %s: '%s'",
+                      request.user.username, search_query, query=search_query)
+            
+            books = search_books(books, search_query)
+    
+    paginator = Paginator(books, BOOKS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
-        'books': books,
+        'books': page_obj.object_list,
+        'page_obj': page_obj,
         'search_query': search_query,
     }
     return render(request, 'bookshelf/book_list.html', context)
 
+# Typeahead suggestions for the book search box
+@permission_required('bookshelf.can_view', raise_exception=True)
+@require_http_methods(["GET"])
+def book_typeahead(request):
+    """
+    Return up to TYPEAHEAD_LIMIT books whose title, author, or a later word
+    in either starts with ?q=, as JSON. Served from the in-memory prefix
+    index in bookshelf.search, so keystrokes do not hit the database; the
+    search box also debounces its requests. Not audited: it fires per
+    keystroke and the submitted search is logged by book_list.
+    Requires 'can_view' permission.
+    """
+    prefix = request.GET.get('q', '').strip()[:SEARCH_MAX_LENGTH]
+    results = typeahead(prefix, TYPEAHEAD_LIMIT) if len(prefix) >= TYPEAHEAD_MIN_LENGTH else []
+    response = JsonResponse({'results': results})
+    # Let the browser reuse answers while the user edits the same prefix
+    patch_cache_control(response, private=True, max_age=30)
+    return response
+
 # Book Detail View with Security Enhancements
 @permission_required('bookshelf.can_view', raise_exception=True)
 @csrf_protect
@@ -73,14 +111,16 @@ def book_detail(request, pk):
         if pk <= 0:
             raise ValueError("Invalid book ID")
     except (ValueError, TypeError):
-        logger.warning(f"Invalid book ID attempted by user {request.user.username}: {pk}")
+        audit(request, 'book.invalid_id', "Invalid book ID attempted by user %s: %s",
+              request.user.username, pk, level=logging.WARNING, view='detail')
         messages.error(request, "Invalid book ID.")
         return redirect('bookshelf:book_list')
     
     book = get_object_or_404(Book, pk=pk)
     
     # Log book access for audit trail
-    logger.info(f"Book '{book.title}' accessed by user {request.user.username}")
+    audit(request, 'book.view', "Book '%s' accessed by user %s",
+          book.title, request.user.username, object_id=book.pk)
     
     return render(request, 'bookshelf/book_detail.html', {'book': book})
 
@@ -102,20 +142,25 @@ def book_create(request):
                 book = form.save()
                 
                 # Log successful creation
-                logger.info(f"Book '{book.title}' created by user {request.user.username}")
+                audit(request, 'book.create', "Book '%s' created by user %s",
+                      book.title, request.user.username, object_id=book.pk)
                 
                 messages.success(request, f'Book "{escape(book.title)}" created successfully!')
                 return redirect('bookshelf:book_detail', pk=book.pk)
                 
             except ValidationError as e:
-                logger.warning(f"Validation error during book creation by {request.user.username}: {e}")
+                audit(request, 'book.create_invalid', "Validation error during book creation by %s: %s",
+                      request.user.username, e, level=logging.WARNING)
                 messages.error(request, "Invalid data provided. Please check your input.")
             except Exception as e:
-                logger.error(f"Unexpected error during book creation by {request.user.username}: {e}")
+                audit(request, 'book.create_error', "Unexpected error during book creation by %s: %s",
+                      request.user.username, e, level=logging.ERROR)
                 messages.error(request, "An error occurred while creating the book.")
         else:
             # Log form validation errors
-            logger.warning(f"Form validation failed for user {request.user.username}: {form.errors}")
+            audit(request, 'book.create_invalid', "Form validation failed for user %s: %s",
+                  request.user.username, form.errors.as_text(), level=logging.WARNING,
+                  errors=form.errors.get_json_data())
     else:
         form = BookForm()
     
@@ -124,6 +169,68 @@ def book_create(request):
         'action': 'Create'
     })
 
+# Bulk Book Import with Batch Validation
+@permission_required('bookshelf.can_create', raise_exception=True)
+@csrf_protect
+@require_http_methods(["POST"])
+def book_import(request):
+    """
+    Create many books in one request.
+    Accepts a JSON array of {"title", "author", "publication_year"} objects,
+    or a CSV upload ("file") with those columns. Every row is checked with the
+    same rules as BookForm (validators.validate_book_rows, one duplicate query
+    per 500 rows); valid rows are inserted with bulk_create and invalid rows
+    are reported by row number.
+    Requires 'can_create' permission.
+    """
+    try:
+        rows = read_import_rows(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        return JsonResponse({'error': f"Too many rows. Please limit imports to {BULK_IMPORT_MAX_ROWS} books."}, status=400)
+    
+    books, errors = validate_book_rows(rows)
+    with transaction.atomic():
+        Book.objects.bulk_create(books, batch_size=BULK_IMPORT_BATCH_SIZE)
+    if books:
+        # bulk_create sends no post_save, so refresh the typeahead explicitly
+        bump_index_generation()
+    
+    audit(request, 'book.import', "Bulk import by user %s: %d created, %d invalid",
+          request.user.username, len(books), len(errors),
+          level=logging.WARNING if errors else logging.INFO, rows=len(rows))
+    
+    return JsonResponse({
+        'rows': len(rows),
+        'created': len(books),
+        'invalid': len(errors),
+        'errors': errors[:BULK_IMPORT_MAX_REPORTED_ERRORS],
+    }, status=201 if books else 400)
+
+def read_import_rows(request):
+    """
+    Read the rows of a book_import request as a list of dicts.
+    Raises ValueError with a user-facing message for malformed input.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig'))
+            # Read one row past the limit so oversized files are rejected
+            # without parsing all of them.
+            return list(itertools.islice(reader, BULK_IMPORT_MAX_ROWS + 1))
+        except (UnicodeDecodeError, csv.Error):
+            raise ValueError("The uploaded file is not a valid UTF-8 CSV file.")
+    try:
+        rows = json.loads(request.body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Send a JSON array of books or upload a CSV file.")
+    if not isinstance(rows, list):
+        raise ValueError("Send a JSON array of books or upload a CSV file.")
+    return rows
+
 # Book Edit View with Enhanced Security
 @permission_required('bookshelf.can_edit', raise_exception=True)
 @csrf_protect
@@ -139,7 +246,8 @@ def book_edit(request, pk):
         if pk <= 0:
             raise ValueError("Invalid book ID")
     except (ValueError, TypeError):
-        logger.warning(f"Invalid book ID attempted for edit by user {request.user.username}: {pk}")
+        audit(request, 'book.invalid_id', "Invalid book ID attempted for edit by user %s: %s",
+              request.user.username, pk, level=logging.WARNING, view='edit')
         messages.error(request, "Invalid book ID.")
         return redirect('bookshelf:book_list')
     
@@ -154,25 +262,31 @@ def book_edit(request, pk):
                 book = form.save()
                 
                 # Log successful update
-                logger.info(f"Book '{original_title}' updated to '{book.title}' by user {request.user.username}")
+                audit(request, 'book.edit', "Book '%s' updated to '%s' by user %s",
+                      original_title, book.title, request.user.username, object_id=book.pk)
                 
                 messages.success(request, f'Book "{escape(book.title)}" updated successfully!')
                 return redirect('bookshelf:book_detail', pk=book.pk)
                 
             except ValidationError as e:
-                logger.warning(f"Validation error during book update by {request.user.username}: {e}")
+                audit(request, 'book.edit_invalid', "Validation error during book update by %s: %s",
+                      request.user.username, e, level=logging.WARNING, object_id=book.pk)
                 messages.error(request, "Invalid data provided. Please check your input.")
             except Exception as e:
-                logger.error(f"Unexpected error during book update by {request.user.username}: {e}")
+                audit(request, 'book.edit_error', "Unexpected error during book update by %s: %s",
+                      request.user.username, e, level=logging.ERROR, object_id=book.pk)
                 messages.error(request, "An error occurred while updating the book.")
         else:
             # Log form validation errors
-            logger.warning(f"Form validation failed for book edit by user {request.user.username}: {form.errors}")
+            audit(request, 'book.edit_invalid', "Form validation failed for book edit by user %s: %s",
+                  request.user.username, form.errors.as_text(), level=logging.WARNING,
+                  object_id=book.pk, errors=form.errors.get_json_data())
     else:
         form = BookForm(instance=book)
         
         # Log book edit access
-        logger.info(f"Book '{book.title}' edit form accessed by user {request.user.username}")
+        audit(request, 'book.edit_form', "Book '%s' edit form accessed by user %s",
+              book.title, request.user.username, object_id=book.pk)
     
     return render(request, 'bookshelf/book_form.html', {
         'form': form,
@@ -195,7 +309,8 @@ def book_delete(request, pk):
         if pk <= 0:
             raise ValueError("Invalid book ID")
     except (ValueError, TypeError):
-        logger.warning(f"Invalid book ID attempted for deletion by user {request.user.username}: {pk}")
+        audit(request, 'book.invalid_id', "Invalid book ID attempted for deletion by user %s: %s",
+              request.user.username, pk, level=logging.WARNING, view='delete')
         messages.error(request, "Invalid book ID.")
         return redirect('bookshelf:book_list')
     
@@ -208,18 +323,21 @@ def book_delete(request, pk):
             book.delete()
             
             # Log successful deletion
-            logger.warning(f"Book '{title}' (ID: {book_id}) deleted by user {request.user.username}")
+            audit(request, 'book.delete', "Book '%s' (ID: %s) deleted by user %s",
+                  title, book_id, request.user.username, level=logging.WARNING, object_id=book_id)
             
             messages.success(request, f'Book "{escape(title)}" deleted successfully!')
             return redirect('bookshelf:book_list')
             
         except Exception as e:
-            logger.error(f"Error deleting book by user {request.user.username}: {e}")
+            audit(request, 'book.delete_error', "Error deleting book by user %s: %s",
+                  request.user.username, e, level=logging.ERROR, object_id=book.pk)
             messages.error(request, "An error occurred while deleting the book.")
             return redirect('bookshelf:book_detail', pk=book.pk)
     else:
         # Log delete confirmation page access
-        logger.info(f"Book '{book.title}' delete confirmation accessed by user {request.user.username}")
+        audit(request, 'book.delete_form', "Book '%s' delete confirmation accessed by user %s",
+              book.title, request.user.username, object_id=book.pk)
     
     return render(request, 'bookshelf/book_confirm_delete.html', {'book': book})
 
@@ -236,7 +354,7 @@ def user_permissions(request):
         user_groups = request.user.groups.all()
         
         # Log permissions access for audit trail
-        logger.info(f"User permissions viewed by {request.user.username}")
+        audit(request, 'permissions.view', "User permissions viewed by %s", request.user.username)
         
         context = {
             'user_permissions': user_permissions,
@@ -252,7 +370,8 @@ def user_permissions(request):
         return render(request, 'bookshelf/user_permissions.html', context)
         
     except Exception as e:
-        logger.error(f"Error accessing user permissions for {request.user.username}: {e}")
+        audit(request, 'permissions.error', "Error accessing user permissions for %s: %s",
+              request.user.username, e, level=logging.ERROR)
         messages.error(request, "Unable to load permissions information.")
         return redirect('bookshelf:book_list')
 
@@ -271,43 +390,24 @@ def form_example(request):
         publication_year = request.POST.get('publication_year')
         
         # Log form submission attempt
-        logger.info(f"Secure form submission by user {request.user.username}")
-        
-        # Comprehensive validation
-        errors = []
+        audit(request, 'form.submit', "Secure form submission by user %s", request.user.username)
         
-        # Title validation
-        if not title:
-            errors.append("Title is required.")
-        elif len(title) < 2 or len(title) > 200:
-            errors.append("Title must be between 2 and 200 characters.")
-        elif not re.match(r'^[a-zA-Z0-9\s\-\.\,\:\;\!\?\(\)\'\"]+$', title):
-            errors.append("Title contains invalid characters.")
-        
-        # Author validation
-        if not author:
-            errors.append("Author is required.")
-        elif len(author) < 2 or len(author) > 100:
-            errors.append("Author must be between 2 and 100 characters.")
-        elif not re.match(r'^[a-zA-Z\s\-\.\']+$', author):
-            errors.append("Author name contains invalid characters.")
-        
-        # Year validation
-        try:
-            year = int(publication_year) if publication_year else None
-            if not year:
-                errors.append("Publication year is required.")
-            elif year < 1000 or year > 2030:
-                errors.append("Publication year must be between 1000 and 2030.")
-        except (ValueError, TypeError):
-            errors.append("Publication year must be a valid number.")
+        # Comprehensive validation with the shared rules in validators.py
+        cleaned, field_errors = validate_book({
+            'title': title,
+            'author': author,
+            'publication_year': publication_year,
+        })
+        errors = [error for field_messages in field_errors.values() for error in field_messages]
         
         if errors:
             for error in errors:
                 messages.error(request, error)
         else:
             # All validation passed
+            year = cleaned['publication_year']
             messages.success(request, f"✅ Form validation successful! Book '{escape(title)}' by {escape(author)} ({year}) would be created.")
-            logger.info(f"Secure form validation passed for user {request.user.username}: {title} by {author}")
+            audit(request, 'form.valid', "Secure form validation passed for user %s: %s by %s",
+                  request.user.username, title, author)
     
     return render(request, 'bookshelf/form_example.html')
@@ -120,7 +120,7 @@ def display_setup_summary():
     print("\n📚 Documentation:")
     print("• SECURITY_IMPLEMENTATION_GUIDE.md - Complete security guide")
     print("• PERMISSIONS_SETUP_GUIDE.md - Permissions setup guide")
-    print("• test_security.py - Security testing script")
+    print("• bookshelf/test_security.py - Security regression suite")
 
 def main():
     """Main setup function"""
@@ -166,4 +166,4 @@ if __name__ == "__main__":
     if not main():
         sys.exit(1)
     
-    print("\n🎯 Run 'python test_security.py' to test the security implementation!")
+    print("\n🎯 Run 'python manage.py test bookshelf --parallel' to test the security implementation!")
@@ -0,0 +1,196 @@
+"""
+Expiring, rotating API tokens.
+
+Tokens are random strings handed to the client once; the database keeps only
+their SHA-256. Tokens are high-entropy, so a single fast hash is enough here
+(the slow, configurable hash is for passwords, see ConfigurablePBKDF2PasswordHasher).
+
+Verified tokens are kept in a small per-process LRU cache for
+API_TOKEN_CACHE_SECONDS. The cache holds only ids and the expiry, never model
+instances: a cached request loads its user by primary key instead of looking
+up the token, and gets its own User object, so is_active and permission
+changes apply at once and no two requests share a user. A revoked or deleted
+token, or a deactivated user, is dropped from the local cache at once; other
+processes stop accepting the token when their cache entry expires (and reject
+an inactive user on the next request).
+
+Keys issued by rest_framework.authtoken before the switch were moved to
+AuthToken, hashed, by migration api/0003_import_legacy_tokens; the app stays
+installed for ObtainAuthToken's login serializer.
+
+Settings:
+- API_TOKEN_TTL: token lifetime (timedelta).
+- API_TOKEN_CACHE_SECONDS: how long a verified token is trusted in memory.
+- API_TOKEN_CACHE_SIZE: maximum number of cached tokens per process.
+- API_PBKDF2_ITERATIONS: PBKDF2 cost for password hashing.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken
+
+
+def token_ttl():
+    return getattr(settings, 'API_TOKEN_TTL', timedelta(hours=24))
+
+
+def hash_token(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of key_hash -> (token id, user id, token expiry, cache expiry).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key_hash):
+        """Return (token id, user id, token expiry) for a live entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            token_id, user_id, expires_at, cached_until = entry
+            if cached_until < time.monotonic() or expires_at <= timezone.now():
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return token_id, user_id, expires_at
+
+    def set(self, token):
+        cache_seconds = getattr(settings, 'API_TOKEN_CACHE_SECONDS', 60)
+        if cache_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[token.key_hash] = (
+                token.pk, token.user_id, token.expires_at, time.monotonic() + cache_seconds,
+            )
+            self._entries.move_to_end(token.key_hash)
+            while len(self._entries) > getattr(settings, 'API_TOKEN_CACHE_SIZE', 10000):
+                self._entries.popitem(last=False)
+
+    def discard(self, key_hash):
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def discard_user(self, user_id):
+        """Drop every entry for ``user_id`` (deactivation is rare, so a scan is fine)."""
+        with self._lock:
+            for key_hash in [key for key, entry in self._entries.items() if entry[1] == user_id]:
+                del self._entries[key_hash]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def issue_token(user):
+    """
+    Create a new token for ``user`` and return (plaintext key, AuthToken).
+    The user's expired tokens are removed at the same time.
+    """
+    now = timezone.now()
+    AuthToken.objects.filter(user=user, expires_at__lte=now).delete()
+    key = secrets.token_urlsafe(32)
+    token = AuthToken.objects.create(user=user, key_hash=hash_token(key), expires_at=now + token_ttl())
+    return key, token
+
+
+def revoke_token(token):
+    token_cache.discard(token.key_hash)
+    token.delete()
+
+
+def rotate_token(token):
+    """
+    Replace ``token`` with a fresh one for the same user. Both steps run in
+    one transaction, so a failure leaves the old token valid.
+    """
+    with transaction.atomic():
+        revoke_token(token)
+        return issue_token(token.user)
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication against hashed, expiring AuthToken rows.
+
+    Clients send the same header as before: `Authorization: Token <key>`.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        key_hash = hash_token(key)
+        cached = token_cache.get(key_hash)
+        if cached is not None:
+            token_id, user_id, expires_at = cached
+            user = get_user_model()._default_manager.filter(pk=user_id, is_active=True).first()
+            if user is None:
+                token_cache.discard(key_hash)
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            return user, AuthToken(pk=token_id, user=user, key_hash=key_hash, expires_at=expires_at)
+
+        try:
+            token = AuthToken.objects.select_related('user').get(key_hash=key_hash)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if token.expires_at <= timezone.now():
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token_cache.set(token)
+        return token.user, token
+
+
+def discard_deleted_token(sender, instance, **kwargs):
+    token_cache.discard(instance.key_hash)
+
+
+def discard_deactivated_user(sender, instance, **kwargs):
+    if not instance.is_active:
+        token_cache.discard_user(instance.pk)
+
+
+def connect_signals():
+    """
+    Keep the token cache in step with token deletes and user deactivation.
+    Called from ApiConfig.ready().
+    """
+    post_delete.connect(discard_deleted_token, sender=AuthToken, dispatch_uid='api_token_cache_delete')
+    post_save.connect(
+        discard_deactivated_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='api_token_cache_user',
+    )
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with the iteration count taken from API_PBKDF2_ITERATIONS, so the
+    login cost can be tuned per deployment (and lowered for load tests).
+    Existing hashes with a different count are upgraded on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'API_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
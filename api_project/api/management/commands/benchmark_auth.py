@@ -0,0 +1,81 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure login and token-authenticated request throughput for a given '
+        'PBKDF2 cost. Everything runs inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, nargs='+', default=[1_000_000, 100_000],
+            help='PBKDF2 iteration counts to compare',
+        )
+        parser.add_argument('--logins', type=int, default=20, help='Logins per iteration count')
+        parser.add_argument('--requests', type=int, default=500, help='Authenticated requests per scenario')
+
+    def handle(self, *args, **options):
+        try:
+            # Keep sampled request profiling out of the measurements.
+            with override_settings(API_PROFILING_SAMPLE_RATE=0), transaction.atomic():
+                self.run(options['iterations'], options['logins'], options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+        token_cache.clear()
+
+    def timed(self, label, count, func):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:<40} {count:>6} reqs  {elapsed:8.3f}s  {count / elapsed:9.1f} req/s  '
+            f'{elapsed / count * 1000:8.2f} ms/req'
+        )
+
+    def run(self, iterations, logins, requests):
+        client = APIClient(SERVER_NAME='localhost')
+        credentials = {'username': 'auth-benchmark', 'password': 'benchmark-pass-123'}
+        user = User.objects.create_user(**credentials)
+
+        for count in iterations:
+            with override_settings(API_PBKDF2_ITERATIONS=count):
+                # Store the password at this cost so logins verify at this cost.
+                user.set_password(credentials['password'])
+                user.save(update_fields=['password'])
+
+                def login():
+                    for _ in range(logins):
+                        response = client.post(reverse('api_token_auth'), credentials, format='json')
+                        assert response.status_code == 200, response.content
+
+                self.timed(f'login, PBKDF2 {count:,} iterations', logins, login)
+
+        key = client.post(reverse('api_token_auth'), credentials, format='json').data['token']
+        client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        url = reverse('book-list')
+
+        def authenticated():
+            for _ in range(requests):
+                response = client.get(url)
+                assert response.status_code == 200, response.content
+
+        with override_settings(API_TOKEN_CACHE_SECONDS=0):
+            token_cache.clear()
+            self.timed('GET /api/books/, token lookup in DB', requests, authenticated)
+        token_cache.clear()
+        self.timed('GET /api/books/, token cache', requests, authenticated)
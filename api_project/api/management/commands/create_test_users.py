@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from rest_framework.authtoken.models import Token
+from api.authentication import issue_token
 
 
 class Command(BaseCommand):
@@ -37,20 +37,17 @@ class Command(BaseCommand):
                 )
                 continue
             
-            # Create user
-            password = user_data.pop('password')
+            # Create user (create_user hashes the password once)
             user = User.objects.create_user(**user_data)
-            user.set_password(password)
-            user.save()
             
-            # Create token for the user
-            token, created = Token.objects.get_or_create(user=user)
+            # Issue an expiring token for the user
+            key, token = issue_token(user)
             
             self.stdout.write(
                 self.style.SUCCESS(f'Successfully created user: {username}')
             )
             self.stdout.write(
-                self.style.SUCCESS(f'Token for {username}: {token.key}')
+                self.style.SUCCESS(f'Token for {username}: {key} (expires {token.expires_at:%Y-%m-%d %H:%M} UTC)')
             )
         
         self.stdout.write(
@@ -0,0 +1,139 @@
+import hashlib
+import random
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.authentication import hash_token
+from api.models import AuthToken, Book
+
+WORDS = (
+    'river silent garden winter shadow empire golden broken hidden last city night '
+    'storm ocean secret little house journey light fire stone glass forest king '
+    'queen memory north summer iron paper dream song island road'
+).split()
+FIRST_NAMES = 'Ada Ben Chloe David Elena Farid Grace Hiro Ines Jonas Kira Liam Maya Noor Omar Priya'.split()
+LAST_NAMES = 'Adams Brown Costa Diaz Evans Fischer Garcia Hughes Ito Jensen Khan Lopez Moreau Novak'.split()
+USERNAME_PREFIX = 'loaduser'
+FIXTURE_PASSWORD = 'loadtest-pass-123'
+
+
+def fixture_isbn(index):
+    """A valid, deterministic ISBN-13 in the 979 range for fixture book ``index``."""
+    body = f'979{index:09d}'
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def fixture_token_key(seed, index):
+    """
+    The token key of fixture user ``index``. loadtest.py derives the same keys
+    from the seed, so it needs no login round-trips or token files.
+    """
+    return hashlib.sha256(f'{seed}:{index}'.encode('utf-8')).hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate deterministic load-test data: books, users and API tokens, '
+        'inserted with bulk_create in batches. Re-running with the same seed '
+        'skips rows that already exist. The users share a known password and '
+        'their token keys follow from the seed, so it refuses to run with '
+        'DEBUG off unless --force is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100_000, help='Number of books')
+        parser.add_argument('--users', type=int, default=1_000, help='Number of users, each with one token')
+        parser.add_argument('--batch-size', type=int, default=5_000, help='Rows per INSERT')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--token-days', type=int, default=30, help='Lifetime of the generated tokens')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run even though DEBUG is off (only on a dedicated load-test database)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG is off: the fixture users have a known password and predictable '
+                'tokens. Use --force only against a dedicated load-test database.'
+            )
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        self.create_books(rng, options['books'], batch_size)
+        self.report('books', options['books'], started)
+
+        started = time.perf_counter()
+        self.create_users(options['users'], batch_size, options['seed'], options['token_days'])
+        self.report('users and tokens', options['users'], started)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Fixture users are {USERNAME_PREFIX}0000000.. with password "{FIXTURE_PASSWORD}"; '
+                f'run loadtest.py with --seed {options["seed"]} --users {options["users"]}'
+            )
+        )
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else count
+        self.stdout.write(f'{count} {label} in {elapsed:.1f}s ({rate:.0f} rows/s)')
+
+    def batches(self, total, batch_size):
+        for start in range(0, total, batch_size):
+            yield range(start, min(start + batch_size, total))
+
+    def create_books(self, rng, total, batch_size):
+        epoch = date(1900, 1, 1)
+        span = (date.today() - epoch).days
+        for indexes in self.batches(total, batch_size):
+            books = [
+                Book(
+                    title=' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title(),
+                    author=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                    published_date=epoch + timedelta(days=rng.randrange(span)),
+                    isbn=fixture_isbn(index),
+                )
+                for index in indexes
+            ]
+            Book.objects.bulk_create(books, batch_size=batch_size, ignore_conflicts=True)
+
+    def create_users(self, total, batch_size, seed, token_days):
+        # Hashing once and reusing the hash keeps millions of users cheap.
+        password = make_password(FIXTURE_PASSWORD)
+        expires_at = timezone.now() + timedelta(days=token_days)
+        for indexes in self.batches(total, batch_size):
+            usernames = {f'{USERNAME_PREFIX}{index:07d}': index for index in indexes}
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [
+                        User(username=username, email=f'{username}@example.com', password=password)
+                        for username in usernames
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+                # ignore_conflicts does not return primary keys, so read them back.
+                user_ids = User.objects.filter(username__in=list(usernames)).values_list('username', 'pk')
+                AuthToken.objects.bulk_create(
+                    [
+                        AuthToken(
+                            user_id=pk,
+                            key_hash=hash_token(fixture_token_key(seed, usernames[username])),
+                            expires_at=expires_at,
+                        )
+                        for username, pk in user_ids
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
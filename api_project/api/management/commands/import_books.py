@@ -0,0 +1,45 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import book_io
+
+
+class Command(BaseCommand):
+    help = 'Import (upsert by ISBN) books from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or "-" for stdin')
+        parser.add_argument(
+            '--format', choices=book_io.FORMATS,
+            help='File format (default: guessed from the file extension, else csv)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=book_io.DEFAULT_CHUNK_SIZE,
+            help='Rows validated and upserted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or book_io.format_from_name(path)
+        try:
+            if path == '-':
+                report = book_io.import_books(sys.stdin, fmt, options['chunk_size'])
+            else:
+                with open(path, encoding='utf-8-sig', newline='') as fh:
+                    report = book_io.import_books(fh, fmt, options['chunk_size'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            self.stderr.write(f"Record {error['record']}: {json.dumps(error['errors'])}")
+        if report['invalid'] > len(report['errors']):
+            self.stderr.write(f"... {report['invalid'] - len(report['errors'])} more invalid records")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['imported']} of {report['rows']} rows "
+                f"({report['invalid']} invalid) in {report['seconds']}s "
+                f"({report['rows_per_second']} rows/s)"
+            )
+        )
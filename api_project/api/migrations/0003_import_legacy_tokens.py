@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:02
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def import_legacy_tokens(apps, schema_editor):
+    """
+    Carry rest_framework.authtoken keys over to AuthToken, stored hashed like
+    new tokens, so clients logged in before the switch keep working. The old
+    keys never expired; they get one API_TOKEN_TTL from now, after which the
+    client logs in again. The plaintext rows are then deleted.
+    """
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('api', 'AuthToken')
+    expires_at = timezone.now() + getattr(settings, 'API_TOKEN_TTL', timedelta(hours=24))
+    tokens = [
+        AuthToken(user_id=user_id, key_hash=hashlib.sha256(key.encode('utf-8')).hexdigest(), expires_at=expires_at)
+        for key, user_id in Token.objects.values_list('key', 'user_id').iterator()
+    ]
+    AuthToken.objects.bulk_create(tokens, batch_size=1000, ignore_conflicts=True)
+    Token.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_auth_token'),
+        ('authtoken', '0002_auto_20160226_1747'),
+    ]
+
+    operations = [
+        # The keys are only kept hashed, so there is nothing to restore on reverse.
+        migrations.RunPython(import_legacy_tokens, migrations.RunPython.noop),
+    ]
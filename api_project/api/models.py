@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 class Book(models.Model):
@@ -7,4 +8,23 @@ class Book(models.Model):
     isbn = models.CharField(max_length=13, unique=True)
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class AuthToken(models.Model):
+    """
+    An expiring API token. Only the SHA-256 of the token is stored, so a
+    leaked database does not leak usable credentials; the unique index on
+    key_hash makes each lookup a single indexed read.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='auth_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f'Token for {self.user} (expires {self.expires_at:%Y-%m-%d %H:%M})'
@@ -0,0 +1,130 @@
+"""
+Sampled, low-overhead request profiling.
+
+A configurable fraction of requests is profiled: SQL query count and time,
+time spent in serializers and total time. The numbers are sent back in a
+`Server-Timing` header (visible in the browser's network panel) and logged as
+one structured line on the "api.profiling" logger. Requests that are not
+sampled only pay for one random() call, and with a sample rate of 0 the
+middleware removes itself from the stack entirely.
+
+Settings:
+- API_PROFILING_SAMPLE_RATE: fraction of requests to profile (0 disables).
+- API_PROFILING_SERVER_TIMING: whether to add the Server-Timing header
+  (defaults to DEBUG; it exposes database timings to every client).
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current_profile = ContextVar('api_request_profile', default=None)
+
+
+class RequestProfile:
+    """Counters collected while one sampled request is handled."""
+
+    __slots__ = ('sql_count', 'sql_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a database execute wrapper.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+
+
+def _timed_serializer_call(method, *args):
+    """Run a serializer method, adding its duration to the current profile."""
+    profile = _current_profile.get()
+    # Nested and per-item calls are already inside the outermost timer.
+    if profile is None or profile.serializer_depth:
+        return method(*args)
+    profile.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        return method(*args)
+    finally:
+        profile.serializer_time += time.perf_counter() - start
+        profile.serializer_depth -= 1
+
+
+class ProfiledSerializerMixin:
+    """
+    Serializer mixin that reports serialization and validation time to the
+    request profile. It does nothing unless the current request is sampled.
+    """
+
+    def to_representation(self, instance):
+        return _timed_serializer_call(super().to_representation, instance)
+
+    def to_internal_value(self, data):
+        return _timed_serializer_call(super().to_internal_value, data)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile a sample of requests and report the results in a Server-Timing
+    header and a log line. Place it first in MIDDLEWARE so the total covers
+    the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'API_PROFILING_SAMPLE_RATE', 0))
+        self.server_timing = getattr(settings, 'API_PROFILING_SERVER_TIMING', settings.DEBUG)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        total = time.perf_counter() - start
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={profile.sql_time * 1000:.1f};desc="{profile.sql_count} queries", '
+                f'serializer;dur={profile.serializer_time * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}'
+            )
+        logger.info(
+            'method=%s path=%s status=%s total_ms=%.1f sql_count=%d sql_ms=%.1f serializer_ms=%.1f',
+            request.method, request.path, response.status_code, total * 1000,
+            profile.sql_count, profile.sql_time * 1000, profile.serializer_time * 1000,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status_code': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'sql_count': profile.sql_count,
+                'sql_ms': round(profile.sql_time * 1000, 1),
+                'serializer_ms': round(profile.serializer_time * 1000, 1),
+            },
+        )
+        return response
@@ -1,36 +1,167 @@
 from rest_framework import serializers
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, transaction
 from .models import Book
+from .profiling import ProfiledSerializerMixin
 from datetime import date
 
+DUPLICATE_ISBN_MESSAGE = "A book with this ISBN already exists."
 
-class BookSerializer(serializers.ModelSerializer):
+
+def validate_isbn13(value):
+    """
+    Check the length, digits and check digit of an ISBN-13 without touching
+    the database. Returns the value or raises a ValidationError.
+    """
+    if len(value) != 13:
+        raise serializers.ValidationError("ISBN must be exactly 13 characters long.")
+    if not value.isascii() or not value.isdigit():
+        raise serializers.ValidationError("ISBN must contain only digits.")
+    # Digits are weighted 1, 3, 1, 3, ...; a valid ISBN-13 sums to a multiple of 10.
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(value))
+    if total % 10:
+        raise serializers.ValidationError("ISBN check digit is invalid.")
+    return value
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets.
+    Keeps only the fields named in the "fields" context entry (?fields=id,title),
+    which the view fills for read requests; without it the serializer is
+    unchanged. Naming a field the serializer does not have is a validation
+    error, so a typo gets a 400 instead of a list of empty objects.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self._context.get('fields')
+        if requested:
+            unknown = sorted(set(requested) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}."]})
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+    def trim_queryset(self, queryset):
+        """
+        Restrict the queryset to the columns behind the remaining fields with
+        .only(). The queryset is left as is if any field is computed, because
+        the columns it reads cannot be known.
+        """
+        opts = queryset.model._meta
+        only = [opts.pk.name]
+        for field in self.fields.values():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return queryset
+            if not model_field.concrete:
+                return queryset
+            only.append(field.source)
+        return queryset.only(*only)
+
+
+class BookListSerializer(ProfiledSerializerMixin, serializers.ListSerializer):
+    """
+    List serializer used for `many=True` writes.
+    Checks ISBN uniqueness for the whole batch with one IN query instead of
+    one query per item, and maps unique-constraint races back to the items.
+    Duplicates are reported from run_child_validation, so DRF collects them
+    with the field errors in its usual per-item error structure.
+    """
+
+    def to_internal_value(self, data):
+        isbns = []
+        if isinstance(data, list):
+            isbns = [
+                item['isbn'].strip() for item in data
+                if isinstance(item, dict) and isinstance(item.get('isbn'), str)
+            ]
+        self._taken_isbns = set(Book.objects.filter(isbn__in=isbns).values_list('isbn', flat=True))
+        self._seen_isbns = set()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        validated = super().run_child_validation(data)
+        isbn = validated['isbn']
+        if isbn in self._taken_isbns:
+            raise serializers.ValidationError({'isbn': [DUPLICATE_ISBN_MESSAGE]})
+        if isbn in self._seen_isbns:
+            raise serializers.ValidationError({'isbn': ["This ISBN appears more than once in the request."]})
+        self._seen_isbns.add(isbn)
+        return validated
+
+    def create(self, validated_data):
+        books = [Book(**attrs) for attrs in validated_data]
+        try:
+            with transaction.atomic():
+                return Book.objects.bulk_create(books)
+        except IntegrityError:
+            # Another request inserted one of these ISBNs after validation;
+            # validating again reports them in the usual per-item structure.
+            if getattr(self, 'initial_data', None) is not None:
+                self.to_internal_value(self.initial_data)
+            raise
+
+
+class BookSerializer(DynamicFieldsMixin, ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Book model.
     Converts Book model instances to JSON format and vice versa.
     Includes validation for CRUD operations.
+    Supports sparse fieldsets (?fields=) through DynamicFieldsMixin.
     """
     
     class Meta:
         model = Book
         fields = '__all__'  # Include all fields from the Book model
+        list_serializer_class = BookListSerializer
+        # Uniqueness is checked in validate_isbn (or per batch), not by a
+        # second UniqueValidator query.
+        extra_kwargs = {'isbn': {'validators': []}}
         
     def validate_isbn(self, value):
         """
         Custom validation for ISBN field.
-        Ensures ISBN is exactly 13 characters and unique.
+        Ensures ISBN is a valid ISBN-13 and unique.
         """
-        if len(value) != 13:
-            raise serializers.ValidationError("ISBN must be exactly 13 characters long.")
+        validate_isbn13(value)
+        
+        # A list serializer checks the whole batch with a single query
+        if isinstance(self.parent, serializers.ListSerializer):
+            return value
         
         # Check for uniqueness during updates
         if self.instance and self.instance.isbn != value:
             if Book.objects.filter(isbn=value).exists():
-                raise serializers.ValidationError("A book with this ISBN already exists.")
+                raise serializers.ValidationError(DUPLICATE_ISBN_MESSAGE)
         elif not self.instance and Book.objects.filter(isbn=value).exists():
-            raise serializers.ValidationError("A book with this ISBN already exists.")
+            raise serializers.ValidationError(DUPLICATE_ISBN_MESSAGE)
         
         return value
     
+    def create(self, validated_data):
+        """
+        Create the book, reporting a concurrent insert of the same ISBN as a
+        validation error instead of a server error.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'isbn': [DUPLICATE_ISBN_MESSAGE]})
+    
+    def update(self, instance, validated_data):
+        """
+        Update the book, mapping a unique-constraint race on ISBN the same way.
+        """
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'isbn': [DUPLICATE_ISBN_MESSAGE]})
+    
     def validate_published_date(self, value):
         """
         Custom validation for published_date field.
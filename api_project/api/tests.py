@@ -1,3 +1,456 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import exceptions, serializers, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from . import book_io
+from .authentication import (
+    ExpiringTokenAuthentication, hash_token, issue_token, revoke_token, rotate_token, token_cache,
+)
+from .management.commands.generate_fixtures import USERNAME_PREFIX, fixture_isbn, fixture_token_key
+from .models import AuthToken, Book
+from .serializers import DUPLICATE_ISBN_MESSAGE, BookSerializer, validate_isbn13
+
+import_legacy_tokens = importlib.import_module('api.migrations.0003_import_legacy_tokens').import_legacy_tokens
+
+
+@override_settings(API_PROFILING_SAMPLE_RATE=0, API_TOKEN_CACHE_SECONDS=60)
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+        self.key, self.token = issue_token(self.user)
+        self.auth = ExpiringTokenAuthentication()
+
+    def test_cached_token_gets_a_fresh_user_per_request(self):
+        first_user, _ = self.auth.authenticate_credentials(self.key)
+        with CaptureQueriesContext(connection) as queries:
+            second_user, second_token = self.auth.authenticate_credentials(self.key)
+        self.assertIsNot(first_user, second_user)
+        self.assertEqual(second_user.pk, self.user.pk)
+        self.assertEqual(second_token.pk, self.token.pk)
+        # The cache replaces the token lookup with a primary-key read of the user
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('api_authtoken', queries[0]['sql'])
+
+    def test_changes_to_a_cached_user_are_not_shared(self):
+        first_user, _ = self.auth.authenticate_credentials(self.key)
+        first_user.is_staff = True
+        second_user, _ = self.auth.authenticate_credentials(self.key)
+        self.assertFalse(second_user.is_staff)
+
+    def test_deactivating_the_user_drops_the_cache_entry(self):
+        self.auth.authenticate_credentials(self.key)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_cache.get(hash_token(self.key)))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_user_deactivated_elsewhere_is_rejected_from_the_cache(self):
+        self.auth.authenticate_credentials(self.key)
+        # A bulk update (or another process) sends no post_save
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+        self.assertIsNone(token_cache.get(hash_token(self.key)))
+
+    def test_revoking_a_cached_token_rejects_it(self):
+        _, token = self.auth.authenticate_credentials(self.key)
+        revoke_token(token)
+        self.assertIsNone(token_cache.get(hash_token(self.key)))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_deleting_a_token_drops_the_cache_entry(self):
+        self.auth.authenticate_credentials(self.key)
+        self.token.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+
+class BookListSerializerTests(TestCase):
+    def setUp(self):
+        Book.objects.create(title='Existing', author='Author', isbn='9780306406157')
+
+    def errors_for(self, items):
+        serializer = BookSerializer(data=items, many=True)
+        self.assertFalse(serializer.is_valid())
+        return serializer.errors
+
+    def test_duplicate_isbn_errors_match_field_error_structure(self):
+        field_errors = self.errors_for([
+            {'title': 'New', 'author': 'Author', 'isbn': '9781861972712'},
+            {'title': 'Bad', 'author': 'Author', 'isbn': '9781861972713'},
+        ])
+        duplicate_errors = self.errors_for([
+            {'title': 'New', 'author': 'Author', 'isbn': '9781861972712'},
+            {'title': 'Taken', 'author': 'Author', 'isbn': '9780306406157'},
+        ])
+        self.assertIs(type(duplicate_errors), type(field_errors))
+        self.assertEqual(len(duplicate_errors), len(field_errors))
+        self.assertEqual(field_errors[1]['isbn'], ['ISBN check digit is invalid.'])
+        self.assertEqual(duplicate_errors[1]['isbn'], [DUPLICATE_ISBN_MESSAGE])
+
+    def test_field_and_duplicate_errors_are_reported_together(self):
+        errors = self.errors_for([
+            {'title': 'Taken', 'author': 'Author', 'isbn': '9780306406157'},
+            {'title': '', 'author': 'Author', 'isbn': '9781861972712'},
+            {'title': 'First', 'author': 'Author', 'isbn': '9780262033848'},
+            {'title': 'Repeat', 'author': 'Author', 'isbn': '9780262033848'},
+        ])
+        self.assertEqual(errors[0]['isbn'], [DUPLICATE_ISBN_MESSAGE])
+        self.assertEqual(errors[1]['title'], ['This field may not be blank.'])
+        self.assertEqual(errors[3]['isbn'], ['This ISBN appears more than once in the request.'])
+
+    def test_valid_batch_checks_uniqueness_in_one_query(self):
+        items = [
+            {'title': f'Book {i}', 'author': 'Author', 'isbn': isbn}
+            for i, isbn in enumerate(['9781861972712', '9780262033848', '9780131103627'])
+        ]
+        serializer = BookSerializer(data=items, many=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(len(queries), 1)
+
+    def test_isbn_taken_after_validation_is_reported_per_item(self):
+        serializer = BookSerializer(data=[
+            {'title': 'New', 'author': 'Author', 'isbn': '9781861972712'},
+            {'title': 'Raced', 'author': 'Author', 'isbn': '9780262033848'},
+        ], many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        Book.objects.create(title='Concurrent', author='Author', isbn='9780262033848')
+        with self.assertRaises(serializers.ValidationError) as raised:
+            serializer.save()
+        self.assertEqual(raised.exception.detail[1]['isbn'], [DUPLICATE_ISBN_MESSAGE])
+        self.assertFalse(Book.objects.filter(isbn='9781861972712').exists())
+
+
+@override_settings(API_PROFILING_SAMPLE_RATE=0)
+class GenerateFixturesTests(TestCase):
+    def generate(self, **options):
+        # Tests run with DEBUG off.
+        call_command(
+            'generate_fixtures', books=25, users=3, batch_size=10, seed=7, force=True, stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_fixture_isbns_are_valid_and_distinct(self):
+        isbns = [fixture_isbn(index) for index in range(50)]
+        for isbn in isbns:
+            self.assertEqual(validate_isbn13(isbn), isbn)
+        self.assertEqual(len(set(isbns)), 50)
+
+    def test_generates_books_users_and_working_tokens(self):
+        self.generate()
+        self.assertEqual(Book.objects.count(), 25)
+        self.assertEqual(User.objects.filter(username__startswith=USERNAME_PREFIX).count(), 3)
+        self.assertEqual(AuthToken.objects.count(), 3)
+        user, _ = ExpiringTokenAuthentication().authenticate_credentials(fixture_token_key(7, 2))
+        self.assertEqual(user.username, f'{USERNAME_PREFIX}0000002')
+
+    def test_refuses_to_run_without_debug_unless_forced(self):
+        with self.assertRaisesMessage(CommandError, 'DEBUG is off'):
+            call_command('generate_fixtures', books=1, users=1, stdout=io.StringIO())
+        self.assertFalse(Book.objects.exists())
+        self.assertFalse(AuthToken.objects.exists())
+        with override_settings(DEBUG=True):
+            call_command('generate_fixtures', books=1, users=1, stdout=io.StringIO())
+        self.assertEqual(AuthToken.objects.count(), 1)
+
+    def test_same_seed_gives_the_same_data_and_reruns_skip_existing_rows(self):
+        self.generate()
+        first = list(Book.objects.order_by('isbn').values_list('isbn', 'title', 'author', 'published_date'))
+        self.generate()
+        self.assertEqual(Book.objects.count(), 25)
+        self.assertEqual(AuthToken.objects.count(), 3)
+        Book.objects.all().delete()
+        self.generate()
+        self.assertEqual(
+            list(Book.objects.order_by('isbn').values_list('isbn', 'title', 'author', 'published_date')), first,
+        )
+
+
+@override_settings(API_PROFILING_SAMPLE_RATE=0)
+class BookImportExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Book.objects.create(title='Old Title', author='Old Author', isbn='9780306406157')
+
+    def post_file(self, file_format, body, content_type):
+        return self.client.generic(
+            'POST', reverse('book-import', args=[file_format]), body.encode('utf-8'), content_type=content_type,
+        )
+
+    def test_csv_import_upserts_by_isbn_and_reports_invalid_rows(self):
+        body = (
+            'isbn,title,author,published_date\n'
+            '9780306406157,New Title,New Author,2001-02-03\n'
+            '9781861972712,Fresh Book,Someone,\n'
+            '9781861972713,Bad Check Digit,Someone,\n'
+        )
+        response = self.post_file('csv', body, 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data['rows'], response.data['imported'], response.data['invalid']), (3, 2, 1)
+        )
+        self.assertEqual(response.data['errors'][0]['record'], 3)
+        self.assertIn('isbn', response.data['errors'][0]['errors'])
+        updated = Book.objects.get(isbn='9780306406157')
+        self.assertEqual((updated.title, updated.published_date), ('New Title', date(2001, 2, 3)))
+        self.assertIsNone(Book.objects.get(isbn='9781861972712').published_date)
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_ndjson_import_reports_malformed_lines(self):
+        body = (
+            '{"isbn": "9781861972712", "title": "Fresh Book", "author": "Someone"}\n'
+            '{not json\n'
+            '\n'
+            '["not", "an", "object"]\n'
+        )
+        response = self.post_file('ndjson', body, 'application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['imported'], response.data['invalid']), (1, 2))
+        self.assertEqual([error['record'] for error in response.data['errors']], [2, 3])
+
+    def test_import_commits_each_chunk_and_keeps_the_last_repeated_isbn(self):
+        lines = [
+            'isbn,title,author,published_date',
+            '9781861972712,First,Someone,',
+            '9780262033848,Second,Someone,',
+            '9781861972712,Repeated,Someone,',
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            report = book_io.import_books(lines, 'csv', chunk_size=2)
+        self.assertEqual((report['rows'], report['imported'], report['invalid']), (3, 3, 0))
+        self.assertEqual(Book.objects.get(isbn='9781861972712').title, 'Repeated')
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+
+    def test_multipart_upload(self):
+        upload = io.BytesIO(b'isbn,title,author\n9781861972712,Uploaded,Someone\n')
+        upload.name = 'books.csv'
+        response = self.client.post(reverse('book-import', args=['csv']), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 1)
+
+    def test_csv_export_streams_every_book(self):
+        Book.objects.create(title='Dated', author='Someone', isbn='9781861972712', published_date=date(1999, 1, 2))
+        response = self.client.get(reverse('book-export', args=['csv']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual([row['isbn'] for row in rows], ['9780306406157', '9781861972712'])
+        self.assertEqual(rows[1]['published_date'], '1999-01-02')
+
+    def test_export_then_import_round_trips(self):
+        response = self.client.get(reverse('book-export', args=['ndjson']))
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(
+            json.loads(body),
+            {'isbn': '9780306406157', 'title': 'Old Title', 'author': 'Old Author', 'published_date': None},
+        )
+        Book.objects.all().delete()
+        response = self.post_file('ndjson', body, 'application/x-ndjson')
+        self.assertEqual(response.data['imported'], 1)
+        self.assertTrue(Book.objects.filter(isbn='9780306406157', title='Old Title').exists())
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(
+            self.client.get(reverse('book-export', args=['xml'])).status_code, status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(self.post_file('xml', '', 'text/plain').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('book-export', args=['csv']))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(API_PROFILING_SAMPLE_RATE=0)
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(title='Sparse', author='Someone', isbn='9780306406157')
+
+    def test_list_returns_and_selects_only_the_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('book-list'), {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.book.pk, 'title': 'Sparse'}])
+        select = next(query['sql'] for query in queries if '"api_book"."title"' in query['sql'])
+        self.assertNotIn('"api_book"."author"', select)
+        self.assertNotIn('"api_book"."isbn"', select)
+
+    def test_retrieve_honours_fields(self):
+        response = self.client.get(reverse('book_all-detail', args=[self.book.pk]), {'fields': 'isbn'})
+        self.assertEqual(response.data, {'isbn': '9780306406157'})
+
+    def test_without_fields_every_field_is_returned(self):
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'title', 'author', 'published_date', 'isbn'},
+        )
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('book-list'), {'fields': 'id,bogus,nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'fields': ['Unknown field(s): bogus, nope.']})
+        response = self.client.get(reverse('book_all-detail', args=[self.book.pk]), {'fields': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.patch(
+            reverse('book_all-detail', args=[self.book.pk]) + '?fields=id', {'title': 'Renamed'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertIn('isbn', response.data)
+
+
+# Logins hash at a low PBKDF2 cost to keep the tests fast
+@override_settings(API_PROFILING_SAMPLE_RATE=0, API_TOKEN_TTL=timedelta(hours=1), API_PBKDF2_ITERATIONS=1000)
+class TokenLifecycleTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.credentials = {'username': 'reader', 'password': 'testpass123'}
+        self.user = User.objects.create_user(**self.credentials)
+
+    def login(self):
+        response = self.client.post(reverse('api_token_auth'), self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['token']
+
+    def get_books(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return self.client.get(reverse('book-list'))
+
+    def test_login_issues_an_expiring_token_stored_only_as_a_hash(self):
+        key = self.login()
+        token = AuthToken.objects.get(user=self.user)
+        self.assertEqual(token.key_hash, hash_token(key))
+        self.assertNotEqual(token.key_hash, key)
+        self.assertAlmostEqual(token.expires_at, timezone.now() + timedelta(hours=1), delta=timedelta(minutes=1))
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_200_OK)
+
+    def test_rotation_replaces_the_token(self):
+        old_key = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {old_key}')
+        response = self.client.post(reverse('api_token_refresh'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_key = response.data['token']
+        self.assertNotEqual(new_key, old_key)
+        self.assertEqual(self.get_books(old_key).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_books(new_key).status_code, status.HTTP_200_OK)
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+
+    def test_failed_rotation_keeps_the_old_token(self):
+        key, token = issue_token(self.user)
+        token_id = token.pk
+        with mock.patch('api.authentication.secrets.token_urlsafe', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                rotate_token(token)
+        self.assertTrue(AuthToken.objects.filter(pk=token_id).exists())
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_200_OK)
+
+    def test_legacy_authtoken_keys_are_migrated(self):
+        legacy = Token.objects.create(user=self.user)
+        import_legacy_tokens(apps, None)
+        self.assertFalse(Token.objects.exists())
+        token = AuthToken.objects.get(user=self.user)
+        self.assertEqual(token.key_hash, hash_token(legacy.key))
+        self.assertAlmostEqual(token.expires_at, timezone.now() + timedelta(hours=1), delta=timedelta(minutes=1))
+        self.assertEqual(self.get_books(legacy.key).status_code, status.HTTP_200_OK)
+
+    def test_delete_revokes_the_token(self):
+        key = self.login()
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_200_OK)
+        response = self.client.delete(reverse('api_token_refresh'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token_is_rejected(self):
+        key = self.login()
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_200_OK)
+        AuthToken.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(seconds=1))
+        # The cached entry still carries the old expiry, so expire it as well
+        token_cache.clear()
+        response = self.get_books(key)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'], 'Token has expired.')
+
+    def test_cache_entry_does_not_outlive_the_token(self):
+        key, token = issue_token(self.user)
+        self.assertEqual(self.get_books(key).status_code, status.HTTP_200_OK)
+        with mock.patch('api.authentication.timezone.now', return_value=token.expires_at + timedelta(seconds=1)):
+            self.assertIsNone(token_cache.get(token.key_hash))
+
+    def test_new_login_removes_expired_tokens(self):
+        _, expired = issue_token(self.user)
+        AuthToken.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.login()
+        self.assertFalse(AuthToken.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+        self.client.force_authenticate(self.user)
+        Book.objects.create(title='Timed', author='Someone', isbn='9780306406157')
+
+    @override_settings(API_PROFILING_SAMPLE_RATE=1, API_PROFILING_SERVER_TIMING=True)
+    def test_sampled_request_gets_header_and_log_line(self):
+        with self.assertLogs('api.profiling', 'INFO') as logs:
+            response = self.client.get(reverse('book-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertNotIn('desc="0 queries"', header)
+        record = logs.records[0]
+        self.assertEqual((record.method, record.path, record.status_code), ('GET', '/api/books/', 200))
+        self.assertIn(f'sql_count={record.sql_count}', record.getMessage())
+
+    @override_settings(API_PROFILING_SAMPLE_RATE=1, API_PROFILING_SERVER_TIMING=False)
+    def test_header_can_be_turned_off(self):
+        with self.assertLogs('api.profiling', 'INFO'):
+            response = self.client.get(reverse('book-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(API_PROFILING_SAMPLE_RATE=1)
+    def test_header_defaults_to_debug(self):
+        with self.settings():
+            del settings.API_PROFILING_SERVER_TIMING
+            for debug in (False, True):
+                # A new client, so the middleware is built with this setting.
+                client = self.client_class()
+                client.force_authenticate(self.user)
+                with self.subTest(debug=debug), self.settings(DEBUG=debug), self.assertLogs('api.profiling', 'INFO'):
+                    response = client.get(reverse('book-list'))
+                    self.assertEqual('Server-Timing' in response, debug)
+
+    @override_settings(API_PROFILING_SAMPLE_RATE=0)
+    def test_rate_zero_disables_profiling(self):
+        with self.assertNoLogs('api.profiling', 'INFO'):
+            response = self.client.get(reverse('book-list'))
+        self.assertNotIn('Server-Timing', response)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookList, BookViewSet, CustomObtainAuthToken
+from .views import BookList, BookViewSet, CustomObtainAuthToken, TokenRotateView, BookImportView, BookExportView
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -9,10 +9,15 @@ router.register(r'books_all', BookViewSet, basename='book_all')
 urlpatterns = [
     # Authentication endpoints
     path('auth/token/', CustomObtainAuthToken.as_view(), name='api_token_auth'),
+    path('auth/token/refresh/', TokenRotateView.as_view(), name='api_token_refresh'),
     
     # Route for the BookList view (ListAPIView)
     path('books/', BookList.as_view(), name='book-list'),
     
+    # Streaming CSV/NDJSON bulk import and export
+    path('books/import/<str:file_format>/', BookImportView.as_view(), name='book-import'),
+    path('books/export/<str:file_format>/', BookExportView.as_view(), name='book-export'),
+    
     # Include the router URLs for BookViewSet (all CRUD operations)
     path('', include(router.urls)),  # This includes all routes registered with the router
 ]
@@ -1,21 +1,62 @@
+import codecs
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import generics, viewsets, permissions
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
-from .models import Book
+from .models import AuthToken, Book
+from .authentication import issue_token, revoke_token, rotate_token
 from .serializers import BookSerializer
+from . import book_io
+
+
+def requested_fields(request, param='fields'):
+    """
+    Parse a comma-separated query parameter such as ?fields=id,title into a
+    list, or None when it is absent.
+    """
+    raw = request.query_params.get(param)
+    if not raw:
+        return None
+    return [name.strip() for name in raw.split(',') if name.strip()]
 
 
-class BookList(generics.ListAPIView):
+class DynamicFieldsViewMixin:
+    """
+    View mixin for ?fields= on read requests.
+    
+    Passes the field list to the serializer (see DynamicFieldsMixin) and
+    trims the queryset to the columns the remaining fields read, so
+    ?fields=id,title selects two columns instead of the whole row.
+    Writes always use the full serializer.
+    """
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in permissions.SAFE_METHODS:
+            context['fields'] = requested_fields(self.request)
+        return context
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        context = self.get_serializer_context()
+        if context.get('fields') is None:
+            return queryset
+        return self.get_serializer_class()(context=context).trim_queryset(queryset)
+
+
+class BookList(DynamicFieldsViewMixin, generics.ListAPIView):
     """
     API view to retrieve a list of all books.
     
     This view handles GET requests to return all books in JSON format.
     Uses the BookSerializer to convert Book model instances to JSON.
+    ?fields=id,title returns (and reads) only the listed fields.
     
     Permissions: Requires authentication to view books.
     """
@@ -24,7 +65,7 @@ class BookList(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing book instances.
     
@@ -33,12 +74,14 @@ class BookViewSet(viewsets.ModelViewSet):
     
     Actions:
     - GET /api/books_all/ - List all books (requires authentication)
-    - POST /api/books_all/ - Create a new book (requires authentication)
+    - POST /api/books_all/ - Create a new book, or a list of books (requires authentication)
     - GET /api/books_all/{id}/ - Retrieve a specific book (requires authentication)
     - PUT /api/books_all/{id}/ - Update a specific book (requires authentication)
     - PATCH /api/books_all/{id}/ - Partially update a specific book (requires authentication)
     - DELETE /api/books_all/{id}/ - Delete a specific book (requires authentication)
     
+    List and retrieve accept ?fields=id,title to return only those fields.
+    
     Permissions:
     - List and Retrieve: Any authenticated user
     - Create, Update, Delete: Authenticated users only
@@ -61,10 +104,12 @@ class BookViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """
-        Create a new book instance.
+        Create a new book instance, or several when the body is a list.
+        A list is validated as one batch (a single ISBN uniqueness query)
+        and inserted with one bulk insert.
         Only authenticated users can create books.
         """
-        serializer = self.get_serializer(data=request.data)
+        serializer = self.get_serializer(data=request.data, many=isinstance(request.data, list))
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
@@ -102,7 +147,10 @@ class CustomObtainAuthToken(ObtainAuthToken):
     
     POST /api/auth/token/
     Body: {"username": "your_username", "password": "your_password"}
-    Returns: {"token": "your_token", "user_id": 1, "username": "your_username"}
+    Returns: {"token": "your_token", "expires_at": "...", "user_id": 1, "username": "your_username"}
+    
+    Every login issues a new expiring token (see api/authentication.py);
+    the token is only ever shown in this response.
     """
     
     def post(self, request, *args, **kwargs):
@@ -110,13 +158,105 @@ class CustomObtainAuthToken(ObtainAuthToken):
                                            context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
+        key, token = issue_token(user)
         return Response({
-            'token': token.key,
+            'token': key,
+            'expires_at': token.expires_at,
             'user_id': user.pk,
             'username': user.username,
             'email': user.email
         })
 
 
+class TokenRotateView(APIView):
+    """
+    Rotate or revoke the token used to authenticate this request.
+    
+    POST /api/auth/token/refresh/ - Replace the current token with a new one
+    DELETE /api/auth/token/refresh/ - Revoke the current token (log out)
+    
+    Permissions: Requires token authentication.
+    """
+    
+    def post(self, request):
+        if not isinstance(request.auth, AuthToken):
+            return Response({'detail': 'Token authentication required.'}, status=status.HTTP_400_BAD_REQUEST)
+        key, token = rotate_token(request.auth)
+        return Response({'token': key, 'expires_at': token.expires_at})
+    
+    def delete(self, request):
+        if not isinstance(request.auth, AuthToken):
+            return Response({'detail': 'Token authentication required.'}, status=status.HTTP_400_BAD_REQUEST)
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BookImportView(APIView):
+    """
+    Bulk import (upsert by ISBN) of books from a CSV or NDJSON file.
+
+    POST /api/books/import/csv/
+    POST /api/books/import/ndjson/
+    Body: the raw file (Content-Type: text/csv or application/x-ndjson), or a
+    multipart form with the file in a "file" field.
+    Returns: {"rows": 3, "imported": 2, "invalid": 1, "errors": [...], ...}
+
+    The body is read line by line and written in chunks, so large files are
+    never held in memory. Rows that fail validation are reported by record
+    number and skipped; every valid row is imported.
+
+    Permissions: Requires authentication.
+    """
+
+    def post(self, request, file_format):
+        if file_format not in book_io.FORMATS:
+            return Response(
+                {'detail': f'Unsupported format "{file_format}". Use csv or ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'file': ['No file was submitted.']}, status=status.HTTP_400_BAD_REQUEST)
+            lines = codecs.iterdecode(upload, 'utf-8-sig')
+        else:
+            # Read the raw body as a stream instead of parsing request.data.
+            stream = request.stream
+            raw_lines = iter(stream.readline, b'') if stream is not None else iter(())
+            lines = codecs.iterdecode(raw_lines, 'utf-8-sig')
+        try:
+            report = book_io.import_books(lines, file_format)
+        except UnicodeDecodeError:
+            return Response({'detail': 'The file must be UTF-8 encoded.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+
+class BookExportView(APIView):
+    """
+    Streaming export of the whole book catalog.
+
+    GET /api/books/export/csv/
+    GET /api/books/export/ndjson/
+
+    Rows are read with a server-side iterator and streamed as they are
+    encoded, so the response starts immediately and memory use stays flat
+    regardless of the table size.
+
+    Permissions: Requires authentication.
+    """
+
+    def get(self, request, file_format):
+        if file_format not in book_io.FORMATS:
+            return Response(
+                {'detail': f'Unsupported format "{file_format}". Use csv or ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(
+            book_io.export_lines(file_format),
+            content_type=book_io.CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="books.{file_format}"'
+        return response
+
+
 # Create your views here.
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,14 +38,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'debug_toolbar',
     'api',
     'rest_framework',
-    'rest_framework.authtoken',  # Add token authentication
+    'rest_framework.authtoken',  # Login view; its old keys live on in api.AuthToken
 ]
 
 MIDDLEWARE = [
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'api.profiling.RequestProfilingMiddleware',  # Sampled Server-Timing profiling
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -104,6 +104,24 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# ConfigurablePBKDF2PasswordHasher reads its cost from API_PBKDF2_ITERATIONS.
+# To use Argon2 instead, install argon2-cffi and move Argon2PasswordHasher first.
+PASSWORD_HASHERS = [
+    'api.authentication.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+API_PBKDF2_ITERATIONS = 1_000_000
+
+# API tokens (api/authentication.py)
+API_TOKEN_TTL = timedelta(hours=24)
+API_TOKEN_CACHE_SECONDS = 60  # How long a verified token is trusted in memory
+API_TOKEN_CACHE_SIZE = 10000
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -129,7 +147,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.ExpiringTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -138,3 +156,31 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
+
+# Request profiling (api/profiling.py)
+# Fraction of requests that get SQL/serializer/total timings in a
+# Server-Timing header and an "api.profiling" log line. 0 disables it.
+# django-debug-toolbar is no longer installed by default; for local debugging
+# install requirements-dev.txt and add 'debug_toolbar' to INSTALLED_APPS and
+# its middleware, and api_project/urls.py will mount it while DEBUG is on.
+API_PROFILING_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+# The header shows every client how long its queries took, so production
+# only logs the timings.
+API_PROFILING_SERVER_TIMING = DEBUG
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -14,12 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.apps import apps
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-import debug_toolbar
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),  # Include API app URLs
-    path('__debug__/', include(debug_toolbar.urls)),
 ]
+
+# The debug toolbar is opt-in for local development only; production
+# profiling goes through api.profiling.RequestProfilingMiddleware.
+if settings.DEBUG and apps.is_installed('debug_toolbar'):
+    urlpatterns.append(path('__debug__/', include('debug_toolbar.urls')))
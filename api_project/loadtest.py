@@ -0,0 +1,140 @@
+"""
+Asyncio load test for the Book API.
+
+Drives BookViewSet list, retrieve and create against a running server with
+many concurrent clients, then prints throughput and latency percentiles per
+operation. Authentication uses the tokens created by
+`python manage.py generate_fixtures`, derived from the same seed, so no
+logins are needed.
+
+Usage:
+    python manage.py generate_fixtures --books 100000 --users 1000 --seed 42
+    python manage.py runserver  # or gunicorn/uvicorn for realistic numbers
+    python loadtest.py --seed 42 --users 1000 --concurrency 50 --duration 30
+
+Requires httpx (pip install -r requirements-dev.txt).
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+
+def fixture_token_key(seed, index):
+    # Must match api/management/commands/generate_fixtures.py.
+    return hashlib.sha256(f'{seed}:{index}'.encode('utf-8')).hexdigest()
+
+
+def random_isbn(rng):
+    body = '979' + ''.join(rng.choice('0123456789') for _ in range(9))
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, operation, seconds, ok):
+        self.latencies[operation].append(seconds)
+        if not ok:
+            self.errors[operation] += 1
+
+    def report(self, elapsed):
+        print(f'{"operation":<10} {"requests":>9} {"errors":>7} {"req/s":>9} '
+              f'{"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+        total = 0
+        for operation in sorted(self.latencies):
+            values = sorted(self.latencies[operation])
+            total += len(values)
+            print(
+                f'{operation:<10} {len(values):>9} {self.errors[operation]:>7} {len(values) / elapsed:>9.1f} '
+                f'{percentile(values, 0.50) * 1000:>8.1f} {percentile(values, 0.90) * 1000:>8.1f} '
+                f'{percentile(values, 0.99) * 1000:>8.1f} {values[-1] * 1000:>8.1f}'
+            )
+        print(f'{"total":<10} {total:>9} {sum(self.errors.values()):>7} {total / elapsed:>9.1f}')
+
+
+async def fetch_book_ids(client, headers, pages):
+    """Collect book ids from the first list pages to use for retrieve requests."""
+    ids = []
+    for page in range(1, pages + 1):
+        response = await client.get('/api/books_all/', params={'page': page}, headers=headers)
+        if response.status_code != 200:
+            break
+        ids.extend(book['id'] for book in response.json()['results'])
+    return ids
+
+
+async def worker(client, rng, tokens, book_ids, weights, deadline, stats):
+    operations, operation_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights=operation_weights)[0]
+        headers = {'Authorization': f'Token {rng.choice(tokens)}'}
+        if operation == 'list':
+            request = client.get('/api/books_all/', params={'page': rng.randint(1, 50)}, headers=headers)
+        elif operation == 'retrieve':
+            request = client.get(f'/api/books_all/{rng.choice(book_ids)}/', headers=headers)
+        else:
+            request = client.post('/api/books_all/', headers=headers, json={
+                'title': f'Load test {rng.random():.8f}',
+                'author': 'Load Tester',
+                'isbn': random_isbn(rng),
+            })
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats.record(operation, time.perf_counter() - started, ok)
+
+
+async def main(args):
+    tokens = [fixture_token_key(args.seed, index) for index in range(args.users)]
+    weights = {'list': args.list_weight, 'retrieve': args.retrieve_weight, 'create': args.create_weight}
+    weights = {operation: weight for operation, weight in weights.items() if weight > 0}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        book_ids = await fetch_book_ids(client, {'Authorization': f'Token {tokens[0]}'}, pages=5)
+        if not book_ids:
+            raise SystemExit('No books found (or the token was rejected); run generate_fixtures first.')
+
+        stats = Stats()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, random.Random(args.seed * 1000 + n), tokens, book_ids, weights, deadline, stats)
+            for n in range(args.concurrency)
+        ))
+        stats.report(time.perf_counter() - started)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--seed', type=int, default=42, help='Seed used by generate_fixtures')
+    parser.add_argument('--users', type=int, default=1000, help='Number of fixture users to draw tokens from')
+    parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='Test length in seconds')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--list-weight', type=int, default=6)
+    parser.add_argument('--retrieve-weight', type=int, default=3)
+    parser.add_argument('--create-weight', type=int, default=1)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,162 @@
+"""
+Avatar upload pipeline shared by django_blog (blog.Profile) and
+social_media_api (accounts.CustomUser).
+
+Uploads are stored under the SHA-256 of their bytes, so identical images share
+one file. Resized WebP variants are generated off the request thread and
+recorded on the owning row once they exist; until then the original is served.
+
+Settings:
+- AVATAR_SIZES: square variant sizes in pixels (default (64, 128, 256)).
+- AVATAR_WEBP_QUALITY: WebP quality of the variants (default 80).
+- AVATAR_WORKERS: threads building variants (default 2).
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Settings are read when used, so override_settings() and late configuration apply.
+def avatar_sizes():
+    return getattr(settings, 'AVATAR_SIZES', (64, 128, 256))
+
+
+def webp_quality():
+    return getattr(settings, 'AVATAR_WEBP_QUALITY', 80)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Created on first use; AVATAR_WORKERS is read then and fixed for the process.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AVATAR_WORKERS', 2),
+                thread_name_prefix='avatar-variants',
+            )
+        return _executor
+
+# Set while ContentAddressedStorage writes a file, see get_available_name()
+_writing = threading.local()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each file as ``<dir>/<sha[:2]>/<sha><ext>`` and never writes a duplicate."""
+
+    def get_available_name(self, name, max_length=None):
+        if getattr(_writing, 'active', False):
+            # FileSystemStorage._save() asks for another name when the file
+            # turned up between our exists() check and its exclusive create:
+            # the same bytes (or the same derived file) were saved
+            # concurrently. Returning the name would make it retry forever.
+            raise FileExistsError(name)
+        # The final name is derived from the content in _save().
+        return name
+
+    def _save(self, name, content):
+        sha = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        digest = sha.hexdigest()
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + ext)
+        if self.exists(name):
+            return name
+        return self._write_new(name, content)
+
+    def save_derived(self, name, content):
+        """Save a file derived from an addressed one under its given name."""
+        return self._write_new(name, content)
+
+    def _write_new(self, name, content):
+        """Write ``name`` unless it exists; saving an existing name is a no-op."""
+        _writing.active = True
+        try:
+            return super()._save(name, content)
+        except FileExistsError:
+            return name.replace('\\', '/')
+        finally:
+            _writing.active = False
+
+
+def variant_name(name, size):
+    return f'{os.path.splitext(name)[0]}_{size}.webp'
+
+
+def generate_variants(storage, name):
+    """Write the WebP variants of ``name`` that do not exist yet; returns {size: name}."""
+    variants = {str(size): variant_name(name, size) for size in avatar_sizes()}
+    missing = {size: vname for size, vname in variants.items() if not storage.exists(vname)}
+    if not missing:
+        return variants
+
+    with storage.open(name, 'rb') as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    for size, vname in missing.items():
+        thumb = ImageOps.fit(image, (int(size), int(size)), Image.LANCZOS)
+        buf = BytesIO()
+        thumb.save(buf, 'WEBP', quality=webp_quality(), method=4)
+        variants[size] = storage.save_derived(vname, ContentFile(buf.getvalue()))
+    return variants
+
+
+def _build_and_record(model, pk, field_name, variants_field):
+    # Pool threads live as long as the process, so drop connections that are
+    # broken or past CONN_MAX_AGE, as Django does around each request.
+    close_old_connections()
+    try:
+        instance = model._default_manager.filter(pk=pk).only(field_name).first()
+        if instance is None:
+            return
+        field_file = getattr(instance, field_name)
+        if not field_file:
+            return
+        try:
+            variants = generate_variants(field_file.storage, field_file.name)
+        except Exception:
+            logger.exception('Could not build avatar variants for %s', field_file.name)
+            return
+        # Only record the variants if the picture was not replaced in the meantime.
+        model._default_manager.filter(pk=pk, **{field_name: field_file.name}).update(
+            **{variants_field: variants}
+        )
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, field_name='profile_picture', variants_field='profile_picture_variants'):
+    """Queue variant generation for ``instance`` once the current transaction commits."""
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(
+        lambda: _get_executor().submit(_build_and_record, model, pk, field_name, variants_field)
+    )
+
+
+def variant_urls(field_file, variants):
+    """{size: url} for every configured size, falling back to the original image."""
+    if not field_file:
+        return {}
+    variants = variants or {}
+    storage = field_file.storage
+    return {
+        str(size): storage.url(variants[str(size)]) if str(size) in variants else field_file.url
+        for size in avatar_sizes()
+    }
@@ -0,0 +1,237 @@
+# blog/feeds.py
+"""
+Site, tag and author feeds (RSS, Atom and JSON Feed).
+
+Feeds are rendered when posts change and stored as ``FeedDocument`` rows, so a
+feed request is a single indexed lookup that never touches the Post table.
+"""
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+from taggit.models import Tag as TaggitTag
+
+from .models import FeedDocument, Post
+
+FEED_ITEM_COUNT = 20
+SYNDICATION_FORMATS = {
+    'rss': Rss201rev2Feed,
+    'atom': Atom1Feed,
+}
+JSON_FEED_CONTENT_TYPE = 'application/feed+json; charset=utf-8'
+
+
+def _site_url():
+    return getattr(settings, 'BLOG_SITE_URL', 'http://localhost:8000').rstrip('/')
+
+
+def _feed_posts(scope, key):
+    posts = Post.objects.select_related('author').prefetch_related('tags')
+    if scope == FeedDocument.SCOPE_TAG:
+        posts = posts.filter(tags__slug=key)
+    elif scope == FeedDocument.SCOPE_AUTHOR:
+        posts = posts.filter(author__username=key)
+    return list(posts.order_by('-published_date')[:FEED_ITEM_COUNT])
+
+
+def _feed_title(scope, key):
+    if scope == FeedDocument.SCOPE_TAG:
+        return f'Django Blog - posts tagged "{key}"'
+    if scope == FeedDocument.SCOPE_AUTHOR:
+        return f'Django Blog - posts by {key}'
+    return 'Django Blog'
+
+
+def _feed_url(scope, key, fmt):
+    if scope == FeedDocument.SCOPE_SITE:
+        return _site_url() + reverse('feed', kwargs={'fmt': fmt})
+    return _site_url() + reverse(f'feed-{scope}', kwargs={'key': key, 'fmt': fmt})
+
+
+def _render_syndication(fmt, scope, key, posts):
+    feed = SYNDICATION_FORMATS[fmt](
+        title=_feed_title(scope, key),
+        link=_site_url() + reverse('post-list'),
+        description=_feed_title(scope, key),
+        feed_url=_feed_url(scope, key, fmt),
+        language=settings.LANGUAGE_CODE,
+    )
+    for post in posts:
+        feed.add_item(
+            title=post.title,
+            link=_site_url() + post.get_absolute_url(),
+            description=post.content,
+            author_name=post.author.username,
+            pubdate=post.published_date,
+            unique_id=_site_url() + post.get_absolute_url(),
+            categories=[tag.name for tag in post.tags.all()],
+        )
+    return feed.content_type, feed.writeString('utf-8')
+
+
+def _render_json(scope, key, posts):
+    document = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': _feed_title(scope, key),
+        'home_page_url': _site_url() + reverse('post-list'),
+        'feed_url': _feed_url(scope, key, 'json'),
+        'items': [
+            {
+                'id': _site_url() + post.get_absolute_url(),
+                'url': _site_url() + post.get_absolute_url(),
+                'title': post.title,
+                'content_text': post.content,
+                'date_published': post.published_date.isoformat(),
+                'authors': [{'name': post.author.username}],
+                'tags': [tag.name for tag in post.tags.all()],
+            }
+            for post in posts
+        ],
+    }
+    return JSON_FEED_CONTENT_TYPE, json.dumps(document, ensure_ascii=False)
+
+
+def build_feed(scope, key=''):
+    """Re-render every format of one feed, touching only documents whose body changed."""
+    posts = _feed_posts(scope, key)
+    rendered = {fmt: _render_syndication(fmt, scope, key, posts) for fmt in SYNDICATION_FORMATS}
+    rendered['json'] = _render_json(scope, key, posts)
+
+    existing = {
+        doc.format: doc
+        for doc in FeedDocument.objects.filter(scope=scope, key=key)
+    }
+    now = timezone.now()
+    for fmt, (content_type, body) in rendered.items():
+        etag = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        doc = existing.get(fmt)
+        if doc is not None and doc.etag == etag:
+            continue
+        FeedDocument.objects.update_or_create(
+            scope=scope, key=key, format=fmt,
+            defaults={
+                'content_type': content_type,
+                'body': body,
+                'etag': etag,
+                'last_modified': now,
+            },
+        )
+
+
+def rebuild_all_feeds():
+    build_feed(FeedDocument.SCOPE_SITE)
+    for username in Post.objects.values_list('author__username', flat=True).distinct():
+        build_feed(FeedDocument.SCOPE_AUTHOR, username)
+    for slug in TaggitTag.objects.filter(taggit_taggeditem_items__isnull=False).values_list('slug', flat=True).distinct():
+        build_feed(FeedDocument.SCOPE_TAG, slug)
+
+
+def feed_view(request, fmt, scope=FeedDocument.SCOPE_SITE, key=''):
+    if fmt not in SYNDICATION_FORMATS and fmt != 'json':
+        raise Http404('Unknown feed format')
+    doc = FeedDocument.objects.filter(scope=scope, key=key, format=fmt).first()
+    if doc is None:
+        # Only a feed that has never been built falls through to the Post table.
+        if scope == FeedDocument.SCOPE_TAG and not TaggitTag.objects.filter(slug=key).exists():
+            raise Http404('Unknown tag')
+        if scope == FeedDocument.SCOPE_AUTHOR and not Post.objects.filter(author__username=key).exists():
+            raise Http404('Unknown author')
+        build_feed(scope, key)
+        doc = FeedDocument.objects.get(scope=scope, key=key, format=fmt)
+
+    etag = f'"{doc.etag}"'
+    last_modified = int(doc.last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(doc.body, content_type=doc.content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def tag_feed_view(request, key, fmt):
+    return feed_view(request, fmt, FeedDocument.SCOPE_TAG, key)
+
+
+def author_feed_view(request, key, fmt):
+    return feed_view(request, fmt, FeedDocument.SCOPE_AUTHOR, key)
+
+
+# Incremental regeneration -------------------------------------------------
+
+_pending = threading.local()
+
+
+def _pending_feeds():
+    if not hasattr(_pending, 'feeds'):
+        _pending.feeds = set()
+    return _pending.feeds
+
+
+def _flush_pending_feeds():
+    pending = _pending_feeds()
+    while pending:
+        build_feed(*pending.pop())
+
+
+def schedule_feed_rebuild(feeds):
+    """Rebuild ``(scope, key)`` feeds once the surrounding transaction commits.
+
+    Saving a post and its tags fires several signals; inside a transaction the
+    affected feeds are collected and each one is rendered a single time.
+    """
+    _pending_feeds().update(feeds)
+    if connection.in_atomic_block:
+        # Later callbacks in the same commit find the set already drained.
+        transaction.on_commit(_flush_pending_feeds)
+    else:
+        _flush_pending_feeds()
+
+
+def _post_feeds(post, tag_slugs=()):
+    feeds = {
+        (FeedDocument.SCOPE_SITE, ''),
+        (FeedDocument.SCOPE_AUTHOR, post.author.username),
+    }
+    feeds.update((FeedDocument.SCOPE_TAG, slug) for slug in tag_slugs)
+    return feeds
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_feed_rebuild(_post_feeds(instance, instance.tags.values_list('slug', flat=True)))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    instance._feed_tag_slugs = list(instance.tags.values_list('slug', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    schedule_feed_rebuild(_post_feeds(instance, getattr(instance, '_feed_tag_slugs', ())))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._feed_tag_slugs = list(instance.tags.values_list('slug', flat=True))
+    elif action == 'post_clear':
+        schedule_feed_rebuild(_post_feeds(instance, getattr(instance, '_feed_tag_slugs', ())))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        slugs = TaggitTag.objects.filter(pk__in=pk_set).values_list('slug', flat=True)
+        schedule_feed_rebuild(_post_feeds(instance, slugs))
@@ -0,0 +1,16 @@
+# blog/images.py
+"""
+Avatar pipeline for blog.Profile. The implementation is shared with the other
+project and lives in django-avatar-pipeline/avatar_pipeline.py.
+"""
+from avatar_pipeline import (  # noqa: F401
+    ContentAddressedStorage,
+    generate_variants,
+    schedule_variants,
+    variant_urls,
+)
+
+
+def avatar_storage():
+    # Referenced by path from this app's migrations
+    return ContentAddressedStorage()
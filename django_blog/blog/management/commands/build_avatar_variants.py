@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from blog.images import generate_variants
+from blog.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP avatar variants for existing profile pictures'
+
+    def handle(self, *args, **options):
+        updated = 0
+        profiles = Profile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        for profile in profiles.only('pk', 'profile_picture', 'profile_picture_variants').iterator():
+            variants = generate_variants(profile.profile_picture.storage, profile.profile_picture.name)
+            if variants != profile.profile_picture_variants:
+                Profile.objects.filter(pk=profile.pk).update(profile_picture_variants=variants)
+                updated += 1
+        self.stdout.write(self.style.SUCCESS(f'Updated avatar variants for {updated} profiles'))
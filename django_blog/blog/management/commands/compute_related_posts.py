@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from blog.related import compute_related_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the related-posts table from shared tags and TF-IDF similarity. '
+        'Run periodically (e.g. from cron); post pages read the stored results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=5, help='Related posts kept per post')
+        parser.add_argument(
+            '--tag-weight',
+            type=float,
+            default=0.5,
+            help='Weight of tag similarity vs. text similarity, between 0 and 1',
+        )
+
+    def handle(self, *args, **options):
+        if options['top_k'] < 1:
+            raise CommandError('--top-k must be at least 1')
+        if not 0 <= options['tag_weight'] <= 1:
+            raise CommandError('--tag-weight must be between 0 and 1')
+        started = time.perf_counter()
+        written = compute_related_posts(top_k=options['top_k'], tag_weight=options['tag_weight'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Stored {written} related-post entries in {time.perf_counter() - started:.2f}s'
+            )
+        )
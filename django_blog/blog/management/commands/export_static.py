@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog.static_export import export_site
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the public post list, post detail and tag pages to static HTML. '
+        'Only pages whose content changed since the last export are re-rendered. '
+        'A post page is exported with the first page of its comments; later comment '
+        'pages (?comments=N) and the "show replies" endpoint are not exported, so '
+        'those links only work when the export is served next to the live site.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'BLOG_STATIC_EXPORT_DIR', settings.BASE_DIR / 'static_export'),
+            help='Directory to write the HTML tree into',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of render processes (defaults to the CPU count)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the manifest and re-render every page',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rendered, failed, removed = export_site(
+            options['output'], workers=options['workers'], full=options['full']
+        )
+        elapsed = time.perf_counter() - started
+
+        for url in failed:
+            self.stdout.write(self.style.WARNING(f'Skipped {url} (non-200 response)'))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Exported to {options["output"]}: {len(rendered)} rendered, '
+                f'{len(removed)} removed in {elapsed:.2f}s'
+            )
+        )
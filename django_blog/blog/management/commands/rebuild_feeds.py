@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from blog.feeds import rebuild_all_feeds
+from blog.models import FeedDocument
+
+
+class Command(BaseCommand):
+    help = 'Re-render every stored site, tag and author feed document'
+
+    def handle(self, *args, **options):
+        rebuild_all_feeds()
+        self.stdout.write(
+            self.style.SUCCESS(f'Feeds up to date ({FeedDocument.objects.count()} documents)')
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.11 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_comment_threading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('site', 'Site'), ('tag', 'Tag'), ('author', 'Author')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=150)),
+                ('format', models.CharField(choices=[('rss', 'RSS 2.0'), ('atom', 'Atom 1.0'), ('json', 'JSON Feed 1.1')], max_length=10)),
+                ('content_type', models.CharField(max_length=100)),
+                ('body', models.TextField()),
+                ('etag', models.CharField(max_length=64)),
+                ('last_modified', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key', 'format'), name='blog_feeddocument_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.11 on 2026-10-19 08:53
+
+import blog.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_feeddocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=blog.images.avatar_storage, upload_to='media/'),
+        ),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from taggit.managers import TaggableManager
 from django.urls import reverse
+
+from .images import avatar_storage, schedule_variants, variant_urls
 # blog/models.py
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -26,7 +30,7 @@ class Post(models.Model):
 	tags = TaggableManager(blank=True)
 
 	def get_absolute_url(self):
-		return reverse('post_detail', kwargs={'pk': self.pk})
+		return reverse('post-detail', kwargs={'pk': self.pk})
 
 	def __str__(self):
 		return self.title
@@ -34,7 +38,21 @@ class Post(models.Model):
 class Profile(models.Model):
 	user = models.OneToOneField(User, on_delete=models.CASCADE)
 	bio = models.TextField(max_length=500, blank=True)
-	profile_picture = models.ImageField(upload_to='media/', blank=True, null=True)
+	profile_picture = models.ImageField(upload_to='media/', storage=avatar_storage, blank=True, null=True)
+	# {size: storage name} of the WebP thumbnails, filled in by blog.images.
+	profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+	def save(self, *args, **kwargs):
+		new_upload = bool(self.profile_picture) and not self.profile_picture._committed
+		if new_upload or not self.profile_picture:
+			self.profile_picture_variants = {}
+		super().save(*args, **kwargs)
+		if new_upload:
+			schedule_variants(self)
+
+	@property
+	def avatar_urls(self):
+		return variant_urls(self.profile_picture, self.profile_picture_variants)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -47,12 +65,139 @@ def save_user_profile(sender, instance, **kwargs):
 		instance.profile.save()
 
 
+class CommentQuerySet(models.QuerySet):
+    def roots(self):
+        return self.filter(depth=0)
+
+    def thread(self, comment):
+        """All replies below ``comment`` in display order, in one indexed query."""
+        return self.filter(
+            post_id=comment.post_id,
+            path__startswith=comment.path,
+            depth__gt=comment.depth,
+        ).order_by('path')
+
+
 class Comment(models.Model):
+    # Each path segment is the comment's pk zero-padded to a fixed width, so
+    # ordering by ``path`` yields depth-first thread order and a thread is a
+    # simple prefix match on the (post, path) index.
+    PATH_SEGMENT_WIDTH = 10
+    MAX_DEPTH = 20
+
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies'
+    )
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['path']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='blog_comment_post_path_idx'),
+            models.Index(fields=['post', 'depth', 'path'], name='blog_comment_post_roots_idx'),
+        ]
+
+    def __str__(self):
+        return f'Comment by {self.author.username} on {self.post.title}'
+
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_SEGMENT_WIDTH)
+
+    def ancestor_ids(self):
+        width = self.PATH_SEGMENT_WIDTH
+        return [int(self.path[i:i + width]) for i in range(0, len(self.path) - width, width)]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+
+        # Replies deeper than MAX_DEPTH are attached to the deepest allowed
+        # ancestor so the path always fits in the column.
+        parent = self.parent
+        while parent is not None and parent.depth >= self.MAX_DEPTH:
+            parent = parent.parent
+        self.parent = parent
+        if parent is not None:
+            self.post_id = parent.post_id
+            self.depth = parent.depth + 1
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            prefix = parent.path if parent is not None else ''
+            self.path = prefix + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            ancestors = self.ancestor_ids()
+            if ancestors:
+                Comment.objects.filter(pk__in=ancestors).update(
+                    reply_count=F('reply_count') + 1
+                )
+
+    def delete(self, *args, **kwargs):
+        removed = 1 + self.reply_count
+        ancestors = self.ancestor_ids()
+        with transaction.atomic():
+            if ancestors:
+                Comment.objects.filter(pk__in=ancestors).update(
+                    reply_count=Greatest(F('reply_count') - removed, 0)
+                )
+            return super().delete(*args, **kwargs)
+
+
+class FeedDocument(models.Model):
+    """A pre-rendered syndication feed, served as-is by ``blog.feeds.feed_view``."""
+    SCOPE_SITE = 'site'
+    SCOPE_TAG = 'tag'
+    SCOPE_AUTHOR = 'author'
+    SCOPE_CHOICES = [
+        (SCOPE_SITE, 'Site'),
+        (SCOPE_TAG, 'Tag'),
+        (SCOPE_AUTHOR, 'Author'),
+    ]
+    FORMAT_CHOICES = [
+        ('rss', 'RSS 2.0'),
+        ('atom', 'Atom 1.0'),
+        ('json', 'JSON Feed 1.1'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=150, blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    content_type = models.CharField(max_length=100)
+    body = models.TextField()
+    etag = models.CharField(max_length=64)
+    last_modified = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key', 'format'], name='blog_feeddocument_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.format} feed for {self.scope} {self.key}'.strip()
+
+
+class RelatedPost(models.Model):
+    """Top-K related posts per post, precomputed by ``manage.py compute_related_posts``."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='blog_relatedpost_post_rank_unique'),
+        ]
+
     def __str__(self):
-        return f'Comment by {self.author.username} on {self.post.title}'
\ No newline at end of file
+        return f'{self.post_id} -> {self.related_id} ({self.score:.3f})'
@@ -0,0 +1,118 @@
+# blog/related.py
+"""
+Related-post scoring for the ``compute_related_posts`` batch job.
+
+Every post is scored against every other post as a weighted sum of
+  * cosine similarity of TF-IDF vectors over title + content, and
+  * cosine similarity of their taggit tag sets,
+using sparse matrices, and the top K per post are written to RelatedPost.
+The web process only ever reads RelatedPost, so NumPy/SciPy are needed by the
+batch job alone.
+"""
+import re
+
+import numpy as np
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from scipy import sparse
+from taggit.models import TaggedItem
+
+from .models import Post, RelatedPost
+
+TOKEN_RE = re.compile(r'[a-z0-9]{2,}')
+TITLE_WEIGHT = 2
+# Upper bound on dense similarity cells held in memory at once.
+BLOCK_CELLS = 4_000_000
+
+
+def _l2_normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+def tfidf_matrix(documents):
+    """Row-normalized TF-IDF matrix (CSR) for a list of token lists."""
+    vocabulary = {}
+    rows, cols = [], []
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(documents), max(len(vocabulary), 1)),
+    )
+    counts.sum_duplicates()
+    doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1.0
+    tfidf = counts.multiply(idf.astype(np.float32)).tocsr()
+    return _l2_normalize(tfidf).tocsr()
+
+
+def tag_matrix(post_ids):
+    """Row-normalized binary post x tag matrix (CSR) from the taggit through table."""
+    index = {pk: row for row, pk in enumerate(post_ids)}
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+    ).values_list('object_id', 'tag_id')
+    rows, cols, tag_index = [], [], {}
+    for object_id, tag_id in tagged:
+        if object_id in index:
+            rows.append(index[object_id])
+            cols.append(tag_index.setdefault(tag_id, len(tag_index)))
+    tags = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(post_ids), max(len(tag_index), 1)),
+    )
+    tags.sum_duplicates()
+    tags.data[:] = 1.0
+    return _l2_normalize(tags).tocsr()
+
+
+def top_related(text, tags, top_k, tag_weight):
+    """Yield (row, [(col, score), ...]) with the ``top_k`` best-scoring other rows."""
+    n = text.shape[0]
+    if n < 2:
+        return
+    k = min(top_k, n - 1)
+    block = max(1, BLOCK_CELLS // n)
+    text_t, tags_t = text.T.tocsc(), tags.T.tocsc()
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        scores = (1.0 - tag_weight) * (text[start:stop] @ text_t).toarray()
+        scores += tag_weight * (tags[start:stop] @ tags_t).toarray()
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for offset in range(stop - start):
+            yield start + offset, [
+                (int(col), float(score))
+                for col, score in zip(best[offset], best_scores[offset])
+                if score > 0
+            ]
+
+
+def compute_related_posts(top_k=5, tag_weight=0.5, batch_size=1000):
+    """Recompute the RelatedPost table; returns the number of rows written."""
+    posts = list(Post.objects.order_by('pk').values_list('pk', 'title', 'content'))
+    post_ids = [pk for pk, _, _ in posts]
+    documents = [
+        TOKEN_RE.findall(title.lower()) * TITLE_WEIGHT + TOKEN_RE.findall(content.lower())
+        for _, title, content in posts
+    ]
+    text = tfidf_matrix(documents)
+    tags = tag_matrix(post_ids)
+
+    entries = [
+        RelatedPost(post_id=post_ids[row], related_id=post_ids[col], score=score, rank=rank)
+        for row, related in top_related(text, tags, top_k, tag_weight)
+        for rank, (col, score) in enumerate(related)
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
@@ -0,0 +1,168 @@
+# blog/static_export.py
+"""
+Render the public blog pages to plain HTML files.
+
+Each page gets a fingerprint built from the rows it displays (plus the blog
+templates). Fingerprints are kept in a manifest next to the export, and only
+pages whose fingerprint changed are rendered again, in a process pool.
+
+Query-string pages have no file of their own, so a post page is exported with
+the first page of its comments only. Later comment pages and the replies
+endpoint are left to the live site.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Count, Max
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from taggit.models import TaggedItem
+
+from .models import Comment, Post, RelatedPost
+
+MANIFEST_NAME = '.export-manifest.json'
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+
+def _templates_digest():
+    sha = hashlib.sha256()
+    for path in sorted(TEMPLATE_DIR.rglob('*.html')):
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def page_fingerprints():
+    """Map every public URL to a hash of the data it renders, using five queries."""
+    salt = _templates_digest()
+    posts = list(
+        Post.objects.order_by('pk').values_list('pk', 'title', 'content', 'published_date', 'author__username')
+    )
+
+    tags_by_post = defaultdict(list)
+    posts_by_tag = defaultdict(list)
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post)
+    ).order_by('object_id', 'tag__slug').values_list('object_id', 'tag__slug', 'tag__name')
+    titles = {pk: title for pk, title, *_ in posts}
+    for post_id, slug, name in tagged:
+        tags_by_post[post_id].append((slug, name))
+        if post_id in titles:
+            posts_by_tag[slug].append((post_id, titles[post_id]))
+
+    comment_stats = {
+        row['post_id']: (row['count'], row['latest'])
+        for row in Comment.objects.values('post_id').annotate(count=Count('pk'), latest=Max('updated_at'))
+    }
+
+    related_by_post = defaultdict(list)
+    for post_id, related_id, related_title in RelatedPost.objects.order_by('post', 'rank').values_list(
+        'post_id', 'related_id', 'related__title'
+    ):
+        related_by_post[post_id].append((related_id, related_title))
+
+    pages = {reverse('post-list'): _digest(salt, [(pk, title) for pk, title, *_ in posts])}
+    for pk, title, content, published, author in posts:
+        url = reverse('post-detail', kwargs={'pk': pk})
+        pages[url] = _digest(
+            salt, title, content, published, author,
+            tags_by_post[pk], comment_stats.get(pk), related_by_post[pk],
+        )
+    for slug, tag_posts in posts_by_tag.items():
+        pages[reverse('posts_by_tag', kwargs={'tag_slug': slug})] = _digest(salt, tag_posts)
+    return pages
+
+
+def url_to_file(output_dir, url):
+    return Path(output_dir) / url.strip('/') / 'index.html'
+
+
+def _init_worker(settings_module):
+    # Needed when the pool starts workers with spawn/forkserver instead of fork.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def render_page(args):
+    """Render ``url`` as an anonymous visitor and write it to disk (runs in a worker)."""
+    output_dir, url = args
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    match = resolve(url)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return url, response.status_code
+
+    target = url_to_file(output_dir, url)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix('.html.tmp')
+    tmp.write_bytes(response.content)
+    os.replace(tmp, target)
+    return url, response.status_code
+
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump(manifest, fh, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export_site(output_dir, workers=None, full=False):
+    """Bring ``output_dir`` up to date; returns (rendered, failed, removed) URL lists."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = {} if full else load_manifest(output_dir)
+    current = page_fingerprints()
+
+    stale = [
+        url for url, digest in current.items()
+        if previous.get(url) != digest or not url_to_file(output_dir, url).exists()
+    ]
+    removed = [url for url in previous if url not in current]
+    for url in removed:
+        target = url_to_file(output_dir, url)
+        target.unlink(missing_ok=True)
+        try:
+            target.parent.rmdir()
+        except OSError:
+            pass
+
+    rendered, failed = [], []
+    if stale:
+        # Workers must open their own database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'django_blog.settings'),),
+        ) as pool:
+            jobs = [(str(output_dir), url) for url in stale]
+            for url, status in pool.map(render_page, jobs, chunksize=max(1, len(jobs) // 64)):
+                (rendered if status == 200 else failed).append(url)
+
+    manifest = {url: current[url] for url in current if url not in failed}
+    save_manifest(output_dir, manifest)
+    return rendered, failed, removed
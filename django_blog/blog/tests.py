@@ -1,3 +1,378 @@
-from django.test import TestCase
+import hashlib
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from . import static_export, views
+from .images import generate_variants
+from .models import Comment, FeedDocument, Post, Profile, RelatedPost
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.post = Post.objects.create(title='Hello', content='World', author=self.user)
+
+    def comment(self, parent=None, content='text'):
+        return Comment.objects.create(post=self.post, author=self.user, parent=parent, content=content)
+
+    def test_path_and_depth(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        nested = self.comment(parent=reply)
+        self.assertEqual(root.path, Comment.path_segment(root.pk))
+        self.assertEqual(reply.path, root.path + Comment.path_segment(reply.pk))
+        self.assertEqual(nested.path, reply.path + Comment.path_segment(nested.pk))
+        self.assertEqual([root.depth, reply.depth, nested.depth], [0, 1, 2])
+        self.assertEqual(nested.ancestor_ids(), [root.pk, reply.pk])
+
+    def test_thread_is_in_depth_first_order(self):
+        root = self.comment()
+        first = self.comment(parent=root)
+        second = self.comment(parent=root)
+        first_child = self.comment(parent=first)
+        other_root = self.comment()
+        self.comment(parent=other_root)
+        self.assertEqual(list(Comment.objects.thread(root)), [first, first_child, second])
+        self.assertEqual(list(Comment.objects.roots()), [root, other_root])
+
+    def test_reply_count_counts_all_descendants(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.comment(parent=reply)
+        self.comment(parent=root)
+        root.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual(root.reply_count, 3)
+        self.assertEqual(reply.reply_count, 1)
+
+    def test_replies_below_max_depth_attach_to_deepest_ancestor(self):
+        parent = self.comment()
+        for _ in range(Comment.MAX_DEPTH):
+            parent = self.comment(parent=parent)
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH)
+        too_deep = self.comment(parent=parent)
+        self.assertEqual(too_deep.depth, Comment.MAX_DEPTH)
+        self.assertEqual(too_deep.parent_id, parent.parent_id)
+
+    def test_delete_subtracts_the_subtree(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.comment(parent=reply)
+        self.comment(parent=root)
+        reply.refresh_from_db()
+        reply.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_reply_view_creates_a_reply(self):
+        root = self.comment()
+        self.client.login(username='alice', password='pass12345')
+        response = self.client.post(reverse('comment-reply', args=[root.pk]), {'content': 'reply'})
+        self.assertRedirects(response, self.post.get_absolute_url())
+        reply = Comment.objects.get(content='reply')
+        self.assertEqual(reply.parent, root)
+        self.assertEqual(reply.post, self.post)
+        self.assertEqual(reply.depth, 1)
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+
+    def test_delete_view_updates_ancestors(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.client.login(username='alice', password='pass12345')
+        response = self.client.post(reverse('comment-delete', args=[reply.pk]))
+        self.assertRedirects(response, self.post.get_absolute_url())
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 0)
+
+    def test_replies_endpoint_pages_through_the_thread(self):
+        root = self.comment()
+        replies = [self.comment(parent=root, content=f'reply {n}') for n in range(views.REPLIES_PER_PAGE + 5)]
+        url = reverse('comment-replies', args=[root.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['replies'], replies[:views.REPLIES_PER_PAGE])
+        self.assertEqual(response.context['next_offset'], views.REPLIES_PER_PAGE)
+
+        response = self.client.get(url, {'offset': views.REPLIES_PER_PAGE})
+        self.assertEqual(response.context['replies'], replies[views.REPLIES_PER_PAGE:])
+        self.assertIsNone(response.context['next_offset'])
+
+    def test_post_detail_pagination_labels(self):
+        for n in range(views.COMMENTS_PER_PAGE + 1):
+            self.comment(content=f'root {n}')
+        url = self.post.get_absolute_url()
+        self.assertContains(self.client.get(url), '?comments=2">Newer comments</a>')
+        self.assertContains(self.client.get(url, {'comments': 2}), '?comments=1">Older comments</a>')
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.post = self.create_post(title='First post', tags=['django'])
+
+    def create_post(self, title, tags=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title=title, content='Body', author=self.user)
+            post.tags.add(*tags)
+        return post
+
+    def test_formats(self):
+        rss = self.client.get(reverse('feed', args=['rss']))
+        self.assertEqual(rss.status_code, 200)
+        self.assertTrue(rss['Content-Type'].startswith('application/rss+xml'))
+        self.assertContains(rss, '<title>First post</title>')
+
+        atom = self.client.get(reverse('feed', args=['atom']))
+        self.assertTrue(atom['Content-Type'].startswith('application/atom+xml'))
+        self.assertContains(atom, '<title>First post</title>')
+
+        response = self.client.get(reverse('feed', args=['json']))
+        self.assertEqual(response['Content-Type'], 'application/feed+json; charset=utf-8')
+        document = json.loads(response.content)
+        self.assertEqual(document['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual([item['title'] for item in document['items']], ['First post'])
+        self.assertEqual(document['items'][0]['tags'], ['django'])
+
+    def test_unknown_format_is_404(self):
+        self.assertEqual(self.client.get(reverse('feed', args=['xml'])).status_code, 404)
+
+    def test_unknown_tag_and_author_are_404(self):
+        self.assertEqual(self.client.get(reverse('feed-tag', args=['missing', 'rss'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('feed-author', args=['nobody', 'rss'])).status_code, 404)
+
+    def test_tag_and_author_feeds(self):
+        self.create_post(title='Untagged post')
+        tag_feed = json.loads(self.client.get(reverse('feed-tag', args=['django', 'json'])).content)
+        self.assertEqual([item['title'] for item in tag_feed['items']], ['First post'])
+        author_feed = json.loads(self.client.get(reverse('feed-author', args=['alice', 'json'])).content)
+        self.assertEqual(len(author_feed['items']), 2)
+
+    def test_conditional_requests_return_304(self):
+        url = reverse('feed', args=['rss'])
+        response = self.client.get(url)
+        doc = FeedDocument.objects.get(scope=FeedDocument.SCOPE_SITE, key='', format='rss')
+        self.assertEqual(response['ETag'], f'"{doc.etag}"')
+        self.assertIn('Last-Modified', response)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_saving_a_post_rebuilds_the_feed(self):
+        url = reverse('feed', args=['rss'])
+        etag = self.client.get(url)['ETag']
+        self.post.title = 'Renamed post'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '<title>Renamed post</title>')
+
+    def test_unchanged_feed_keeps_its_document(self):
+        before = FeedDocument.objects.get(scope=FeedDocument.SCOPE_SITE, key='', format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        after = FeedDocument.objects.get(pk=before.pk)
+        self.assertEqual(after.etag, before.etag)
+        self.assertEqual(after.last_modified, before.last_modified)
+
+    def test_deleting_a_post_rebuilds_its_tag_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        tag_feed = FeedDocument.objects.get(scope=FeedDocument.SCOPE_TAG, key='django', format='json')
+        self.assertEqual(json.loads(tag_feed.body)['items'], [])
+
+
+class InlineExecutor:
+    """Stands in for ProcessPoolExecutor so pages render against the test database."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, iterable, chunksize=1):
+        return map(fn, iterable)
+
+
+@mock.patch.object(static_export, 'ProcessPoolExecutor', InlineExecutor)
+class StaticExportTests(TransactionTestCase):
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.post = Post.objects.create(title='First post', content='Body', author=self.user)
+        self.post.tags.add('django')
+
+    def test_export_writes_every_public_page(self):
+        rendered, failed, removed = static_export.export_site(self.output)
+        self.assertEqual(sorted(rendered), sorted([
+            reverse('post-list'),
+            self.post.get_absolute_url(),
+            reverse('posts_by_tag', kwargs={'tag_slug': 'django'}),
+        ]))
+        self.assertEqual((failed, removed), ([], []))
+        page = static_export.url_to_file(self.output, self.post.get_absolute_url()).read_text()
+        self.assertIn('First post', page)
+
+    def test_second_run_renders_nothing(self):
+        static_export.export_site(self.output)
+        rendered, failed, removed = static_export.export_site(self.output)
+        self.assertEqual((rendered, failed, removed), ([], [], []))
+
+    def test_only_changed_pages_are_rendered(self):
+        static_export.export_site(self.output)
+        Comment.objects.create(post=self.post, author=self.user, content='New comment')
+        rendered, _, _ = static_export.export_site(self.output)
+        self.assertEqual(rendered, [self.post.get_absolute_url()])
+
+    def test_deleted_posts_are_removed(self):
+        static_export.export_site(self.output)
+        url = self.post.get_absolute_url()
+        self.post.delete()
+        _, _, removed = static_export.export_site(self.output)
+        self.assertIn(url, removed)
+        self.assertFalse(static_export.url_to_file(self.output, url).exists())
+
+    def test_command_reports_the_counts(self):
+        call_command('export_static', output=self.output, stdout=StringIO())
+        out = StringIO()
+        call_command('export_static', output=self.output, stdout=out)
+        self.assertIn('0 rendered, 0 removed', out.getvalue())
+
+
+def png_bytes(color='red', size=(300, 200)):
+    buf = BytesIO()
+    Image.new('RGB', size, color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, username, data):
+        user = User.objects.create_user(username=username, password='pass12345')
+        profile = user.profile
+        profile.profile_picture = SimpleUploadedFile('avatar.PNG', data, content_type='image/png')
+        with self.captureOnCommitCallbacks() as callbacks:
+            profile.save()
+        self.assertEqual(len(callbacks), 1)
+        return profile
+
+    def test_identical_uploads_share_one_file(self):
+        data = png_bytes()
+        first = self.upload('alice', data)
+        second = self.upload('bob', data)
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first.profile_picture.name, f'media/{digest[:2]}/{digest}.png')
+        self.assertEqual(second.profile_picture.name, first.profile_picture.name)
+        self.assertNotEqual(self.upload('carol', png_bytes('blue')).profile_picture.name, first.profile_picture.name)
+
+    def test_command_records_webp_variants(self):
+        profile = self.upload('alice', png_bytes())
+        self.assertEqual(profile.avatar_urls['64'], profile.profile_picture.url)
+
+        call_command('build_avatar_variants', stdout=StringIO())
+        profile = Profile.objects.get(pk=profile.pk)
+        base = profile.profile_picture.name[:-len('.png')]
+        self.assertEqual(profile.profile_picture_variants, {
+            '64': f'{base}_64.webp', '128': f'{base}_128.webp', '256': f'{base}_256.webp',
+        })
+        storage = profile.profile_picture.storage
+        for size, name in profile.profile_picture_variants.items():
+            with storage.open(name) as fh, Image.open(fh) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (int(size), int(size))))
+        self.assertTrue(profile.avatar_urls['128'].endswith('_128.webp'))
+
+    def test_sizes_are_read_from_settings_when_used(self):
+        profile = self.upload('alice', png_bytes())
+        with override_settings(AVATAR_SIZES=(32,)):
+            variants = generate_variants(profile.profile_picture.storage, profile.profile_picture.name)
+            self.assertEqual(list(profile.avatar_urls), ['32'])
+        self.assertEqual(list(variants), ['32'])
+
+    def test_new_upload_clears_old_variants(self):
+        profile = self.upload('alice', png_bytes())
+        call_command('build_avatar_variants', stdout=StringIO())
+        profile = Profile.objects.get(pk=profile.pk)
+        profile.profile_picture = SimpleUploadedFile('new.png', png_bytes('green'), content_type='image/png')
+        with self.captureOnCommitCallbacks():
+            profile.save()
+        self.assertEqual(Profile.objects.get(pk=profile.pk).profile_picture_variants, {})
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+
+    def create_post(self, title, content, tags=()):
+        post = Post.objects.create(title=title, content=content, author=self.user)
+        post.tags.add(*tags)
+        return post
+
+    def related(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list('related__title', 'rank'))
+
+    def test_ranked_by_text_similarity(self):
+        python = self.create_post('Python decorators', 'python functions wrap decorators')
+        close = self.create_post('Python closures', 'python functions capture closures')
+        self.create_post('Gardening', 'tomatoes need sun')
+        call_command('compute_related_posts', top_k=5, tag_weight=0, stdout=StringIO())
+        # Posts with nothing in common score 0 and are not stored.
+        self.assertEqual(self.related(python), [('Python closures', 0)])
+        self.assertEqual(self.related(close), [('Python decorators', 0)])
+
+    def test_ordering_and_top_k(self):
+        post = self.create_post('Caching', 'redis eviction ttl')
+        self.create_post('Redis eviction', 'redis eviction ttl policies')
+        self.create_post('Redis basics', 'redis keys values')
+        self.create_post('Slab allocator', 'ttl slabs pages allocator memory')
+        call_command('compute_related_posts', top_k=2, tag_weight=0, stdout=StringIO())
+        self.assertEqual(self.related(post), [('Redis eviction', 0), ('Redis basics', 1)])
+        scores = list(RelatedPost.objects.filter(post=post).values_list('score', flat=True))
+        self.assertGreater(scores[0], scores[1])
+
+    def test_tag_weight_blends_tags_and_text(self):
+        post = self.create_post('Deploying', 'gunicorn nginx deploy', tags=['ops'])
+        self.create_post('Deploy checklist', 'gunicorn nginx deploy steps')
+        self.create_post('Backups', 'nightly dumps', tags=['ops'])
+
+        call_command('compute_related_posts', top_k=1, tag_weight=0, stdout=StringIO())
+        self.assertEqual(self.related(post), [('Deploy checklist', 0)])
+        call_command('compute_related_posts', top_k=1, tag_weight=1, stdout=StringIO())
+        self.assertEqual(self.related(post), [('Backups', 0)])
+        self.assertAlmostEqual(RelatedPost.objects.get(post=post).score, 1.0, places=5)
+
+    def test_rejects_invalid_options(self):
+        for options in ({'top_k': 0}, {'top_k': -1}, {'tag_weight': -0.1}, {'tag_weight': 1.5}):
+            with self.subTest(**options), self.assertRaises(CommandError):
+                call_command('compute_related_posts', stdout=StringIO(), **options)
@@ -1,7 +1,7 @@
-from .views import CommentCreateView, CommentUpdateView, CommentDeleteView
+from .views import CommentCreateView, CommentUpdateView, CommentDeleteView, CommentReplyView
 
 from django.urls import path
-from . import views
+from . import feeds, views
 from django.contrib.auth import views as auth_views
 from .views import (
     PostListView, PostDetailView, PostCreateView, PostUpdateView, PostDeleteView
@@ -20,9 +20,14 @@ urlpatterns = [
     path('post/<int:pk>/update/', PostUpdateView.as_view(), name='post-edit'),  # Added for prompt
     path('post/<int:pk>/delete/', PostDeleteView.as_view(), name='post-delete'),  # Added for prompt
      path('post/<int:pk>/comments/new/', CommentCreateView.as_view(), name='comment-add'),
+    path('comment/<int:pk>/reply/', CommentReplyView.as_view(), name='comment-reply'),
+    path('comment/<int:pk>/replies/', views.comment_replies, name='comment-replies'),
     path('comment/<int:pk>/update/', CommentUpdateView.as_view(), name='comment-update'),
     path('comment/<int:pk>/delete/', CommentDeleteView.as_view(), name='comment-delete'),# The previous plural 'posts/' routes can be kept for compatibility if needed
     path('search/', post_search, name='post_search'),
+    path('feeds/<str:fmt>/', feeds.feed_view, name='feed'),
+    path('feeds/tag/<slug:key>/<str:fmt>/', feeds.tag_feed_view, name='feed-tag'),
+    path('feeds/author/<str:key>/<str:fmt>/', feeds.author_feed_view, name='feed-author'),
     path('tags/<slug:tag_slug>/', posts_by_tag, name='posts_by_tag'),
     path('tags/<str:tag_name>/', PostByTagListView.as_view(), name='posts-by-tag'),
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
-from .forms import RegisterForm, LoginForm
+from .forms import RegisterForm, LoginForm, ProfileForm
 from django.contrib import messages
 
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
@@ -17,14 +17,32 @@ from .models import Post, Comment
 from .forms import CommentForm
 # blog/views.py
 from django.db.models import Q
+from django.core.paginator import Paginator
+
+COMMENTS_PER_PAGE = 20
+REPLIES_PER_PAGE = 50
 
 # blog/views.py
-from .models import Tag
+from taggit.models import Tag as TaggitTag
 
 def posts_by_tag(request, tag_slug):
-    tag = get_object_or_404(Tag, slug=tag_slug)
-    posts = Post.objects.filter(tags=tag)
+    # Post.tags is a taggit TaggableManager, so tag pages resolve taggit slugs.
+    tag = get_object_or_404(TaggitTag, slug=tag_slug)
+    posts = Post.objects.filter(tags__slug=tag_slug)
     return render(request, 'blog/posts_by_tag.html', {'tag': tag, 'posts': posts})
+
+class PostByTagListView(ListView):
+    model = Post
+    template_name = 'blog/posts_by_tag.html'
+    context_object_name = 'posts'
+
+    def get_queryset(self):
+        return Post.objects.filter(tags__name__in=[self.kwargs['tag_name']]).distinct()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = {'name': self.kwargs['tag_name']}
+        return context
 def post_search(request):
     query = request.GET.get('q')
     results = []
@@ -38,20 +56,53 @@ def post_search(request):
 class CommentCreateView(LoginRequiredMixin, CreateView):
     model = Comment
     form_class = CommentForm
-    template_name = 'comment_form.html'
+    template_name = 'blog/comment_form.html'
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        form.instance.post = get_object_or_404(Post, pk=self.kwargs['pk'])
         return super().form_valid(form)
 
     def get_success_url(self):
         return self.object.post.get_absolute_url()
 
+class CommentReplyView(CommentCreateView):
+    def dispatch(self, request, *args, **kwargs):
+        self.parent = get_object_or_404(Comment, pk=self.kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['parent'] = self.parent
+        return context
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
+        form.instance.post_id = self.parent.post_id
+        form.instance.parent = self.parent
+        return super(CommentCreateView, self).form_valid(form)
+
+def comment_replies(request, pk):
+    """Render one page of a thread below ``pk`` for "load more replies" links."""
+    root = get_object_or_404(Comment.objects.only('pk', 'post_id', 'path', 'depth', 'reply_count'), pk=pk)
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        offset = 0
+    end = offset + REPLIES_PER_PAGE
+    replies = list(Comment.objects.thread(root).select_related('author')[offset:end])
+    # reply_count is denormalized, so no COUNT query is needed to know if more remain.
+    next_offset = end if end < root.reply_count else None
+    return render(request, 'blog/comment_replies.html', {
+        'root': root,
+        'replies': replies,
+        'next_offset': next_offset,
+    })
+
 class CommentUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Comment
     form_class = CommentForm
-    template_name = 'comment_form.html'
+    template_name = 'blog/comment_form.html'
 
     def test_func(self):
         return self.request.user == self.get_object().author
@@ -61,7 +112,7 @@ class CommentUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
 
 class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Comment
-    template_name = 'comment_confirm_delete.html'
+    template_name = 'blog/comment_confirm_delete.html'
 
     def test_func(self):
         return self.request.user == self.get_object().author
@@ -71,12 +122,23 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 class PostListView(ListView):
     model = Post
-    template_name = 'post_list.html'
+    template_name = 'blog/post_list.html'
     context_object_name = 'posts'
 
 class PostDetailView(DetailView):
     model = Post
-    template_name = 'post_detail.html'
+    template_name = 'blog/post_detail.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        roots = self.object.comments.roots().select_related('author').order_by('path')
+        paginator = Paginator(roots, COMMENTS_PER_PAGE)
+        context['comments_page'] = paginator.get_page(self.request.GET.get('comments'))
+        context['related_posts'] = [
+            entry.related
+            for entry in self.object.related_entries.select_related('related').order_by('rank')
+        ]
+        return context
 
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
@@ -162,8 +224,14 @@ def profile_view(request):
         if last_name:
             user.last_name = last_name
         
-        user.save()
-        messages.success(request, 'Profile updated successfully.')
-        return redirect('profile')
-    
-    return render(request, 'blog/profile.html', {'user': request.user})
\ No newline at end of file
+        profile_form = ProfileForm(request.POST, request.FILES, instance=user.profile)
+        if profile_form.is_valid():
+            user.save()
+            profile_form.save()
+            messages.success(request, 'Profile updated successfully.')
+            return redirect('profile')
+        # Invalid (e.g. not an image): show the bound form with its errors
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        profile_form = ProfileForm(instance=request.user.profile)
+    return render(request, 'blog/profile.html', {'user': request.user, 'profile_form': profile_form})
\ No newline at end of file
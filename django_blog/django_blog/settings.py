@@ -10,12 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
+import sys
 from pathlib import Path
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The avatar pipeline is shared with social_media_api and lives next to this
+# project. `pipenv install` installs it; plain checkouts import it from there.
+AVATAR_PIPELINE_DIR = BASE_DIR.parent / 'django-avatar-pipeline'
+if importlib.util.find_spec('avatar_pipeline') is None and AVATAR_PIPELINE_DIR.is_dir():
+    sys.path.append(str(AVATAR_PIPELINE_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -150,3 +158,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"   # useful for collectstatic in productio
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Absolute base URL used for links inside the pre-rendered RSS/Atom/JSON feeds.
+BLOG_SITE_URL = 'http://localhost:8000'
+
+# Where `manage.py export_static` writes the pre-rendered public pages.
+BLOG_STATIC_EXPORT_DIR = BASE_DIR / 'static_export'
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from accounts.images import generate_variants
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP avatar variants for existing profile pictures'
+
+    def handle(self, *args, **options):
+        updated = 0
+        users = User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        for user in users.only('pk', 'profile_picture', 'profile_picture_variants').iterator():
+            variants = generate_variants(user.profile_picture.storage, user.profile_picture.name)
+            if variants != user.profile_picture_variants:
+                User.objects.filter(pk=user.pk).update(profile_picture_variants=variants)
+                updated += 1
+        self.stdout.write(self.style.SUCCESS(f'Updated avatar variants for {updated} users'))
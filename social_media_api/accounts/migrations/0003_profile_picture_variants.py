@@ -0,0 +1,24 @@
+# Generated by Django 5.1.11 on 2026-10-19 08:54
+
+import accounts.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_following_alter_customuser_followers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=accounts.images.avatar_storage, upload_to='profile_pics/'),
+        ),
+    ]
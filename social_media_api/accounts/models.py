@@ -2,9 +2,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .images import avatar_storage, schedule_variants, variant_urls
+
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', storage=avatar_storage, blank=True, null=True)
+    # {size: storage name} of the WebP thumbnails, filled in by accounts.images.
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     followers = models.ManyToManyField(
         'self',
         symmetrical=False,
@@ -20,3 +24,16 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        new_upload = bool(self.profile_picture) and not self.profile_picture._committed
+        if new_upload or not self.profile_picture:
+            self.profile_picture_variants = {}
+        super().save(*args, **kwargs)
+        if new_upload:
+            schedule_variants(self)
+
+    @property
+    def avatar_urls(self):
+        return variant_urls(self.profile_picture, self.profile_picture_variants)
+
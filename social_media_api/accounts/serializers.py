@@ -27,6 +27,15 @@ class UserLoginSerializer(serializers.Serializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     followers = serializers.StringRelatedField(many=True)
+    profile_picture_variants = serializers.SerializerMethodField()
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers')
+        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_variants', 'followers')
+
+    def get_profile_picture_variants(self, obj):
+        """Resized WebP avatar URLs keyed by pixel size; the original until they are built."""
+        request = self.context.get('request')
+        urls = obj.avatar_urls
+        if request is not None:
+            urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+        return urls
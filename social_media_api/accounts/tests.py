@@ -1,3 +1,62 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .serializers import UserProfileSerializer
+
+User = get_user_model()
+
+
+def png_bytes(color='red', size=(300, 200)):
+    buf = BytesIO()
+    Image.new('RGB', size, color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create_user(self, username, data):
+        picture = SimpleUploadedFile('avatar.png', data, content_type='image/png')
+        with self.captureOnCommitCallbacks() as callbacks:
+            user = User.objects.create_user(username=username, password='pass12345', profile_picture=picture)
+        self.assertEqual(len(callbacks), 1)
+        return user
+
+    def test_identical_uploads_share_one_file(self):
+        data = png_bytes()
+        first = self.create_user('alice', data)
+        second = self.create_user('bob', data)
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first.profile_picture.name, f'profile_pics/{digest[:2]}/{digest}.png')
+        self.assertEqual(second.profile_picture.name, first.profile_picture.name)
+
+    def test_command_records_webp_variants(self):
+        user = self.create_user('alice', png_bytes())
+        self.assertEqual(UserProfileSerializer(user).data['profile_picture_variants'], {
+            '64': user.profile_picture.url, '128': user.profile_picture.url, '256': user.profile_picture.url,
+        })
+
+        call_command('build_avatar_variants', stdout=StringIO())
+        user = User.objects.get(pk=user.pk)
+        base = user.profile_picture.name[:-len('.png')]
+        self.assertEqual(user.profile_picture_variants, {
+            '64': f'{base}_64.webp', '128': f'{base}_128.webp', '256': f'{base}_256.webp',
+        })
+        for size, name in user.profile_picture_variants.items():
+            with user.profile_picture.storage.open(name) as fh, Image.open(fh) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (int(size), int(size))))
+        variants = UserProfileSerializer(user).data['profile_picture_variants']
+        self.assertTrue(variants['256'].endswith(f'{base}_256.webp'))
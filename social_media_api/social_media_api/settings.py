@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The avatar pipeline is shared with django_blog and lives next to this
+# project. `pipenv install` installs it; plain checkouts import it from there.
+AVATAR_PIPELINE_DIR = BASE_DIR.parent / 'django-avatar-pipeline'
+if importlib.util.find_spec('avatar_pipeline') is None and AVATAR_PIPELINE_DIR.is_dir():
+    sys.path.append(str(AVATAR_PIPELINE_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/